@@ -35,4 +35,4 @@ class ChatbotKnowledgeAdmin(admin.ModelAdmin):
     list_display = ["id", "category", "question_pattern", "is_active", "created_at"]
     list_filter = ["category", "is_active", "created_at"]
     search_fields = ["question_pattern", "question_keywords", "answer"]
-    readonly_fields = ["created_at"]
+    readonly_fields = ["created_at", "updated_at"]
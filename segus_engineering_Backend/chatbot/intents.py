@@ -0,0 +1,394 @@
+"""
+Reconnaissance d'intention du chatbot.
+
+Les intentions intégrées et les entrées actives de ChatbotKnowledge sont
+compilées en un seul automate d'Aho-Corasick sur le texte replié (minuscules,
+sans accents). Un message est parcouru une fois : chaque terme trouvé en
+début de mot (mot entier pour les termes de trois lettres ou moins) crédite
+les intentions qui le contiennent. Une intention est retenue si chacun de ses
+groupes de termes est présent ; le score est la somme des poids des termes
+distincts trouvés, les égalités étant départagées par l'ordre de déclaration
+(base de connaissances d'abord, puis intentions intégrées).
+
+L'automate est gardé en mémoire du processus et recompilé seulement quand la
+base de connaissances change (nombre de lignes, dernière modification).
+"""
+
+import threading
+import unicodedata
+from collections import deque
+
+from django.db.models import Count, Max
+
+# Poids d'un mot-clé et de la phrase type (question_pattern) d'une entrée
+KEYWORD_WEIGHT = 1.0
+PATTERN_WEIGHT = 2.0
+WHOLE_WORD_MAX_LENGTH = 3
+
+_cache_lock = threading.Lock()
+_cache = {"version": None, "matcher": None}
+
+TASKS_VIEW_ANSWER = """📋 **Comment voir vos tâches :**
+
+1. **Dans l'espace Admin :**
+   • Allez dans l'onglet "Projets"
+   • Cliquez sur un projet pour voir ses tâches
+   • Utilisez les filtres pour trier
+
+2. **Dans l'espace Employé :**
+   • Menu "Mes Tâches" 
+   • Tableau de bord personnel
+
+🔗 **Raccourci :** Cliquez sur votre nom d'utilisateur → "Mes Tâches" """
+
+TASKS_CREATE_ANSWER = """➕ **Créer une nouvelle tâche :**
+
+1. Sélectionnez un projet
+2. Cliquez sur "Ajouter une tâche"
+3. Remplissez :
+   • Titre et description
+   • Dates de début/fin
+   • Priorité
+   • Employés assignés
+4. Sauvegardez
+
+🔗 **Raccourci :** Bouton "+" dans la vue projet"""
+
+PROJECTS_VIEW_ANSWER = """📁 **Comment voir vos projets :**
+
+1. **Menu principal :** Onglet "Projets"
+2. **Filtres disponibles :**
+   • Par statut (Actif, Terminé, En pause)
+   • Par employé assigné
+   • Par date
+
+3. **Vues :**
+   • Grille (cartes)
+   • Liste (tableau)
+
+🔗 **Raccourci :** Ctrl+P pour accès rapide"""
+
+PROJECTS_CREATE_ANSWER = """🆕 **Créer un nouveau projet :**
+
+1. Cliquez sur "Nouveau Projet"
+2. Remplissez les informations :
+   • Titre et description
+   • Dates de début/fin
+   • Statut initial
+3. Assignez les employés
+4. Sauvegardez
+
+🔗 **Raccourci :** Bouton "+" en haut à droite"""
+
+NAVIGATION_ANSWER = """🧭 **Navigation dans l'application :**
+
+**Menu principal :**
+• 🏠 Tableau de bord
+• 📁 Projets
+• 👥 Employés
+• 📊 Rapports
+• ⚙️ Paramètres
+
+**Raccourcis clavier :**
+• Ctrl+H : Accueil
+• Ctrl+P : Projets
+• Ctrl+E : Employés
+• Ctrl+/ : Aide
+
+**Menu utilisateur :**
+• Profil
+• Mes tâches
+• Notifications
+• Déconnexion"""
+
+EMPLOYEES_ANSWER = """👥 **Gestion des employés :**
+
+**Voir les employés :**
+• Menu "Employés"
+• Recherche par nom/email
+• Filtres par rôle
+
+**Actions disponibles :**
+• Ajouter un employé
+• Modifier les informations
+• Assigner à des projets
+• Voir les statistiques
+
+🔗 **Raccourci :** Ctrl+E"""
+
+NOTIFICATIONS_ANSWER = """🔔 **Notifications :**
+
+**Types de notifications :**
+• Assignation à un projet
+• Nouvelle tâche
+• Échéances proches
+• Mises à jour de statut
+
+**Où les voir :**
+• Icône cloche en haut à droite
+• Emails automatiques
+• Tableau de bord
+
+🔗 **Raccourci :** Cliquez sur l'icône 🔔"""
+
+REPORTS_ANSWER = """📊 **Rapports et statistiques :**
+
+**Rapports disponibles :**
+• Progression des projets
+• Performance des employés
+• Temps de travail
+• Statistiques globales
+
+**Accès :**
+• Menu "Rapports"
+• Tableaux de bord
+• Export Excel/PDF
+
+🔗 **Raccourci :** Menu → Rapports"""
+
+GREETING_ANSWER = """👋 Bonjour {name} !
+
+Je suis votre assistant Segus Engineering. Je peux vous aider avec :
+
+• 📋 Gestion des tâches
+• 📁 Navigation dans les projets  
+• 👥 Questions sur les employés
+• 🔔 Notifications
+• 📊 Rapports
+
+**Exemples de questions :**
+• "Comment voir mes tâches ?"
+• "Comment créer un projet ?"
+• "Où sont les notifications ?"
+
+Que puis-je faire pour vous ?"""
+
+HELP_ANSWER = """❓ **Aide - Segus Engineering**
+
+**Questions fréquentes :**
+• "Comment voir mes tâches ?"
+• "Comment créer un projet ?"
+• "Où sont mes notifications ?"
+• "Comment assigner un employé ?"
+
+**Raccourcis utiles :**
+• Ctrl+H : Accueil
+• Ctrl+P : Projets
+• Ctrl+E : Employés
+• Ctrl+/ : Cette aide
+
+**Navigation rapide :**
+• Menu principal en haut
+• Barre de recherche
+• Filtres dans chaque section
+
+Posez-moi une question spécifique !"""
+
+FALLBACK_ANSWER = """🤔 Je ne suis pas sûr de comprendre votre question.
+
+**Je peux vous aider avec :**
+• 📋 Gestion des tâches et projets
+• 🧭 Navigation dans l'application
+• 👥 Questions sur les employés
+• 🔔 Notifications et alertes
+
+**Exemples de questions :**
+• "Comment voir mes tâches ?"
+• "Comment créer un nouveau projet ?"
+• "Où trouver les notifications ?"
+
+Reformulez votre question ou tapez "aide" pour plus d'options."""
+
+TASK_WORDS = ("tâche", "taches", "task", "travail")
+PROJECT_WORDS = ("projet", "project")
+
+# (nom, groupes de termes requis, réponse) dans l'ordre de priorité historique
+BUILTIN_INTENTS = [
+    ("tasks_view", (TASK_WORDS, ("voir", "afficher", "consulter", "comment")), TASKS_VIEW_ANSWER),
+    ("tasks_create", (TASK_WORDS, ("créer", "ajouter", "nouvelle")), TASKS_CREATE_ANSWER),
+    ("projects_view", (PROJECT_WORDS, ("voir", "afficher", "consulter")), PROJECTS_VIEW_ANSWER),
+    ("projects_create", (PROJECT_WORDS, ("créer", "nouveau")), PROJECTS_CREATE_ANSWER),
+    ("navigation", (("navigation", "menu", "aller", "accéder"),), NAVIGATION_ANSWER),
+    ("employees", (("employé", "employe", "utilisateur", "user"),), EMPLOYEES_ANSWER),
+    ("notifications", (("notification", "alerte", "message"),), NOTIFICATIONS_ANSWER),
+    ("reports", (("rapport", "statistique", "analytics"),), REPORTS_ANSWER),
+    ("greeting", (("bonjour", "salut", "hello", "hi"),), GREETING_ANSWER),
+    ("help", (("aide", "help", "comment"),), HELP_ANSWER),
+]
+
+
+def fold(text):
+    """Minuscules sans accents"""
+    text = str(text or "")
+    if text.isascii():
+        return text.lower()
+    normalized = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in normalized if not unicodedata.combining(char)).lower()
+
+
+class Intent:
+    """Intention : groupes de termes pondérés {terme replié: poids} et réponse"""
+
+    def __init__(self, name, groups, answer, source="builtin"):
+        self.name = name
+        self.groups = groups
+        self.answer = answer
+        self.source = source
+
+    def render(self, user=None):
+        name = (user.first_name or user.username) if user is not None else ""
+        return self.answer.replace("{name}", name)
+
+
+class Automaton:
+    """Automate d'Aho-Corasick : tous les termes trouvés en un seul passage"""
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+        self.alphabet = frozenset()
+
+    def add(self, term, value):
+        node = 0
+        for char in term:
+            following = self.goto[node].get(char)
+            if following is None:
+                following = len(self.goto)
+                self.goto[node][char] = following
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            node = following
+        self.outputs[node].append((len(term), value))
+
+    def build(self):
+        """Liens d'échec en largeur ; chaque nœud hérite des sorties de son suffixe"""
+        self.alphabet = frozenset(char for node in self.goto for char in node)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    def step(self, node, char):
+        """
+        Transition complète (échecs résolus), mémorisée dans la table goto pour
+        les seuls caractères des termes : la table reste bornée par
+        nœuds × alphabet quels que soient les messages reçus. Un caractère
+        absent de tous les termes ramène à la racine sans rien mémoriser.
+        """
+        if char not in self.alphabet:
+            return 0
+        following = self.goto[node].get(char)
+        if following is None:
+            following = self.step(self.fail[node], char) if node else 0
+            # Écriture concurrente sans verrou : la valeur calculée est toujours la même
+            self.goto[node][char] = following
+        return following
+
+    def find(self, text):
+        """(début, fin, valeur) de chaque occurrence"""
+        goto, outputs, step = self.goto, self.outputs, self.step
+        node = 0
+        for position, char in enumerate(text):
+            following = goto[node].get(char)
+            node = step(node, char) if following is None else following
+            if outputs[node]:
+                for length, value in outputs[node]:
+                    yield position - length + 1, position + 1, value
+
+
+class IntentMatcher:
+    """Intentions compilées en un automate"""
+
+    def __init__(self, intents):
+        self.intents = intents
+        self.terms = []
+        self.automaton = Automaton()
+        for index, intent in enumerate(intents):
+            for group, terms in enumerate(intent.groups):
+                for term, weight in terms.items():
+                    self.automaton.add(term, len(self.terms))
+                    self.terms.append((index, group, term, weight))
+        self.automaton.build()
+
+    def rank(self, message):
+        """[(score, intent), ...] des intentions satisfaites, meilleure d'abord"""
+        text = " ".join(fold(message).split())
+        found = set()
+        for start, end, term_id in self.automaton.find(text):
+            if start and text[start - 1].isalnum():
+                continue
+            length = end - start
+            if length <= WHOLE_WORD_MAX_LENGTH and end < len(text) and text[end].isalnum():
+                continue
+            found.add(term_id)
+
+        scores, groups = {}, {}
+        for term_id in found:
+            index, group, _term, weight = self.terms[term_id]
+            scores[index] = scores.get(index, 0) + weight
+            groups.setdefault(index, set()).add(group)
+        ranked = sorted(
+            (-score, index)
+            for index, score in scores.items()
+            if len(groups[index]) == len(self.intents[index].groups)
+        )
+        return [(-score, self.intents[index]) for score, index in ranked]
+
+    def match(self, message):
+        ranked = self.rank(message)
+        return ranked[0][1] if ranked else None
+
+    def respond(self, message, user=None):
+        intent = self.match(message)
+        if intent is None:
+            return FALLBACK_ANSWER
+        return intent.render(user)
+
+
+def builtin_intents():
+    return [
+        Intent(name, [{fold(term): KEYWORD_WEIGHT for term in terms} for terms in groups], answer)
+        for name, groups, answer in BUILTIN_INTENTS
+    ]
+
+
+def knowledge_intents(entries):
+    """Une intention par entrée : un seul groupe, mots-clés et phrase type"""
+    intents = []
+    for entry in entries:
+        terms = {}
+        for keyword in entry.question_keywords.split(","):
+            if fold(keyword).strip():
+                terms[fold(keyword).strip()] = KEYWORD_WEIGHT
+        pattern = " ".join(fold(entry.question_pattern).split())
+        if pattern:
+            terms[pattern] = max(terms.get(pattern, 0), PATTERN_WEIGHT)
+        if terms:
+            intents.append(
+                Intent(f"knowledge:{entry.pk}", [terms], entry.answer, source=entry.category)
+            )
+    return intents
+
+
+def intent_matcher():
+    """Automate en cache, recompilé si la base de connaissances a changé"""
+    from .models import ChatbotKnowledge
+
+    state = ChatbotKnowledge.objects.aggregate(count=Count("pk"), changed=Max("updated_at"))
+    version = (state["count"], state["changed"])
+    with _cache_lock:
+        if _cache["version"] != version:
+            entries = ChatbotKnowledge.objects.filter(is_active=True).only(
+                "pk", "question_keywords", "question_pattern", "answer", "category"
+            )
+            _cache["matcher"] = IntentMatcher(knowledge_intents(entries) + builtin_intents())
+            _cache["version"] = version
+        return _cache["matcher"]
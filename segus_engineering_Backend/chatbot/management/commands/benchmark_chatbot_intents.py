@@ -0,0 +1,139 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from chatbot.intents import (
+    KEYWORD_WEIGHT,
+    Intent,
+    IntentMatcher,
+    builtin_intents,
+    fold,
+    knowledge_intents,
+)
+from chatbot.models import ChatbotKnowledge
+
+MESSAGES = [
+    "Bonjour !",
+    "Comment voir mes tâches de la semaine ?",
+    "Je voudrais créer une nouvelle tâche pour l'équipe structure",
+    "Où consulter la liste des projets en cours ?",
+    "Comment créer un nouveau projet pour un client ?",
+    "Je ne trouve pas le menu des paramètres",
+    "Comment ajouter un employé au projet de Sfax ?",
+    "Je ne reçois plus les notifications par email",
+    "Où sont les rapports et statistiques mensuels ?",
+    "help",
+    "Quel est le délai moyen de validation d'une note de calcul béton armé "
+    "pour un bâtiment R+4 avec sous-sol et fondations sur pieux ?",
+    "Merci beaucoup, bonne journée",
+]
+
+
+def legacy_intent(message):
+    """Chaîne if/elif historique de generate_bot_response, réduite au nom de l'intention"""
+    lower = message.lower()
+    if any(keyword in lower for keyword in ["tâche", "taches", "task", "travail"]):
+        if any(word in lower for word in ["voir", "afficher", "consulter", "comment"]):
+            return "tasks_view"
+        elif any(word in lower for word in ["créer", "ajouter", "nouvelle"]):
+            return "tasks_create"
+        return None
+    elif any(keyword in lower for keyword in ["projet", "project"]):
+        if any(word in lower for word in ["voir", "afficher", "consulter"]):
+            return "projects_view"
+        elif any(word in lower for word in ["créer", "nouveau"]):
+            return "projects_create"
+        return None
+    elif any(keyword in lower for keyword in ["navigation", "menu", "aller", "accéder"]):
+        return "navigation"
+    elif any(keyword in lower for keyword in ["employé", "employe", "utilisateur", "user"]):
+        return "employees"
+    elif any(keyword in lower for keyword in ["notification", "alerte", "message"]):
+        return "notifications"
+    elif any(keyword in lower for keyword in ["rapport", "statistique", "analytics"]):
+        return "reports"
+    elif any(keyword in lower for keyword in ["bonjour", "salut", "hello", "hi"]):
+        return "greeting"
+    elif any(keyword in lower for keyword in ["aide", "help", "comment"]):
+        return "help"
+    return "fallback"
+
+
+def naive_scan(intents):
+    """Même base d'intentions parcourue terme par terme (chaîne étendue à la base de connaissances)"""
+
+    def match(message):
+        text = fold(message)
+        best, best_score = None, 0
+        for intent in intents:
+            score, satisfied = 0, True
+            for terms in intent.groups:
+                hits = [weight for term, weight in terms.items() if term in text]
+                if not hits:
+                    satisfied = False
+                    break
+                score += sum(hits)
+            if satisfied and score > best_score:
+                best, best_score = intent, score
+        return best
+
+    return match
+
+
+def synthetic_intents(count):
+    """Entrées factices de base de connaissances (trois mots-clés chacune)"""
+    return [
+        Intent(
+            f"synthetic:{index}",
+            [{fold(f"sujet{index}{suffix}"): KEYWORD_WEIGHT for suffix in ("a", "b", "c")}],
+            "",
+        )
+        for index in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Compare l'automate d'intentions du chatbot à la chaîne if/elif historique"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=2000)
+        parser.add_argument(
+            "--knowledge",
+            type=int,
+            default=0,
+            help="Entrées factices ajoutées à la base de connaissances réelle",
+        )
+
+    def timed(self, function, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for message in MESSAGES:
+                function(message)
+        return (time.perf_counter() - start) / (iterations * len(MESSAGES)) * 1e6
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        entries = ChatbotKnowledge.objects.filter(is_active=True)
+
+        start = time.perf_counter()
+        matcher = IntentMatcher(
+            knowledge_intents(entries) + synthetic_intents(options["knowledge"]) + builtin_intents()
+        )
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        legacy_us = self.timed(legacy_intent, iterations)
+        naive_us = self.timed(naive_scan(matcher.intents), iterations)
+        compiled_us = self.timed(matcher.match, iterations)
+
+        self.stdout.write(f"Intentions compilées : {len(matcher.intents)} en {compile_ms:.1f} ms")
+        self.stdout.write(f"Chaîne if/elif (intégrées seules) : {legacy_us:.2f} µs/message")
+        self.stdout.write(f"Parcours terme à terme            : {naive_us:.2f} µs/message")
+        self.stdout.write(f"Automate                          : {compiled_us:.2f} µs/message")
+        for message in MESSAGES:
+            intent = matcher.match(message)
+            compiled = intent.name if intent else "fallback"
+            legacy = legacy_intent(message)
+            marker = "" if compiled == legacy else "  <- différent"
+            self.stdout.write(
+                f"  {legacy or 'aucune réponse'!s:16} {compiled:16} {message[:50]}{marker}"
+            )
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("chatbot", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chatbotknowledge",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("chatbot", "0002_chatbotknowledge_updated_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="chatconversation",
+            index=models.Index(
+                fields=["user", "is_active", "updated_at"], name="chatbot_cha_user_id_0c681f_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="chatmessage",
+            index=models.Index(
+                fields=["conversation", "timestamp"], name="chatbot_cha_convers_a85429_idx"
+            ),
+        ),
+    ]
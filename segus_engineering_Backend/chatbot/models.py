@@ -1,7 +1,36 @@
 from django.conf import settings
 from django.db import models
+from django.db.models.functions import Coalesce, Substr
 from django.utils import timezone
 
+LAST_MESSAGE_PREVIEW = 100
+
+
+class ChatConversationQuerySet(models.QuerySet):
+    def with_summary(self):
+        """
+        Annote le nombre de messages et l'aperçu du dernier message par
+        sous-requêtes corrélées (index conversation/timestamp), calculées
+        pour les seules conversations renvoyées
+        """
+        messages = ChatMessage.objects.filter(conversation=models.OuterRef("pk")).order_by()
+        last = messages.order_by("-timestamp", "-pk")[:1]
+        return self.annotate(
+            message_total=Coalesce(
+                models.Subquery(
+                    messages.values("conversation")
+                    .annotate(total=models.Count("pk"))
+                    .values("total")
+                ),
+                0,
+            ),
+            last_message_content=models.Subquery(
+                last.values(preview=Substr("content", 1, LAST_MESSAGE_PREVIEW + 1))
+            ),
+            last_message_timestamp=models.Subquery(last.values("timestamp")),
+            last_message_type=models.Subquery(last.values("message_type")),
+        )
+
 
 class ChatConversation(models.Model):
     user = models.ForeignKey(
@@ -14,8 +43,14 @@ class ChatConversation(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    objects = ChatConversationQuerySet.as_manager()
+
     class Meta:
         ordering = ["-updated_at"]
+        indexes = [
+            # Liste paginée par curseur des conversations d'un utilisateur
+            models.Index(fields=["user", "is_active", "updated_at"]),
+        ]
 
     def __str__(self):
         return f"Conversation {self.id} - {self.user.username}"
@@ -34,6 +69,10 @@ class ChatMessage(models.Model):
 
     class Meta:
         ordering = ["timestamp"]
+        indexes = [
+            # Pagination « messages plus anciens » et dernier message d'une conversation
+            models.Index(fields=["conversation", "timestamp"]),
+        ]
 
     def __str__(self):
         return f"{self.message_type}: {self.content[:50]}..."
@@ -50,6 +89,8 @@ class ChatbotKnowledge(models.Model):
     category = models.CharField(max_length=100, default="general")
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(default=timezone.now)
+    # Version de la base de connaissances compilée par chatbot.intents
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["category", "question_pattern"]
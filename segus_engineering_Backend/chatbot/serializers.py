@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from .models import ChatbotKnowledge, ChatConversation, ChatMessage
+from .models import LAST_MESSAGE_PREVIEW, ChatbotKnowledge, ChatConversation, ChatMessage
 
 
 class ChatMessageSerializer(serializers.ModelSerializer):
@@ -41,6 +41,45 @@ class ChatConversationSerializer(serializers.ModelSerializer):
         return None
 
 
+class ChatConversationSummarySerializer(serializers.ModelSerializer):
+    """Conversation sans ses messages, pour la liste (queryset annoté par with_summary)"""
+
+    message_count = serializers.IntegerField(source="message_total", read_only=True)
+    last_message = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChatConversation
+        fields = [
+            "id",
+            "title",
+            "created_at",
+            "updated_at",
+            "is_active",
+            "message_count",
+            "last_message",
+        ]
+
+    def get_last_message(self, obj):
+        content = obj.last_message_content
+        if content is None:
+            return None
+        return {
+            "content": content[:LAST_MESSAGE_PREVIEW]
+            + ("..." if len(content) > LAST_MESSAGE_PREVIEW else ""),
+            "timestamp": obj.last_message_timestamp,
+            "message_type": obj.last_message_type,
+        }
+
+
+class ChatConversationListSerializer(ChatConversationSummarySerializer):
+    """Résumé et messages (prefetch_related("messages")) : liste non paginée"""
+
+    messages = ChatMessageSerializer(many=True, read_only=True)
+
+    class Meta(ChatConversationSummarySerializer.Meta):
+        fields = ChatConversationSummarySerializer.Meta.fields + ["messages"]
+
+
 class ChatbotKnowledgeSerializer(serializers.ModelSerializer):
     class Meta:
         model = ChatbotKnowledge
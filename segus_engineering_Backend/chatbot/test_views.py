@@ -0,0 +1,170 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from chatbot.intents import FALLBACK_ANSWER, IntentMatcher, builtin_intents, intent_matcher
+from chatbot.models import ChatbotKnowledge, ChatConversation, ChatMessage
+
+User = get_user_model()
+
+
+class IntentMatcherTest(APITestCase):
+    """Tests de l'automate d'intentions du chatbot"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        self.user = User.objects.create_user(
+            username="employe",
+            email="employe@example.com",
+            password="employepass123",
+            first_name="Amira",
+        )
+        self.matcher = IntentMatcher(builtin_intents())
+
+    def test_builtin_intents_ranked_with_accent_folding(self):
+        """Accents ignorés, intention la plus spécifique retenue, mots courts entiers"""
+        self.assertEqual(
+            self.matcher.match("Bonjour, comment VOIR mes taches ?").name, "tasks_view"
+        )
+        self.assertEqual(self.matcher.match("Créer un nouveau projet").name, "projects_create")
+        self.assertEqual(self.matcher.match("Où sont les notifications ?").name, "notifications")
+        self.assertEqual(self.matcher.match("hi").name, "greeting")
+        # « hi » n'est pas reconnu à l'intérieur d'un mot
+        self.assertIsNone(self.matcher.match("chiffre d'affaires"))
+        self.assertEqual(self.matcher.respond("chiffre d'affaires"), FALLBACK_ANSWER)
+        # L'ancienne chaîne ne répondait rien pour une tâche sans verbe reconnu
+        self.assertEqual(self.matcher.match("menu des tâches").name, "navigation")
+
+    def test_transition_table_is_bounded_by_term_alphabet(self):
+        """Les caractères inconnus des messages ne s'ajoutent pas à la table"""
+        automaton = self.matcher.automaton
+        bound = len(automaton.goto) * len(automaton.alphabet)
+        for index in range(2000):
+            self.matcher.match(f"{chr(0x4E00 + index)} ☃ {index:x} bonjour")
+        self.assertLessEqual(sum(len(node) for node in automaton.goto), bound)
+        self.assertTrue(all("☃" not in node for node in automaton.goto))
+        self.assertEqual(self.matcher.match("☃ bonjour ☃").name, "greeting")
+
+    def test_knowledge_entries_are_compiled_and_refreshed(self):
+        """Les entrées actives sont consultées ; l'automate suit leurs modifications"""
+        entry = ChatbotKnowledge.objects.create(
+            question_keywords="congé, congés payés, vacances",
+            question_pattern="Comment poser un congé",
+            answer="Déposez votre demande dans Mon espace > Congés, {name}.",
+            category="rh",
+        )
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            "/api/chatbot/send-message/",
+            {"message": "Comment poser un conge ?"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["bot_response"]["content"],
+            "Déposez votre demande dans Mon espace > Congés, Amira.",
+        )
+
+        matcher = intent_matcher()
+        self.assertIs(intent_matcher(), matcher)
+
+        entry.is_active = False
+        entry.save()
+        self.assertIsNot(intent_matcher(), matcher)
+        self.assertEqual(intent_matcher().match("Comment poser un congé").name, "help")
+
+    def test_benchmark_command(self):
+        """La commande de benchmark compare l'automate à la chaîne historique"""
+        out = StringIO()
+        call_command("benchmark_chatbot_intents", iterations=5, knowledge=50, stdout=out)
+        self.assertIn("Intentions compilées : 60", out.getvalue())
+        self.assertIn("Automate", out.getvalue())
+
+
+class ConversationPaginationTest(APITestCase):
+    """Tests de la liste paginée des conversations et de leurs messages"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        self.user = User.objects.create_user(
+            username="employe", email="employe@example.com", password="employepass123"
+        )
+        now = timezone.now()
+        self.conversations = []
+        for index in range(5):
+            conversation = ChatConversation.objects.create(user=self.user, title=f"Sujet {index}")
+            ChatMessage.objects.bulk_create(
+                [
+                    ChatMessage(
+                        conversation=conversation,
+                        message_type="user" if position % 2 == 0 else "bot",
+                        content=f"Message {position} " + "x" * 150 * (position == 11),
+                        timestamp=now - timedelta(minutes=60 - position),
+                    )
+                    for position in range(12)
+                ]
+            )
+            ChatConversation.objects.filter(pk=conversation.pk).update(
+                updated_at=now - timedelta(hours=index)
+            )
+            self.conversations.append(conversation)
+        self.client.force_authenticate(self.user)
+
+    def test_conversation_summaries_in_one_query(self):
+        """Résumés sans messages imbriqués, compteur et dernier message annotés"""
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/chatbot/conversations/", {"limit": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first = response.data["results"][0]
+        self.assertEqual(first["id"], self.conversations[0].pk)
+        self.assertNotIn("messages", first)
+        self.assertEqual(first["message_count"], 12)
+        self.assertEqual(first["last_message"]["message_type"], "bot")
+        self.assertTrue(first["last_message"]["content"].endswith("..."))
+        self.assertEqual(len(first["last_message"]["content"]), 103)
+
+        ids = [row["id"] for row in response.data["results"]]
+        url = response.data["next"]
+        while url:
+            response = self.client.get(url)
+            ids += [row["id"] for row in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(ids, [conversation.pk for conversation in self.conversations])
+
+    def test_unpaginated_lists_keep_the_client_format(self):
+        """Sans ?limit= ni ?cursor= : listes complètes, conversations avec leurs messages"""
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/chatbot/conversations/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row["id"] for row in response.data],
+            [conversation.pk for conversation in self.conversations],
+        )
+        first = response.data[0]
+        self.assertEqual(len(first["messages"]), 12)
+        self.assertEqual(first["message_count"], 12)
+        self.assertEqual(first["messages"][0]["content"], "Message 0 ")
+
+        url = f"/api/chatbot/conversations/{self.conversations[0].pk}/messages/"
+        response = self.client.get(url)
+        self.assertEqual(
+            [row["content"][:10].strip() for row in response.data],
+            [f"Message {position}" for position in range(12)],
+        )
+
+    def test_messages_load_older_pages(self):
+        """Les messages récents d'abord, le lien suivant charge les plus anciens"""
+        url = f"/api/chatbot/conversations/{self.conversations[0].pk}/messages/"
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {"limit": 5})
+        contents = [row["content"][:10].strip() for row in response.data["results"]]
+        self.assertEqual(contents, [f"Message {position}" for position in range(7, 12)])
+
+        response = self.client.get(response.data["next"])
+        contents = [row["content"] for row in response.data["results"]]
+        self.assertEqual(contents, [f"Message {position} " for position in range(2, 7)])
@@ -1,10 +1,48 @@
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from .intents import intent_matcher
 from .models import ChatConversation, ChatMessage
-from .serializers import ChatConversationSerializer, ChatMessageSerializer
+from .serializers import (
+    ChatConversationListSerializer,
+    ChatConversationSummarySerializer,
+    ChatMessageSerializer,
+)
+
+
+class OptInCursorPagination(CursorPagination):
+    """
+    Pagination par curseur opt-in : elle ne s'applique que si ?cursor= ou
+    ?limit= est fourni ; sans ces paramètres la liste complète est servie
+    comme avant (format attendu par le client Angular).
+    """
+
+    page_size_query_param = "limit"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class ConversationPagination(OptInCursorPagination):
+    """Conversations les plus récemment actives d'abord, ?limit= (20) et ?cursor="""
+
+    ordering = ("-updated_at", "-id")
+    page_size = 20
+    max_page_size = 100
+
+
+class MessagePagination(OptInCursorPagination):
+    """Messages les plus récents d'abord ; le lien `next` charge les plus anciens"""
+
+    ordering = ("-timestamp", "-id")
+    page_size = 50
+    max_page_size = 200
 
 
 @api_view(["POST"])
@@ -68,21 +106,40 @@ def send_message(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_conversations(request):
-    """Récupérer toutes les conversations de l'utilisateur"""
-    conversations = ChatConversation.objects.filter(user=request.user, is_active=True)
-    serializer = ChatConversationSerializer(conversations, many=True)
-    return Response(serializer.data)
+    """
+    Récupérer les conversations de l'utilisateur : liste complète avec les
+    messages (deux requêtes), ou résumés paginés par curseur avec ?limit= / ?cursor=
+    """
+    conversations = ChatConversation.objects.filter(
+        user=request.user, is_active=True
+    ).with_summary()
+    paginator = ConversationPagination()
+    page = paginator.paginate_queryset(conversations, request)
+    if page is None:
+        serializer = ChatConversationListSerializer(
+            conversations.prefetch_related("messages"), many=True
+        )
+        return Response(serializer.data)
+    serializer = ChatConversationSummarySerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_conversation_messages(request, conversation_id):
-    """Récupérer tous les messages d'une conversation"""
+    """
+    Récupérer les messages d'une conversation : tous, dans l'ordre chronologique,
+    ou par pages de plus en plus anciennes avec ?limit= / ?cursor=
+    """
     try:
         conversation = ChatConversation.objects.get(id=conversation_id, user=request.user)
-        messages = conversation.messages.all()
-        serializer = ChatMessageSerializer(messages, many=True)
-        return Response(serializer.data)
+        paginator = MessagePagination()
+        page = paginator.paginate_queryset(conversation.messages.all(), request)
+        if page is None:
+            return Response(ChatMessageSerializer(conversation.messages.all(), many=True).data)
+        # Chaque page est rendue dans l'ordre chronologique pour l'affichage
+        serializer = ChatMessageSerializer(reversed(page), many=True)
+        return paginator.get_paginated_response(serializer.data)
     except ChatConversation.DoesNotExist:
         return Response({"error": "Conversation non trouvée"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -102,201 +159,4 @@ def delete_conversation(request, conversation_id):
 
 def generate_bot_response(user_message, user):
     """Générer une réponse du chatbot basée sur le message utilisateur"""
-    user_message_lower = user_message.lower()
-
-    # Réponses pour les questions sur les tâches
-    if any(keyword in user_message_lower for keyword in ["tâche", "taches", "task", "travail"]):
-        if any(word in user_message_lower for word in ["voir", "afficher", "consulter", "comment"]):
-            return """📋 **Comment voir vos tâches :**
-
-1. **Dans l'espace Admin :**
-   • Allez dans l'onglet "Projets"
-   • Cliquez sur un projet pour voir ses tâches
-   • Utilisez les filtres pour trier
-
-2. **Dans l'espace Employé :**
-   • Menu "Mes Tâches" 
-   • Tableau de bord personnel
-
-🔗 **Raccourci :** Cliquez sur votre nom d'utilisateur → "Mes Tâches" """
-
-        elif any(word in user_message_lower for word in ["créer", "ajouter", "nouvelle"]):
-            return """➕ **Créer une nouvelle tâche :**
-
-1. Sélectionnez un projet
-2. Cliquez sur "Ajouter une tâche"
-3. Remplissez :
-   • Titre et description
-   • Dates de début/fin
-   • Priorité
-   • Employés assignés
-4. Sauvegardez
-
-🔗 **Raccourci :** Bouton "+" dans la vue projet"""
-
-    # Réponses pour les questions sur les projets
-    elif any(keyword in user_message_lower for keyword in ["projet", "project"]):
-        if any(word in user_message_lower for word in ["voir", "afficher", "consulter"]):
-            return """📁 **Comment voir vos projets :**
-
-1. **Menu principal :** Onglet "Projets"
-2. **Filtres disponibles :**
-   • Par statut (Actif, Terminé, En pause)
-   • Par employé assigné
-   • Par date
-
-3. **Vues :**
-   • Grille (cartes)
-   • Liste (tableau)
-
-🔗 **Raccourci :** Ctrl+P pour accès rapide"""
-
-        elif any(word in user_message_lower for word in ["créer", "nouveau"]):
-            return """🆕 **Créer un nouveau projet :**
-
-1. Cliquez sur "Nouveau Projet"
-2. Remplissez les informations :
-   • Titre et description
-   • Dates de début/fin
-   • Statut initial
-3. Assignez les employés
-4. Sauvegardez
-
-🔗 **Raccourci :** Bouton "+" en haut à droite"""
-
-    # Questions sur la navigation
-    elif any(
-        keyword in user_message_lower for keyword in ["navigation", "menu", "aller", "accéder"]
-    ):
-        return """🧭 **Navigation dans l'application :**
-
-**Menu principal :**
-• 🏠 Tableau de bord
-• 📁 Projets
-• 👥 Employés
-• 📊 Rapports
-• ⚙️ Paramètres
-
-**Raccourcis clavier :**
-• Ctrl+H : Accueil
-• Ctrl+P : Projets
-• Ctrl+E : Employés
-• Ctrl+/ : Aide
-
-**Menu utilisateur :**
-• Profil
-• Mes tâches
-• Notifications
-• Déconnexion"""
-
-    # Questions sur les employés
-    elif any(
-        keyword in user_message_lower for keyword in ["employé", "employe", "utilisateur", "user"]
-    ):
-        return """👥 **Gestion des employés :**
-
-**Voir les employés :**
-• Menu "Employés"
-• Recherche par nom/email
-• Filtres par rôle
-
-**Actions disponibles :**
-• Ajouter un employé
-• Modifier les informations
-• Assigner à des projets
-• Voir les statistiques
-
-🔗 **Raccourci :** Ctrl+E"""
-
-    # Questions sur les notifications
-    elif any(keyword in user_message_lower for keyword in ["notification", "alerte", "message"]):
-        return """🔔 **Notifications :**
-
-**Types de notifications :**
-• Assignation à un projet
-• Nouvelle tâche
-• Échéances proches
-• Mises à jour de statut
-
-**Où les voir :**
-• Icône cloche en haut à droite
-• Emails automatiques
-• Tableau de bord
-
-🔗 **Raccourci :** Cliquez sur l'icône 🔔"""
-
-    # Questions sur les rapports
-    elif any(keyword in user_message_lower for keyword in ["rapport", "statistique", "analytics"]):
-        return """📊 **Rapports et statistiques :**
-
-**Rapports disponibles :**
-• Progression des projets
-• Performance des employés
-• Temps de travail
-• Statistiques globales
-
-**Accès :**
-• Menu "Rapports"
-• Tableaux de bord
-• Export Excel/PDF
-
-🔗 **Raccourci :** Menu → Rapports"""
-
-    # Salutations
-    elif any(keyword in user_message_lower for keyword in ["bonjour", "salut", "hello", "hi"]):
-        return f"""👋 Bonjour {user.first_name or user.username} !
-
-Je suis votre assistant Segus Engineering. Je peux vous aider avec :
-
-• 📋 Gestion des tâches
-• 📁 Navigation dans les projets  
-• 👥 Questions sur les employés
-• 🔔 Notifications
-• 📊 Rapports
-
-**Exemples de questions :**
-• "Comment voir mes tâches ?"
-• "Comment créer un projet ?"
-• "Où sont les notifications ?"
-
-Que puis-je faire pour vous ?"""
-
-    # Aide générale
-    elif any(keyword in user_message_lower for keyword in ["aide", "help", "comment"]):
-        return """❓ **Aide - Segus Engineering**
-
-**Questions fréquentes :**
-• "Comment voir mes tâches ?"
-• "Comment créer un projet ?"
-• "Où sont mes notifications ?"
-• "Comment assigner un employé ?"
-
-**Raccourcis utiles :**
-• Ctrl+H : Accueil
-• Ctrl+P : Projets
-• Ctrl+E : Employés
-• Ctrl+/ : Cette aide
-
-**Navigation rapide :**
-• Menu principal en haut
-• Barre de recherche
-• Filtres dans chaque section
-
-Posez-moi une question spécifique !"""
-
-    # Réponse par défaut
-    else:
-        return """🤔 Je ne suis pas sûr de comprendre votre question.
-
-**Je peux vous aider avec :**
-• 📋 Gestion des tâches et projets
-• 🧭 Navigation dans l'application
-• 👥 Questions sur les employés
-• 🔔 Notifications et alertes
-
-**Exemples de questions :**
-• "Comment voir mes tâches ?"
-• "Comment créer un nouveau projet ?"
-• "Où trouver les notifications ?"
-
-Reformulez votre question ou tapez "aide" pour plus d'options."""
+    return intent_matcher().respond(user_message, user)
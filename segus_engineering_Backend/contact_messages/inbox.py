@@ -0,0 +1,140 @@
+"""
+Boîte de réception des messages de contact : recherche, statistiques et file de tri.
+
+- recherche : index plein texte sur sujet et message (FTS5 sous SQLite, GIN
+  tsvector sous PostgreSQL, voir la migration 0002), préfixe sur le nom et
+  sous-chaîne de l'email (?search=gmail trouve les adresses @gmail.com) ;
+- statistiques : une seule requête groupée par (statut, priorité) ;
+- file de tri : messages non lus par priorité décroissante puis ancienneté,
+  paginés par curseur (priorité, created_at, id). Chaque priorité est un
+  parcours de l'index (status, priority, created_at) : au plus une requête
+  par niveau de priorité, quelle que soit la profondeur de la page.
+"""
+
+import base64
+import re
+from datetime import datetime, time, timedelta
+
+from django.db import connection
+from django.db.models import Count, Q
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import ContactMessage
+
+FTS_TABLE = "contact_message_fts"
+PRIORITY_ORDER = ("urgent", "high", "medium", "low")
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def search_vector():
+    from django.contrib.postgres.search import SearchVector
+
+    return SearchVector("subject", weight="A", config="simple") + SearchVector(
+        "message", weight="B", config="simple"
+    )
+
+
+def search_messages(queryset, text):
+    """Mots (en préfixe) du sujet ou du message, début du nom ou partie de l'email"""
+    terms = _WORD.findall(text)
+    if not terms:
+        return queryset
+    people = (
+        Q(first_name__istartswith=text) | Q(last_name__istartswith=text) | Q(email__icontains=text)
+    )
+    if connection.vendor == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        ids = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        return queryset.filter(people | Q(pk__in=ids))
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.search import SearchQuery
+
+        query = SearchQuery(
+            " & ".join(f"{term}:*" for term in terms), search_type="raw", config="simple"
+        )
+        return queryset.annotate(search=search_vector()).filter(people | Q(search=query))
+    content = Q()
+    for term in terms:
+        content &= Q(subject__icontains=term) | Q(message__icontains=term)
+    return queryset.filter(people | content)
+
+
+def day_range(date_from=None, date_to=None):
+    """Bornes [début, fin) en datetimes du fuseau courant ; ValueError si une date est invalide"""
+    bounds = []
+    for value, shift in ((date_from, 0), (date_to, 1)):
+        if not value:
+            bounds.append(None)
+            continue
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        bounds.append(timezone.make_aware(datetime.combine(day + timedelta(days=shift), time.min)))
+    return bounds
+
+
+def inbox_stats(now=None):
+    """Totaux, non lus, messages de la semaine et répartitions (une requête)"""
+    week_ago = (now or timezone.now()) - timedelta(days=7)
+    rows = (
+        ContactMessage.objects.order_by()
+        .values("status", "priority")
+        .annotate(count=Count("id"), recent=Count("id", filter=Q(created_at__gte=week_ago)))
+    )
+    by_status, by_priority = {}, {}
+    total = recent = 0
+    for row in rows:
+        by_status[row["status"]] = by_status.get(row["status"], 0) + row["count"]
+        by_priority[row["priority"]] = by_priority.get(row["priority"], 0) + row["count"]
+        total += row["count"]
+        recent += row["recent"]
+    return {
+        "total_messages": total,
+        "unread_messages": by_status.get("unread", 0),
+        "recent_messages": recent,
+        "status_distribution": [
+            {"status": key, "count": by_status[key]} for key in sorted(by_status)
+        ],
+        "priority_distribution": [
+            {"priority": key, "count": by_priority[key]} for key in sorted(by_priority)
+        ],
+    }
+
+
+def encode_cursor(message):
+    raw = f"{message.priority}|{message.created_at.isoformat()}|{message.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(priorité, created_at, id) ; ValueError si le curseur est invalide"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        priority, created_at, pk = raw.split("|")
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError(cursor) from exc
+    created_at = parse_datetime(created_at)
+    if priority not in PRIORITY_ORDER or created_at is None:
+        raise ValueError(cursor)
+    return priority, created_at, int(pk)
+
+
+def triage_queue(limit=20, cursor=None):
+    """Page de la file de tri : (messages, curseur suivant ou None)"""
+    start, after = PRIORITY_ORDER[0], None
+    if cursor:
+        start, created_at, pk = decode_cursor(cursor)
+        after = Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+
+    # Un message de plus que la page : il indique s'il reste une suite
+    messages = []
+    for priority in PRIORITY_ORDER[PRIORITY_ORDER.index(start) :]:
+        queryset = ContactMessage.objects.filter(status="unread", priority=priority)
+        if after is not None and priority == start:
+            queryset = queryset.filter(after)
+        messages += queryset.order_by("created_at", "pk")[: limit + 1 - len(messages)]
+        if len(messages) > limit:
+            return messages[:limit], encode_cursor(messages[limit - 1])
+    return messages, None
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+TABLE = "contact_messages_contactmessage"
+
+# Index FTS5 à contenu externe sur la table des messages, synchronisé par triggers
+SQLITE_FTS = [
+    f"""
+    CREATE VIRTUAL TABLE contact_message_fts USING fts5(
+        subject, message,
+        content='{TABLE}',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER contact_message_fts_insert AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO contact_message_fts(rowid, subject, message)
+        VALUES (new.id, new.subject, new.message);
+    END
+    """,
+    f"""
+    CREATE TRIGGER contact_message_fts_delete AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO contact_message_fts(contact_message_fts, rowid, subject, message)
+        VALUES ('delete', old.id, old.subject, old.message);
+    END
+    """,
+    f"""
+    CREATE TRIGGER contact_message_fts_update AFTER UPDATE OF subject, message ON {TABLE} BEGIN
+        INSERT INTO contact_message_fts(contact_message_fts, rowid, subject, message)
+        VALUES ('delete', old.id, old.subject, old.message);
+        INSERT INTO contact_message_fts(rowid, subject, message)
+        VALUES (new.id, new.subject, new.message);
+    END
+    """,
+    "INSERT INTO contact_message_fts(contact_message_fts) VALUES ('rebuild')",
+]
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS contact_message_fts_insert",
+    "DROP TRIGGER IF EXISTS contact_message_fts_delete",
+    "DROP TRIGGER IF EXISTS contact_message_fts_update",
+    "DROP TABLE IF EXISTS contact_message_fts",
+]
+
+# Même expression que contact_messages.inbox.search_vector
+POSTGRES_GIN = (
+    f"CREATE INDEX contact_message_search_idx ON {TABLE} USING gin "
+    "((setweight(to_tsvector('simple', coalesce(subject, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(message, '')), 'B')))"
+)
+POSTGRES_GIN_DROP = "DROP INDEX IF EXISTS contact_message_search_idx"
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for statement in SQLITE_FTS:
+            schema_editor.execute(statement)
+    elif vendor == "postgresql":
+        schema_editor.execute(POSTGRES_GIN)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for statement in SQLITE_FTS_DROP:
+            schema_editor.execute(statement)
+    elif vendor == "postgresql":
+        schema_editor.execute(POSTGRES_GIN_DROP)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contact_messages", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="contactmessage",
+            index=models.Index(
+                fields=["status", "priority", "created_at"], name="contact_mes_status_724394_idx"
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
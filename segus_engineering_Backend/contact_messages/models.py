@@ -1,10 +1,11 @@
 from django.db import models
 from django.utils import timezone
 
+from segus_engineering_Backend.tracking import TrackedFieldsMixin
 from users.models import User
 
 
-class ContactMessage(models.Model):
+class ContactMessage(TrackedFieldsMixin, models.Model):
     STATUS_CHOICES = [
         ("unread", "Non lu"),
         ("read", "Lu"),
@@ -19,6 +20,8 @@ class ContactMessage(models.Model):
         ("urgent", "Urgente"),
     ]
 
+    tracked_fields = ("status",)
+
     # Informations du contact
     first_name = models.CharField(max_length=100, verbose_name="Prénom")
     last_name = models.CharField(max_length=100, verbose_name="Nom de famille")
@@ -63,6 +66,8 @@ class ContactMessage(models.Model):
             models.Index(fields=["status", "created_at"]),
             models.Index(fields=["email"]),
             models.Index(fields=["priority", "status"]),
+            # File de tri : non lus par priorité puis ancienneté (voir contact_messages.inbox)
+            models.Index(fields=["status", "priority", "created_at"]),
         ]
 
     def __str__(self):
@@ -71,6 +76,15 @@ class ContactMessage(models.Model):
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}"
 
+    def save(self, *args, **kwargs):
+        # Horodater aussi les changements de statut faits par simple mise à jour
+        if self.has_changed("status"):
+            if self.status in ("read", "replied") and not self.read_at:
+                self.read_at = timezone.now()
+            if self.status == "replied" and not self.replied_at:
+                self.replied_at = timezone.now()
+        super().save(*args, **kwargs)
+
     def mark_as_read(self, admin_user=None):
         """Marquer le message comme lu"""
         if self.status == "unread":
@@ -0,0 +1,161 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from contact_messages.inbox import FTS_TABLE, day_range
+from contact_messages.models import ContactMessage
+
+User = get_user_model()
+
+
+class ContactInboxTest(APITestCase):
+    """Tests de la recherche, des statistiques et de la file de tri des messages"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+            is_staff=True,
+        )
+        self.employee_user = User.objects.create_user(
+            username="employee",
+            email="employee@example.com",
+            password="employeepass123",
+            role="EMPLOYE",
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        self.now = timezone.now()
+
+    def create_message(self, subject="Demande", message="Bonjour", **extra):
+        return ContactMessage.objects.create(
+            first_name=extra.pop("first_name", "Sami"),
+            last_name=extra.pop("last_name", "Ben Ali"),
+            email=extra.pop("email", "sami@example.com"),
+            subject=subject,
+            message=message,
+            **extra,
+        )
+
+    def search(self, text):
+        response = self.client.get("/api/contact-messages/", {"search": text})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {row["id"] for row in response.data}
+
+    def test_search_subject_message_name_and_email(self):
+        """Mots en préfixe, accents ignorés, début de nom et partie d'email"""
+        devis = self.create_message("Devis topographie", "Relevé d'un terrain à Sfax")
+        etude = self.create_message(
+            "Étude béton",
+            "Calcul de structure",
+            first_name="Leila",
+            last_name="Trabelsi",
+            email="leila@gmail.com",
+        )
+
+        self.assertEqual(self.search("topo"), {devis.id})
+        self.assertEqual(self.search("releve terrain"), {devis.id})
+        self.assertEqual(self.search("etude"), {etude.id})
+        self.assertEqual(self.search("Trab"), {etude.id})
+        self.assertEqual(self.search("gmail"), {etude.id})
+        self.assertEqual(self.search("inexistant"), set())
+
+    def test_fts_index_follows_updates(self):
+        """Le trigger de mise à jour resynchronise l'index plein texte"""
+        message = self.create_message("Devis topographie", "Relevé GPS")
+
+        message.subject = "Réclamation facture"
+        message.save()
+
+        self.assertEqual(self.search("topographie"), set())
+        self.assertEqual(self.search("facture"), {message.id})
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH 'topo*'")
+                self.assertEqual(cursor.fetchone()[0], 0)
+
+        message.delete()
+        self.assertEqual(self.search("facture"), set())
+
+    def test_day_range(self):
+        """Bornes [début, fin) ; date invalide : ValueError puis 400 sur la liste"""
+        start, end = day_range("2026-03-01", "2026-03-01")
+        self.assertEqual(end - start, timedelta(days=1))
+        self.assertEqual(day_range(), [None, None])
+        with self.assertRaises(ValueError):
+            day_range("01/03/2026")
+
+        inside = self.create_message(created_at=self.now - timedelta(days=2))
+        self.create_message(created_at=self.now - timedelta(days=10))
+        day = (self.now - timedelta(days=2)).astimezone(timezone.get_current_timezone()).date()
+        response = self.client.get(
+            "/api/contact-messages/", {"date_from": day.isoformat(), "date_to": day.isoformat()}
+        )
+        self.assertEqual([row["id"] for row in response.data], [inside.id])
+
+        response = self.client.get("/api/contact-messages/", {"date_from": "hier"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stats_totals(self):
+        """Totaux, non lus, messages de la semaine et répartitions en une requête"""
+        self.create_message(priority="urgent")
+        self.create_message(priority="urgent", status="read")
+        self.create_message(priority="low", status="replied")
+        self.create_message(priority="low", created_at=self.now - timedelta(days=30))
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/contact-messages/stats/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_messages"], 4)
+        self.assertEqual(response.data["unread_messages"], 2)
+        self.assertEqual(response.data["recent_messages"], 3)
+        self.assertEqual(
+            response.data["status_distribution"],
+            [
+                {"status": "read", "count": 1},
+                {"status": "replied", "count": 1},
+                {"status": "unread", "count": 2},
+            ],
+        )
+        self.assertEqual(
+            response.data["priority_distribution"],
+            [{"priority": "low", "count": 2}, {"priority": "urgent", "count": 2}],
+        )
+
+    def test_triage_order_and_cursor_across_priorities(self):
+        """Non lus par priorité puis ancienneté ; le curseur enchaîne les priorités"""
+        expected = []
+        for priority in ("urgent", "high", "medium", "low"):
+            for age in (3, 2, 1):
+                message = self.create_message(
+                    priority=priority, created_at=self.now - timedelta(hours=age)
+                )
+                expected.append(message.id)
+        self.create_message(priority="urgent", status="read")
+
+        seen, cursor = [], None
+        for _page in range(3):
+            params = {"limit": 5, **({"cursor": cursor} if cursor else {})}
+            response = self.client.get("/api/contact-messages/triage/", params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [row["id"] for row in response.data["results"]]
+            cursor = response.data["next_cursor"]
+        self.assertEqual(seen, expected)
+        self.assertIsNone(cursor)
+
+        response = self.client.get("/api/contact-messages/triage/", {"cursor": "invalide"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_triage_is_admin_only(self):
+        """La file de tri est réservée aux admins"""
+        self.client.force_authenticate(user=self.employee_user)
+        response = self.client.get("/api/contact-messages/triage/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
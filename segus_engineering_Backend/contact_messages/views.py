@@ -1,11 +1,14 @@
 from django.conf import settings
 from django.core.mail import send_mail
-from django.db.models import Count, Q
 from django.utils import timezone
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
+from segus_engineering_Backend.intake import IntakeGuard
+
+from .inbox import day_range, inbox_stats, search_messages, triage_queue
 from .models import ContactMessage
 from .serializers import (
     ContactMessageCreateSerializer,
@@ -13,6 +16,8 @@ from .serializers import (
     ContactMessageUpdateSerializer,
 )
 
+contact_guard = IntakeGuard("contact", fingerprint_fields=("email", "subject", "message"))
+
 
 class ContactMessageViewSet(viewsets.ModelViewSet):
     queryset = ContactMessage.objects.all()
@@ -22,10 +27,13 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
         """
         Permissions:
         - POST (create) : Accessible à tous pour le formulaire de contact
+        - File de tri (triage) : Réservée aux admins (is_staff)
         - Autres actions : Réservées aux admins
         """
         if self.action == "create":
             permission_classes = [permissions.AllowAny]
+        elif self.action == "triage":
+            permission_classes = [permissions.IsAdminUser]
         else:
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
@@ -52,33 +60,39 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
         if priority_filter:
             queryset = queryset.filter(priority=priority_filter)
 
-        # Recherche par nom ou email
+        # Recherche plein texte (sujet, message), début de nom ou partie de l'email
         search = self.request.query_params.get("search", None)
         if search:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search)
-                | Q(last_name__icontains=search)
-                | Q(email__icontains=search)
-                | Q(subject__icontains=search)
-            )
+            queryset = search_messages(queryset, search)
 
-        # Filtrage par date
-        date_from = self.request.query_params.get("date_from", None)
-        date_to = self.request.query_params.get("date_to", None)
-        if date_from:
-            queryset = queryset.filter(created_at__date__gte=date_from)
-        if date_to:
-            queryset = queryset.filter(created_at__date__lte=date_to)
+        # Filtrage par date : bornes en datetimes pour profiter des index sur created_at
+        try:
+            start, end = day_range(
+                self.request.query_params.get("date_from"),
+                self.request.query_params.get("date_to"),
+            )
+        except ValueError:
+            raise ValidationError({"error": "Dates attendues au format AAAA-MM-JJ"})
+        if start:
+            queryset = queryset.filter(created_at__gte=start)
+        if end:
+            queryset = queryset.filter(created_at__lt=end)
 
         return queryset.order_by("-created_at")
 
     def create(self, request, *args, **kwargs):
         """Création d'un nouveau message de contact"""
+        # Débit, doublons et spam filtrés avant toute validation, écriture ou email
+        rejection = contact_guard.check(request)
+        if rejection:
+            return rejection
+
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         # Sauvegarde du message
         message = serializer.save()
+        contact_guard.accepted(request)
 
         # Envoi d'email de notification aux admins (optionnel)
         try:
@@ -124,33 +138,23 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def stats(self, request):
         """Statistiques des messages pour le dashboard admin"""
-        total_messages = ContactMessage.objects.count()
-        unread_messages = ContactMessage.objects.filter(status="unread").count()
-        recent_messages = ContactMessage.objects.filter(
-            created_at__gte=timezone.now() - timezone.timedelta(days=7)
-        ).count()
-
-        # Répartition par statut
-        status_stats = (
-            ContactMessage.objects.values("status").annotate(count=Count("id")).order_by("status")
-        )
+        return Response(inbox_stats())
 
-        # Répartition par priorité
-        priority_stats = (
-            ContactMessage.objects.values("priority")
-            .annotate(count=Count("id"))
-            .order_by("priority")
-        )
-
-        return Response(
-            {
-                "total_messages": total_messages,
-                "unread_messages": unread_messages,
-                "recent_messages": recent_messages,
-                "status_distribution": list(status_stats),
-                "priority_distribution": list(priority_stats),
-            }
-        )
+    @action(detail=False, methods=["get"])
+    def triage(self, request):
+        """
+        File de tri : messages non lus par priorité puis ancienneté.
+        Pagination par curseur : ?limit= (20) et ?cursor= (next_cursor de la page précédente).
+        """
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), 100)
+            messages, next_cursor = triage_queue(limit, request.query_params.get("cursor"))
+        except ValueError:
+            return Response(
+                {"error": "limit ou cursor invalide"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = self.get_serializer(messages, many=True)
+        return Response({"results": serializer.data, "next_cursor": next_cursor})
 
     @action(detail=False, methods=["get"])
     def unread(self, request):
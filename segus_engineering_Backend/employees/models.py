@@ -4,6 +4,8 @@ from django.contrib.auth import get_user_model
 from django.db import models
 from django.utils import timezone
 
+from segus_engineering_Backend.tracking import TrackedFieldsMixin
+
 User = get_user_model()
 
 
@@ -63,13 +65,15 @@ class Employee(models.Model):
         super().save(*args, **kwargs)
 
 
-class WorkSession(models.Model):
+class WorkSession(TrackedFieldsMixin, models.Model):
     SESSION_STATUS = (
         ("active", "En cours"),
         ("paused", "En pause"),
         ("completed", "Terminée"),
     )
 
+    tracked_fields = ("status", "total_work_time")
+
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="work_sessions")
     start_time = models.DateTimeField(auto_now_add=True, verbose_name="Heure de début")
     end_time = models.DateTimeField(null=True, blank=True, verbose_name="Heure de fin")
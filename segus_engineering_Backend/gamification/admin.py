@@ -2,6 +2,7 @@ from django.contrib import admin
 
 from .models import (
     Badge,
+    CompletedWorkLedger,
     DailyObjective,
     DailyPerformance,
     EmployeeBadge,
@@ -29,6 +30,15 @@ class SubTaskAdmin(admin.ModelAdmin):
     ordering = ["-assigned_date"]
 
 
+@admin.register(CompletedWorkLedger)
+class CompletedWorkLedgerAdmin(admin.ModelAdmin):
+    list_display = ["employee", "date", "source", "source_id", "created_at"]
+    list_filter = ["source", "date"]
+    search_fields = ["employee__user__first_name", "employee__user__last_name"]
+    date_hierarchy = "date"
+    ordering = ["-date"]
+
+
 @admin.register(DailyPerformance)
 class DailyPerformanceAdmin(admin.ModelAdmin):
     list_display = [
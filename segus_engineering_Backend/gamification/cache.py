@@ -0,0 +1,93 @@
+"""Cache par employé du tableau de bord de gamification.
+
+Le payload sérialisé de ``EmployeeStatsViewSet.dashboard`` est stocké dans le
+cache Django (locmem, fichier, base de données...) sous une clé par utilisateur.
+Il est invalidé explicitement par les signaux de ``gamification.signals`` dès
+que les performances, statistiques, objectifs, badges ou sous-tâches de
+l'employé changent. Une génération globale, lue dans le même ``get_many``,
+permet d'invalider tous les tableaux de bord d'un coup (ex. badge modifié).
+
+La position au classement dépend des autres employés : elle peut donc être en
+retard d'au plus ``GAMIFICATION_DASHBOARD_CACHE_TIMEOUT`` secondes.
+"""
+
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from employees.models import Employee
+
+GENERATION_KEY = "gamification:dashboard:generation"
+
+_counters = {"hits": 0, "misses": 0, "invalidations": 0}
+_counters_lock = threading.Lock()
+
+
+def _dashboard_key(user_id):
+    return f"gamification:dashboard:user:{user_id}"
+
+
+def _timeout():
+    return getattr(settings, "GAMIFICATION_DASHBOARD_CACHE_TIMEOUT", 300)
+
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def get_or_build_dashboard(user_id, build):
+    """Retourner le payload en cache ou le construire avec ``build()`` puis le stocker"""
+    key = _dashboard_key(user_id)
+    cached = cache.get_many([GENERATION_KEY, key])
+    generation = cached.get(GENERATION_KEY)
+    entry = cached.get(key)
+
+    if generation is not None and entry is not None and entry["generation"] == generation:
+        _count("hits")
+        return entry["data"]
+
+    _count("misses")
+    if generation is None:
+        cache.add(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+        generation = cache.get(GENERATION_KEY)
+
+    data = build()
+    cache.set(key, {"generation": generation, "data": data}, timeout=_timeout())
+    return data
+
+
+def invalidate_dashboard(employee_id):
+    """Invalider le tableau de bord d'un employé"""
+    user_id = Employee.objects.filter(pk=employee_id).values_list("user_id", flat=True).first()
+    if user_id is not None:
+        invalidate_user_dashboard(user_id)
+
+
+def invalidate_user_dashboard(user_id):
+    """Invalider le tableau de bord d'un utilisateur"""
+    _count("invalidations")
+    cache.delete(_dashboard_key(user_id))
+
+
+def invalidate_all_dashboards():
+    """Invalider tous les tableaux de bord en changeant de génération"""
+    _count("invalidations")
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def dashboard_cache_stats():
+    """Compteurs hits/misses du processus courant"""
+    with _counters_lock:
+        stats = dict(_counters)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def reset_dashboard_cache_stats():
+    with _counters_lock:
+        for name in _counters:
+            _counters[name] = 0
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_ledger(apps, schema_editor):
+    """Alimenter le registre à partir des sous-tâches déjà terminées"""
+    Ledger = apps.get_model("gamification", "CompletedWorkLedger")
+    GamificationSubTask = apps.get_model("gamification", "SubTask")
+    ProjectSubTask = apps.get_model("projects", "SubTask")
+    Employee = apps.get_model("employees", "Employee")
+
+    rows = [
+        Ledger(
+            employee_id=employee_id,
+            date=assigned_date,
+            source="gamification",
+            source_id=subtask_id,
+        )
+        for subtask_id, employee_id, assigned_date in GamificationSubTask.objects.filter(
+            status="completed"
+        ).values_list("id", "employee_id", "assigned_date")
+    ]
+
+    employee_by_user = dict(Employee.objects.values_list("user_id", "id"))
+    completed = ProjectSubTask.objects.filter(is_completed=True).prefetch_related(
+        "assigned_employees"
+    )
+    for subtask in completed.iterator(chunk_size=1000):
+        day = timezone.localtime(subtask.created_at).date()
+        for user in subtask.assigned_employees.all():
+            if user.id in employee_by_user:
+                rows.append(
+                    Ledger(
+                        employee_id=employee_by_user[user.id],
+                        date=day,
+                        source="project",
+                        source_id=subtask.id,
+                    )
+                )
+
+    Ledger.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("employees", "0012_alter_worksession_notes"),
+        ("gamification", "0001_initial"),
+        ("projects", "0002_alter_project_options_remove_project_date_debut_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CompletedWorkLedger",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("date", models.DateField(help_text="Jour auquel la sous-tâche est comptabilisée")),
+                (
+                    "source",
+                    models.CharField(
+                        choices=[("gamification", "Gamification"), ("project", "Projet")],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "source_id",
+                    models.PositiveBigIntegerField(help_text="Identifiant de la sous-tâche source"),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "employee",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="completed_work",
+                        to="employees.employee",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-date"],
+                "indexes": [
+                    models.Index(fields=["employee", "date"], name="gamificatio_employe_a2ab6d_idx")
+                ],
+                "unique_together": {("source", "source_id", "employee")},
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
@@ -78,6 +78,72 @@ class SubTask(models.Model):
         self.completed_date = timezone.now()
         self.save()
 
+    def mark_uncompleted(self):
+        """Remettre la sous-tâche en attente"""
+        self.status = "pending"
+        self.completed_date = None
+        self.save()
+
+
+class CompletedWorkLedger(models.Model):
+    """Registre dénormalisé des sous-tâches terminées (gamification et projets).
+
+    Une ligne par (source, sous-tâche, employé) : une sous-tâche terminée n'est
+    donc jamais comptée deux fois, et tout comptage par jour ou par période se
+    résume à un agrégat sur l'index (employee, date).
+    """
+
+    SOURCE_GAMIFICATION = "gamification"
+    SOURCE_PROJECT = "project"
+    SOURCE_CHOICES = [
+        (SOURCE_GAMIFICATION, "Gamification"),
+        (SOURCE_PROJECT, "Projet"),
+    ]
+
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="completed_work")
+    date = models.DateField(help_text="Jour auquel la sous-tâche est comptabilisée")
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    source_id = models.PositiveBigIntegerField(help_text="Identifiant de la sous-tâche source")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ["source", "source_id", "employee"]
+        ordering = ["-date"]
+        indexes = [
+            models.Index(fields=["employee", "date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.date} - {self.source}#{self.source_id}"
+
+    @classmethod
+    def sync_entries(cls, source, source_id, entries):
+        """Remplacer les lignes d'une sous-tâche par `entries` [(employee_id, date), ...]"""
+        employee_ids = [employee_id for employee_id, _ in entries]
+        cls.objects.filter(source=source, source_id=source_id).exclude(
+            employee_id__in=employee_ids
+        ).delete()
+        if entries:
+            cls.objects.bulk_create(
+                [
+                    cls(employee_id=employee_id, date=day, source=source, source_id=source_id)
+                    for employee_id, day in entries
+                ],
+                update_conflicts=True,
+                unique_fields=["source", "source_id", "employee"],
+                update_fields=["date"],
+            )
+
+    @classmethod
+    def clear(cls, source, source_ids):
+        """Supprimer les lignes des sous-tâches données"""
+        cls.objects.filter(source=source, source_id__in=source_ids).delete()
+
+    @classmethod
+    def count_for(cls, employee, start, end=None):
+        """Nombre de sous-tâches terminées par un employé sur un jour ou une période"""
+        return cls.objects.filter(employee=employee, date__range=(start, end or start)).count()
+
 
 class DailyPerformance(models.Model):
     """Performance quotidienne d'un employé"""
@@ -116,13 +182,7 @@ class DailyPerformance(models.Model):
         """Calculer la performance quotidienne selon la méthode de badging améliorée"""
         # Sync completed_subtasks from actual completed subtasks that day if not provided
         if self.completed_subtasks == 0:
-            self.completed_subtasks = (
-                SubTask.objects.filter(
-                    employee=self.employee,
-                    status="completed",
-                    assigned_date=self.date,
-                ).count()
-            )
+            self.completed_subtasks = CompletedWorkLedger.count_for(self.employee, self.date)
 
         if self.objective:
             # Vérifier si les objectifs sont atteints
@@ -33,6 +33,42 @@ class DailyObjectiveSerializer(serializers.ModelSerializer):
         read_only_fields = ["created_by", "created_at", "updated_at"]
 
 
+class DailyObjectiveBulkAssignSerializer(serializers.Serializer):
+    """Paramètres d'assignation en masse des objectifs quotidiens"""
+
+    MAX_DAYS = 366
+
+    employee_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list
+    )
+    positions = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    all_active = serializers.BooleanField(required=False, default=False)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField(required=False)
+    target_subtasks = serializers.IntegerField(min_value=0, default=0)
+    target_hours = serializers.DecimalField(
+        max_digits=4, decimal_places=2, min_value=0, default="8.00"
+    )
+    overwrite = serializers.BooleanField(required=False, default=True)
+
+    def validate(self, data):
+        if not (data["employee_ids"] or data["positions"] or data["all_active"]):
+            raise serializers.ValidationError(
+                "Indiquez des employés, des postes ou all_active=true."
+            )
+
+        data.setdefault("end_date", data["start_date"])
+        if data["end_date"] < data["start_date"]:
+            raise serializers.ValidationError(
+                "La date de fin doit être postérieure à la date de début."
+            )
+        if (data["end_date"] - data["start_date"]).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(
+                f"La période ne peut pas dépasser {self.MAX_DAYS} jours."
+            )
+        return data
+
+
 class SubTaskSerializer(serializers.ModelSerializer):
     employee_name = serializers.CharField(source="employee.user.get_full_name", read_only=True)
     created_by_name = serializers.CharField(source="created_by.get_full_name", read_only=True)
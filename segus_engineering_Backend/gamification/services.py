@@ -0,0 +1,85 @@
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Q
+
+from employees.models import Employee
+
+from .cache import invalidate_all_dashboards
+from .models import DailyObjective
+
+
+def resolve_objective_targets(employee_ids=None, positions=None, all_active=False):
+    """Résoudre les employés ciblés en une seule requête"""
+    queryset = Employee.objects.all()
+    if all_active:
+        return list(queryset.filter(is_active=True).values_list("id", flat=True))
+
+    condition = Q(pk__in=employee_ids or [])
+    if positions:
+        condition |= Q(position__in=positions, is_active=True)
+    return list(queryset.filter(condition).values_list("id", flat=True))
+
+
+def bulk_assign_daily_objectives(
+    employee_ids,
+    start_date,
+    end_date,
+    target_subtasks,
+    target_hours,
+    created_by,
+    overwrite=True,
+):
+    """Créer ou mettre à jour les objectifs (employé, jour) sur une période.
+
+    Avec ``overwrite``, un seul ``bulk_create(update_conflicts=True)`` sur
+    (employee, date) écrase les objectifs existants. Sinon seuls les objectifs
+    manquants sont créés et renvoyés dans ``created_objectives``.
+    """
+    days = [
+        start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)
+    ]
+    existing = set(
+        DailyObjective.objects.filter(
+            employee_id__in=employee_ids, date__range=(start_date, end_date)
+        ).values_list("employee_id", "date")
+    )
+
+    objectives = [
+        DailyObjective(
+            employee_id=employee_id,
+            date=day,
+            target_subtasks=target_subtasks,
+            target_hours=target_hours,
+            created_by=created_by,
+        )
+        for employee_id in employee_ids
+        for day in days
+        if overwrite or (employee_id, day) not in existing
+    ]
+
+    with transaction.atomic():
+        if overwrite:
+            DailyObjective.objects.bulk_create(
+                objectives,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=["employee", "date"],
+                update_fields=["target_subtasks", "target_hours", "updated_at"],
+            )
+            created_objectives = []
+        else:
+            created_objectives = DailyObjective.objects.bulk_create(objectives, batch_size=1000)
+
+    # bulk_create n'envoie pas de signaux : l'objectif du jour a pu changer
+    if start_date <= date.today() <= end_date and objectives:
+        invalidate_all_dashboards()
+
+    total = len(employee_ids) * len(days)
+    return {
+        "employees": len(employee_ids),
+        "days": len(days),
+        "created": total - len(existing),
+        "updated": len(existing) if overwrite else 0,
+        "created_objectives": created_objectives,
+    }
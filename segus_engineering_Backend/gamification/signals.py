@@ -0,0 +1,141 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from employees.models import Employee
+from projects.models import SubTask as ProjectSubTask
+from projects.signals import subtasks_completion_changed
+
+from .cache import invalidate_all_dashboards, invalidate_dashboard, invalidate_user_dashboard
+from .models import (
+    Badge,
+    CompletedWorkLedger,
+    DailyObjective,
+    DailyPerformance,
+    EmployeeBadge,
+    EmployeeStats,
+    MonthlyPerformance,
+    SubTask,
+)
+
+
+def sync_gamification_subtask(subtask):
+    """Aligner le registre sur le statut d'une sous-tâche de gamification"""
+    entries = []
+    if subtask.status == "completed":
+        entries = [(subtask.employee_id, subtask.assigned_date)]
+    CompletedWorkLedger.sync_entries(CompletedWorkLedger.SOURCE_GAMIFICATION, subtask.pk, entries)
+
+
+def sync_project_subtask(subtask):
+    """Aligner le registre sur une sous-tâche de projet (une ligne par employé assigné)"""
+    if not subtask.is_completed:
+        CompletedWorkLedger.clear(CompletedWorkLedger.SOURCE_PROJECT, [subtask.pk])
+        return
+
+    # Les sous-tâches de projet sont comptabilisées à leur date de création
+    day = timezone.localtime(subtask.created_at).date()
+    employee_ids = Employee.objects.filter(user__assigned_subtasks=subtask).values_list(
+        "id", flat=True
+    )
+    CompletedWorkLedger.sync_entries(
+        CompletedWorkLedger.SOURCE_PROJECT,
+        subtask.pk,
+        [(employee_id, day) for employee_id in employee_ids],
+    )
+
+
+@receiver(post_save, sender=SubTask)
+def gamification_subtask_saved(sender, instance, **kwargs):
+    sync_gamification_subtask(instance)
+
+
+@receiver(post_delete, sender=SubTask)
+def gamification_subtask_deleted(sender, instance, **kwargs):
+    CompletedWorkLedger.clear(CompletedWorkLedger.SOURCE_GAMIFICATION, [instance.pk])
+
+
+@receiver(post_save, sender=ProjectSubTask)
+def project_subtask_saved(sender, instance, **kwargs):
+    sync_project_subtask(instance)
+
+
+@receiver(post_delete, sender=ProjectSubTask)
+def project_subtask_deleted(sender, instance, **kwargs):
+    CompletedWorkLedger.clear(CompletedWorkLedger.SOURCE_PROJECT, [instance.pk])
+
+
+@receiver(subtasks_completion_changed, sender=ProjectSubTask)
+def project_subtasks_completion_changed(sender, subtask_ids, completed, **kwargs):
+    """Complétion en masse (UPDATE sans post_save) : registre mis à jour en une passe"""
+    if not completed:
+        CompletedWorkLedger.clear(CompletedWorkLedger.SOURCE_PROJECT, subtask_ids)
+        return
+
+    assignments = ProjectSubTask.assigned_employees.through.objects.filter(
+        subtask_id__in=subtask_ids, user__employee_profile__isnull=False
+    ).values_list("subtask_id", "user__employee_profile__id", "subtask__created_at")
+    CompletedWorkLedger.objects.bulk_create(
+        [
+            CompletedWorkLedger(
+                employee_id=employee_id,
+                date=timezone.localtime(created_at).date(),
+                source=CompletedWorkLedger.SOURCE_PROJECT,
+                source_id=subtask_id,
+            )
+            for subtask_id, employee_id, created_at in assignments
+        ],
+        update_conflicts=True,
+        unique_fields=["source", "source_id", "employee"],
+        update_fields=["date"],
+        batch_size=1000,
+    )
+
+
+@receiver(m2m_changed, sender=ProjectSubTask.assigned_employees.through)
+def project_subtask_assignees_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        if instance.is_completed:
+            sync_project_subtask(instance)
+        return
+
+    # Côté utilisateur : l'employé a été retiré de toutes ses sous-tâches
+    if action == "post_clear":
+        CompletedWorkLedger.objects.filter(
+            source=CompletedWorkLedger.SOURCE_PROJECT, employee__user=instance
+        ).delete()
+        return
+
+    for subtask in ProjectSubTask.objects.filter(is_completed=True, pk__in=pk_set):
+        sync_project_subtask(subtask)
+
+
+def employee_dashboard_changed(sender, instance, **kwargs):
+    invalidate_dashboard(instance.employee_id)
+
+
+for _model in (
+    DailyObjective,
+    DailyPerformance,
+    MonthlyPerformance,
+    EmployeeBadge,
+    EmployeeStats,
+    SubTask,
+):
+    post_save.connect(employee_dashboard_changed, sender=_model)
+    post_delete.connect(employee_dashboard_changed, sender=_model)
+
+
+@receiver(post_save, sender=Employee)
+def employee_saved(sender, instance, **kwargs):
+    invalidate_user_dashboard(instance.user_id)
+
+
+@receiver(post_save, sender=Badge)
+@receiver(post_delete, sender=Badge)
+def badge_changed(sender, instance, **kwargs):
+    # Le prochain badge affiché dépend du catalogue : invalider tous les tableaux de bord
+    invalidate_all_dashboards()
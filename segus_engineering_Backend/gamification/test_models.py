@@ -8,6 +8,7 @@ from django.utils import timezone
 from employees.models import Employee
 from gamification.models import (
     Badge,
+    CompletedWorkLedger,
     DailyObjective,
     DailyPerformance,
     EmployeeBadge,
@@ -443,3 +444,107 @@ class EmployeeBadgeModelTest(TestCase):
 
         expected = f"{self.employee.user.get_full_name()} - {self.badge.name}"
         self.assertEqual(str(employee_badge), expected)
+
+
+class CompletedWorkLedgerModelTest(TestCase):
+    """Tests pour le registre des sous-tâches terminées"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        from projects.models import Project, Task
+
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+        )
+
+        self.employee_user = User.objects.create_user(
+            username="employee",
+            email="employee@example.com",
+            password="emppass123",
+            role="EMPLOYE",
+        )
+
+        self.employee = Employee.objects.create(user=self.employee_user)
+
+        project = Project.objects.create(
+            title="Projet",
+            description="Description",
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=30),
+            created_by=self.admin_user,
+        )
+        self.task = Task.objects.create(
+            title="Tâche",
+            description="Description",
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=7),
+            project=project,
+            created_by=self.admin_user,
+        )
+
+    def _create_project_subtask(self, number):
+        from projects.models import SubTask as ProjectSubTask
+
+        subtask = ProjectSubTask.objects.create(
+            section_name=f"Section {number}",
+            section_number=f"S{number:03d}",
+            section_id=f"section_{number}",
+            kilometrage=Decimal("1.00"),
+            task=self.task,
+            created_by=self.admin_user,
+        )
+        subtask.assigned_employees.add(self.employee_user)
+        return subtask
+
+    def test_gamification_subtask_completion_is_recorded_once(self):
+        """Une sous-tâche terminée plusieurs fois n'est comptée qu'une fois"""
+        subtask = SubTask.objects.create(
+            employee=self.employee, title="Tâche", created_by=self.admin_user
+        )
+        self.assertEqual(CompletedWorkLedger.count_for(self.employee, date.today()), 0)
+
+        subtask.mark_completed()
+        subtask.mark_completed()
+        self.assertEqual(CompletedWorkLedger.count_for(self.employee, date.today()), 1)
+
+        subtask.mark_uncompleted()
+        self.assertEqual(CompletedWorkLedger.count_for(self.employee, date.today()), 0)
+
+    def test_project_subtask_completion_is_recorded(self):
+        """Les sous-tâches de projet terminées alimentent le même registre"""
+        subtask = self._create_project_subtask(1)
+        self._create_project_subtask(2)
+
+        subtask.mark_completed()
+        self.assertEqual(CompletedWorkLedger.count_for(self.employee, date.today()), 1)
+
+        subtask.assigned_employees.remove(self.employee_user)
+        self.assertEqual(CompletedWorkLedger.count_for(self.employee, date.today()), 0)
+
+        subtask.assigned_employees.add(self.employee_user)
+        self.assertEqual(CompletedWorkLedger.count_for(self.employee, date.today()), 1)
+
+        subtask.delete()
+        self.assertEqual(CompletedWorkLedger.count_for(self.employee, date.today()), 0)
+
+    def test_count_for_range_combines_sources(self):
+        """Le comptage sur une période additionne les deux sources sans doublon"""
+        yesterday = date.today() - timedelta(days=1)
+        SubTask.objects.create(
+            employee=self.employee,
+            title="Hier",
+            status="completed",
+            assigned_date=yesterday,
+            created_by=self.admin_user,
+        )
+        self._create_project_subtask(1).mark_completed()
+
+        self.assertEqual(CompletedWorkLedger.count_for(self.employee, yesterday), 1)
+        self.assertEqual(CompletedWorkLedger.count_for(self.employee, yesterday, date.today()), 2)
+
+        performance = DailyPerformance.objects.create(employee=self.employee, date=date.today())
+        performance.calculate_performance()
+        self.assertEqual(performance.completed_subtasks, 1)
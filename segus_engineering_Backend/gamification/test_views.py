@@ -0,0 +1,180 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from employees.models import Employee
+from gamification.cache import dashboard_cache_stats, reset_dashboard_cache_stats
+from gamification.models import Badge, DailyObjective, EmployeeStats
+
+User = get_user_model()
+
+
+class GamificationDashboardCacheTest(APITestCase):
+    """Tests du cache du tableau de bord de gamification"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        cache.clear()
+        reset_dashboard_cache_stats()
+        self.client = APIClient()
+
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+        )
+        self.employee_user = User.objects.create_user(
+            username="employee",
+            email="employee@example.com",
+            password="emppass123",
+            role="EMPLOYE",
+        )
+        self.employee = Employee.objects.create(user=self.employee_user)
+        EmployeeStats.objects.create(employee=self.employee)
+
+        self.client.force_authenticate(user=self.employee_user)
+        self.dashboard_url = "/api/gamification/employee-stats/dashboard/"
+
+    def test_second_request_is_served_from_cache(self):
+        """Le deuxième appel ne touche pas la base de données"""
+        first = self.client.get(self.dashboard_url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.dashboard_url)
+
+        self.assertEqual(second.data, first.data)
+        stats = dashboard_cache_stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_objective_change_invalidates_dashboard(self):
+        """Un nouvel objectif invalide le tableau de bord de l'employé"""
+        response = self.client.get(self.dashboard_url)
+        self.assertIsNone(response.data["today_objective"])
+
+        DailyObjective.objects.create(
+            employee=self.employee,
+            date=date.today(),
+            target_subtasks=3,
+            created_by=self.admin_user,
+        )
+
+        response = self.client.get(self.dashboard_url)
+        self.assertEqual(response.data["today_objective"]["target_subtasks"], 3)
+        self.assertEqual(dashboard_cache_stats()["misses"], 2)
+
+    def test_badge_change_invalidates_all_dashboards(self):
+        """Un badge modifié invalide tous les tableaux de bord"""
+        self.client.get(self.dashboard_url)
+
+        Badge.objects.create(
+            name="Bronze",
+            description="Premier badge",
+            badge_type="performance",
+            icon="medal",
+            required_stars=Decimal("1.00"),
+            required_points=10,
+        )
+
+        response = self.client.get(self.dashboard_url)
+        self.assertEqual(response.data["next_badge"]["name"], "Bronze")
+        self.assertEqual(dashboard_cache_stats()["hits"], 0)
+
+    def test_cache_stats_requires_admin(self):
+        """Les compteurs du cache sont réservés aux admins"""
+        response = self.client.get("/api/gamification/employee-stats/dashboard_cache_stats/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get("/api/gamification/employee-stats/dashboard_cache_stats/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("hit_rate", response.data)
+
+
+class DailyObjectiveBulkAssignTest(APITestCase):
+    """Tests de l'assignation en masse des objectifs quotidiens"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+        )
+        self.employees = []
+        for i in range(5):
+            user = User.objects.create_user(
+                username=f"employee{i}",
+                email=f"employee{i}@example.com",
+                password="emppass123",
+                role="EMPLOYE",
+            )
+            position = "Technicien" if i < 3 else "Ingénieur"
+            self.employees.append(Employee.objects.create(user=user, position=position))
+
+        self.client.force_authenticate(user=self.admin_user)
+        self.url = "/api/gamification/daily-objectives/bulk_assign/"
+        self.start = date.today()
+        self.end = self.start + timedelta(days=29)
+
+    def test_assign_position_over_month(self):
+        """Assigner un poste sur 30 jours crée une ligne par employé et par jour"""
+        payload = {
+            "positions": ["Technicien"],
+            "start_date": self.start.isoformat(),
+            "end_date": self.end.isoformat(),
+            "target_subtasks": 4,
+            "target_hours": "7.50",
+        }
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 90)
+        self.assertEqual(response.data["updated"], 0)
+        self.assertEqual(DailyObjective.objects.count(), 90)
+
+    def test_upsert_updates_existing_rows(self):
+        """Les objectifs existants sont mis à jour, les autres créés"""
+        DailyObjective.objects.create(
+            employee=self.employees[0],
+            date=self.start,
+            target_subtasks=1,
+            created_by=self.admin_user,
+        )
+        payload = {
+            "all_active": True,
+            "start_date": self.start.isoformat(),
+            "target_subtasks": 6,
+        }
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.data["created"], 4)
+        self.assertEqual(response.data["updated"], 1)
+        self.assertEqual(
+            DailyObjective.objects.get(employee=self.employees[0], date=self.start).target_subtasks,
+            6,
+        )
+
+    def test_query_count_does_not_grow_with_targets(self):
+        """Le nombre de requêtes est constant quel que soit le nombre d'employés"""
+        payload = {
+            "all_active": True,
+            "start_date": self.start.isoformat(),
+            "end_date": (self.start + timedelta(days=6)).isoformat(),
+        }
+        # Résolution des cibles, objectifs existants, upsert (+ savepoint)
+        with self.assertNumQueries(5):
+            self.client.post(self.url, payload, format="json")
+
+    def test_requires_a_target(self):
+        """Une cible est obligatoire"""
+        response = self.client.post(self.url, {"start_date": self.start.isoformat()}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -2,15 +2,19 @@ from datetime import date, timedelta
 
 from django.db.models import Avg, Q
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from employees.models import Employee
+from employees.permissions import IsAdminRole
 
+from .cache import dashboard_cache_stats, get_or_build_dashboard, invalidate_all_dashboards
 from .models import (
     Badge,
+    CompletedWorkLedger,
     DailyObjective,
     DailyPerformance,
     EmployeeBadge,
@@ -21,6 +25,7 @@ from .models import (
 from .serializers import (
     AdminGamificationStatsSerializer,
     BadgeSerializer,
+    DailyObjectiveBulkAssignSerializer,
     DailyObjectiveSerializer,
     DailyPerformanceSerializer,
     EmployeeGamificationDashboardSerializer,
@@ -29,6 +34,7 @@ from .serializers import (
     MonthlyPerformanceSerializer,
     SubTaskSerializer,
 )
+from .services import bulk_assign_daily_objectives, resolve_objective_targets
 
 
 class DailyObjectiveViewSet(viewsets.ModelViewSet):
@@ -65,29 +71,49 @@ class DailyObjectiveViewSet(viewsets.ModelViewSet):
         employees = request.data.get("employees", [])
         target_subtasks = request.data.get("target_subtasks", 0)
         target_hours = request.data.get("target_hours", 8.0)
-        date_obj = request.data.get("date", date.today())
-
-        created_objectives = []
-        for employee_id in employees:
-            try:
-                employee = Employee.objects.get(id=employee_id)
-                objective, created = DailyObjective.objects.get_or_create(
-                    employee=employee,
-                    date=date_obj,
-                    defaults={
-                        "target_subtasks": target_subtasks,
-                        "target_hours": target_hours,
-                        "created_by": request.user,
-                    },
-                )
-                if created:
-                    created_objectives.append(objective)
-            except Employee.DoesNotExist:
-                continue
+        date_obj = request.data.get("date") or date.today()
+        if isinstance(date_obj, str):
+            date_obj = parse_date(date_obj)
+
+        employee_ids = resolve_objective_targets(employee_ids=employees)
+        result = bulk_assign_daily_objectives(
+            employee_ids,
+            date_obj,
+            date_obj,
+            target_subtasks,
+            target_hours,
+            request.user,
+            overwrite=False,
+        )
 
-        serializer = self.get_serializer(created_objectives, many=True)
+        serializer = self.get_serializer(result["created_objectives"], many=True)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated, IsAdminRole])
+    def bulk_assign(self, request):
+        """Assigner des objectifs à des employés, des postes ou tout le personnel actif
+        sur une période, en une seule écriture ensembliste"""
+        params = DailyObjectiveBulkAssignSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        employee_ids = resolve_objective_targets(
+            employee_ids=data["employee_ids"],
+            positions=data["positions"],
+            all_active=data["all_active"],
+        )
+        result = bulk_assign_daily_objectives(
+            employee_ids,
+            data["start_date"],
+            data["end_date"],
+            data["target_subtasks"],
+            data["target_hours"],
+            request.user,
+            overwrite=data["overwrite"],
+        )
+        result.pop("created_objectives")
+        return Response(result, status=status.HTTP_200_OK)
+
 
 class SubTaskViewSet(viewsets.ModelViewSet):
     queryset = SubTask.objects.all()
@@ -131,6 +157,18 @@ class SubTaskViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(subtask)
         return Response(serializer.data)
 
+    @action(detail=True, methods=["post"])
+    def uncomplete(self, request, pk=None):
+        """Remettre une sous-tâche en attente"""
+        subtask = self.get_object()
+        subtask.mark_uncompleted()
+
+        # Mettre à jour la performance quotidienne
+        self._update_daily_performance(subtask.employee, subtask.assigned_date)
+
+        serializer = self.get_serializer(subtask)
+        return Response(serializer.data)
+
     @action(detail=False, methods=["get"])
     def my_tasks(self, request):
         """Récupérer les tâches de l'employé connecté"""
@@ -181,8 +219,7 @@ class SubTaskViewSet(viewsets.ModelViewSet):
                 )
 
             # Marquer comme terminée
-            project_subtask.is_completed = True
-            project_subtask.save()
+            project_subtask.mark_completed()
 
             # Déclencher le calcul des performances pour la date de création
             creation_date = project_subtask.created_at.date()
@@ -203,22 +240,8 @@ class SubTaskViewSet(viewsets.ModelViewSet):
 
     def _update_daily_performance(self, employee, date_obj):
         """Mettre à jour la performance quotidienne après completion d'une tâche"""
-        # Compter les sous-tâches terminées dans le système de gamification
-        gamification_completed = SubTask.objects.filter(
-            employee=employee, assigned_date=date_obj, status="completed"
-        ).count()
-
-        # Compter aussi les sous-tâches terminées dans le système de projets
-        from projects.models import SubTask as ProjectSubTask
-
-        project_completed = ProjectSubTask.objects.filter(
-            assigned_employees=employee.user,  # Utiliser employee.user au lieu de employee
-            created_at__date=date_obj,
-            is_completed=True,
-        ).count()
-
-        # Total des sous-tâches terminées
-        total_completed = gamification_completed + project_completed
+        # Sous-tâches terminées (gamification et projets) via le registre dénormalisé
+        total_completed = CompletedWorkLedger.count_for(employee, date_obj)
 
         performance, created = DailyPerformance.objects.get_or_create(
             employee=employee,
@@ -402,76 +425,90 @@ class EmployeeStatsViewSet(viewsets.ModelViewSet):
             stat.check_and_award_badges()
             updated_count += 1
 
+        # Les positions au classement ont pu changer pour tout le monde
+        invalidate_all_dashboards()
+
         return Response({"message": f"{updated_count} statistiques mises à jour"})
 
     @action(detail=False, methods=["get"])
     def dashboard(self, request):
         """Tableau de bord de gamification pour l'employé connecté"""
         try:
-            employee = Employee.objects.get(user=request.user)
-            stats, created = EmployeeStats.objects.get_or_create(employee=employee)
+            data = get_or_build_dashboard(
+                request.user.id, lambda: self._build_dashboard(request.user)
+            )
+            return Response(data)
+        except Employee.DoesNotExist:
+            return Response({"error": "Employé non trouvé"}, status=status.HTTP_404_NOT_FOUND)
 
-            if created:
-                stats.update_stats()
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated, IsAdminRole])
+    def dashboard_cache_stats(self, request):
+        """Compteurs hits/misses du cache des tableaux de bord"""
+        return Response(dashboard_cache_stats())
 
-            today = date.today()
+    def _build_dashboard(self, user):
+        """Construire le payload sérialisé du tableau de bord (hors cache)"""
+        employee = Employee.objects.get(user=user)
+        stats, created = EmployeeStats.objects.get_or_create(employee=employee)
 
-            # Performance du mois actuel
-            current_month_performance = MonthlyPerformance.objects.filter(
-                employee=employee, year=today.year, month=today.month
-            ).first()
+        if created:
+            stats.update_stats()
 
-            # Performances quotidiennes récentes (7 derniers jours)
-            week_ago = today - timedelta(days=7)
-            recent_daily_performances = DailyPerformance.objects.filter(
-                employee=employee, date__gte=week_ago
-            ).order_by("-date")
-
-            # Sous-tâches en attente
-            pending_subtasks = employee.gamification_subtasks.filter(
-                status__in=["pending", "in_progress"]
-            )[:10]
-
-            # Objectif d'aujourd'hui
-            today_objective = DailyObjective.objects.filter(employee=employee, date=today).first()
-
-            # Position dans le classement
-            better_stats = EmployeeStats.objects.filter(
-                Q(total_stars__gt=stats.total_stars)
-                | (Q(total_stars=stats.total_stars) & Q(total_points__gt=stats.total_points))
-            ).count()
-            leaderboard_position = better_stats + 1
-
-            # Prochain badge à obtenir
-            earned_badges = EmployeeBadge.objects.filter(employee=employee).values_list(
-                "badge_id", flat=True
-            )
-            next_badge = (
-                Badge.objects.filter(
-                    is_active=True,
-                    required_stars__gte=stats.total_stars,
-                    required_points__gte=stats.total_points,
-                )
-                .exclude(id__in=earned_badges)
-                .order_by("required_stars", "required_points")
-                .first()
+        today = date.today()
+
+        # Performance du mois actuel
+        current_month_performance = MonthlyPerformance.objects.filter(
+            employee=employee, year=today.year, month=today.month
+        ).first()
+
+        # Performances quotidiennes récentes (7 derniers jours)
+        week_ago = today - timedelta(days=7)
+        recent_daily_performances = DailyPerformance.objects.filter(
+            employee=employee, date__gte=week_ago
+        ).order_by("-date")
+
+        # Sous-tâches en attente
+        pending_subtasks = employee.gamification_subtasks.filter(
+            status__in=["pending", "in_progress"]
+        )[:10]
+
+        # Objectif d'aujourd'hui
+        today_objective = DailyObjective.objects.filter(employee=employee, date=today).first()
+
+        # Position dans le classement
+        better_stats = EmployeeStats.objects.filter(
+            Q(total_stars__gt=stats.total_stars)
+            | (Q(total_stars=stats.total_stars) & Q(total_points__gt=stats.total_points))
+        ).count()
+        leaderboard_position = better_stats + 1
+
+        # Prochain badge à obtenir
+        earned_badges = EmployeeBadge.objects.filter(employee=employee).values_list(
+            "badge_id", flat=True
+        )
+        next_badge = (
+            Badge.objects.filter(
+                is_active=True,
+                required_stars__gte=stats.total_stars,
+                required_points__gte=stats.total_points,
             )
+            .exclude(id__in=earned_badges)
+            .order_by("required_stars", "required_points")
+            .first()
+        )
 
-            dashboard_data = {
-                "employee_info": stats,
-                "current_month_performance": current_month_performance,
-                "recent_daily_performances": recent_daily_performances,
-                "pending_subtasks": pending_subtasks,
-                "today_objective": today_objective,
-                "leaderboard_position": leaderboard_position,
-                "next_badge": next_badge,
-            }
-
-            serializer = EmployeeGamificationDashboardSerializer(dashboard_data)
-            return Response(serializer.data)
+        dashboard_data = {
+            "employee_info": stats,
+            "current_month_performance": current_month_performance,
+            "recent_daily_performances": recent_daily_performances,
+            "pending_subtasks": pending_subtasks,
+            "today_objective": today_objective,
+            "leaderboard_position": leaderboard_position,
+            "next_badge": next_badge,
+        }
 
-        except Employee.DoesNotExist:
-            return Response({"error": "Employé non trouvé"}, status=status.HTTP_404_NOT_FOUND)
+        serializer = EmployeeGamificationDashboardSerializer(dashboard_data)
+        return serializer.data
 
     @action(detail=False, methods=["get"])
     def admin_stats(self, request):
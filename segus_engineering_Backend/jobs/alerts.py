@@ -0,0 +1,226 @@
+"""
+Évaluation des alertes emploi et envoi des digests.
+
+Les alertes actives sont compilées une fois en un index (catégorie → alertes,
+type de contrat → alertes, lieu → alertes, trie des mots-clés racinisés).
+Chaque alerte occupe un bit : l'ensemble des alertes satisfaites par une offre
+est l'intersection (ET binaire) des masques de chaque critère, un critère vide
+valant « toutes ». Une offre coûte donc quelques recherches dans l'index,
+quel que soit le nombre d'abonnés ; les lieux sont cherchés par suites de mots
+du lieu de l'offre, et les alertes satisfaites sont extraites du masque final
+en un passage NumPy.
+"""
+
+import re
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .search import analyze, fold
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def place_words(text):
+    """Mots d'un lieu, sans accents ni ponctuation : "Sfax, Tunisie" → ["sfax", "tunisie"]"""
+    return _WORD.findall(fold(text))
+
+
+def set_bits(mask):
+    """Positions des bits à 1 d'un entier, en temps linéaire dans sa taille"""
+    raw = np.frombuffer(mask.to_bytes((mask.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder="little"))
+
+
+class KeywordTrie:
+    """Trie des termes racinisés ; une alerte est attachée au nœud de fin de chaque mot-clé"""
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, term, bit):
+        node = self.root
+        for char in term:
+            node = node.setdefault(char, {})
+        node[None] = node.get(None, 0) | bit
+
+    def match(self, term):
+        """Masque des alertes dont un mot-clé est préfixe de `term`"""
+        mask = 0
+        node = self.root
+        for char in term:
+            node = node.get(char)
+            if node is None:
+                break
+            mask |= node.get(None, 0)
+        return mask
+
+
+class AlertIndex:
+    """Index compilé des alertes actives"""
+
+    def __init__(self, alerts, alert_categories):
+        self.alerts = []
+        self.all = 0
+        self.keywords = KeywordTrie()
+        self.by_category = defaultdict(int)
+        self.by_job_type = defaultdict(int)
+        self.locations = defaultdict(int)
+        # Longueur (en mots) du plus long lieu d'alerte
+        self.location_words = 0
+        # Alertes sans critère sur une dimension : elles acceptent toute valeur
+        self.any_keyword = self.any_category = self.any_job_type = self.any_location = 0
+
+        for position, alert in enumerate(alerts):
+            bit = 1 << position
+            self.alerts.append(alert)
+            self.all |= bit
+
+            terms = analyze(alert["keywords"])
+            for term in terms:
+                self.keywords.add(term, bit)
+            if not terms:
+                self.any_keyword |= bit
+
+            categories = alert_categories.get(alert["id"])
+            for category_id in categories or ():
+                self.by_category[category_id] |= bit
+            if not categories:
+                self.any_category |= bit
+
+            job_types = alert["job_types"] or []
+            for job_type in job_types:
+                self.by_job_type[job_type] |= bit
+            if not job_types:
+                self.any_job_type |= bit
+
+            locations = [place_words(location) for location in alert["locations"] or []]
+            for words in filter(None, locations):
+                self.locations[" ".join(words)] |= bit
+                self.location_words = max(self.location_words, len(words))
+            if not any(locations):
+                self.any_location |= bit
+
+        # Seuil d'envoi par alerte (epoch) : offres plus récentes que le dernier digest
+        self.sent_before = np.array(
+            [(alert["last_sent"] or alert["created_at"]).timestamp() for alert in self.alerts],
+            dtype=np.float64,
+        )
+
+    def match(self, offer):
+        """Masque des alertes satisfaites par une offre"""
+        mask = self.all & (self.any_category | self.by_category.get(offer.category_id, 0))
+        if not mask:
+            return 0
+        mask &= self.any_job_type | self.by_job_type.get(offer.job_type, 0)
+        if not mask:
+            return 0
+
+        # Chaque suite de mots du lieu de l'offre est une recherche dans l'index
+        words = place_words(offer.location)
+        location_mask = self.any_location
+        for start in range(len(words)):
+            for end in range(start + 1, min(start + self.location_words, len(words)) + 1):
+                location_mask |= self.locations.get(" ".join(words[start:end]), 0)
+        mask &= location_mask
+        if not mask:
+            return 0
+
+        keyword_mask = self.any_keyword
+        for term in set(analyze([offer.title, *(offer.skills or [])])):
+            keyword_mask |= self.keywords.match(term)
+        return mask & keyword_mask
+
+    def matches(self, offers):
+        """{position de l'alerte: [offres récentes pour elle]} en une passe sur les offres"""
+        digests = defaultdict(list)
+        for offer in offers:
+            positions = set_bits(self.match(offer))
+            positions = positions[self.sent_before[positions] < offer.created_at.timestamp()]
+            for position in positions.tolist():
+                digests[position].append(offer)
+        return digests
+
+
+def load_index():
+    """Compile les alertes actives (deux requêtes, quel que soit leur nombre)"""
+    from .models import JobAlert
+
+    alerts = list(
+        JobAlert.objects.filter(is_active=True)
+        .order_by("pk")
+        .values("id", "email", "keywords", "job_types", "locations", "last_sent", "created_at")
+    )
+    alert_categories = defaultdict(list)
+    for alert_id, category_id in JobAlert.categories.through.objects.filter(
+        jobalert__is_active=True
+    ).values_list("jobalert_id", "jobcategory_id"):
+        alert_categories[alert_id].append(category_id)
+    return AlertIndex(alerts, alert_categories)
+
+
+def digest_message(alert, offers, connection):
+    lines = [
+        f"- {offer.title} ({offer.job_type}, {offer.location})\n  {settings.FRONTEND_URL}/carriere"
+        for offer in offers
+    ]
+    body = (
+        "Bonjour,\n\n"
+        f"{len(offers)} nouvelle(s) offre(s) correspondent à votre alerte emploi :\n\n"
+        + "\n".join(lines)
+        + "\n\nCordialement,\nL'équipe Segus Engineering"
+    )
+    return EmailMessage(
+        subject=f"Alerte emploi : {len(offers)} nouvelle(s) offre(s)",
+        body=body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[alert["email"]],
+        connection=connection,
+    )
+
+
+def send_job_alerts(batch_size=500, dry_run=False, now=None):
+    """
+    Évalue toutes les alertes actives contre les offres publiées depuis leur
+    dernier envoi et expédie un digest par abonné sur une connexion SMTP
+    partagée. `last_sent` est mis à jour après chaque lot envoyé : en cas
+    d'erreur, les lots restants seront repris au prochain passage.
+    Retourne (alertes évaluées, digests).
+    """
+    from .models import JobAlert, JobOffer
+
+    now = now or timezone.now()
+    index = load_index()
+    if not index.alerts:
+        return 0, 0
+
+    oldest = min(alert["last_sent"] or alert["created_at"] for alert in index.alerts)
+    offers = (
+        JobOffer.objects.filter(is_active=True, created_at__gt=oldest, created_at__lte=now)
+        .only("pk", "title", "category_id", "job_type", "location", "skills", "created_at")
+        .order_by("-created_at")
+    )
+    digests = index.matches(offers.iterator(chunk_size=500))
+    if dry_run:
+        return len(index.alerts), len(digests)
+
+    positions = sorted(digests)
+    connection = get_connection()
+    connection.open()
+    try:
+        for start in range(0, len(positions), batch_size):
+            batch = positions[start : start + batch_size]
+            alerts = [index.alerts[position] for position in batch]
+            connection.send_messages(
+                [
+                    digest_message(alert, digests[position], connection)
+                    for alert, position in zip(alerts, batch)
+                ]
+            )
+            JobAlert.objects.filter(pk__in=[alert["id"] for alert in alerts]).update(last_sent=now)
+    finally:
+        connection.close()
+    return len(index.alerts), len(digests)
@@ -0,0 +1,197 @@
+"""
+Statistiques de recrutement en un nombre borné de requêtes.
+
+- compteurs d'offres et de candidatures : un agrégat conditionnel chacun ;
+- série temporelle des candidatures : période tronquée (jour ou semaine),
+  effectif et cumul calculés par fonctions de fenêtre ;
+- entonnoir par offre : comptages conditionnels en fenêtre partitionnée par
+  offre, part de chaque offre rapportée à une fenêtre sur l'ensemble ;
+- délai médian avant premier examen : premier changement de statut depuis
+  « new » (ApplicationStatusHistory), médiane par ROW_NUMBER / COUNT en fenêtre.
+
+Le résultat est mis en cache JOBS_ANALYTICS_CACHE_TIMEOUT secondes.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import (
+    Count,
+    DurationField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    Subquery,
+    Window,
+)
+from django.db.models.functions import Cast, RowNumber, TruncDay, TruncWeek
+from django.utils import timezone
+
+from .models import ApplicationStatusHistory, JobApplication, JobOffer
+
+INTERVALS = {"day": TruncDay, "week": TruncWeek}
+# Étapes atteintes (statut courant) : une candidature en entretien a été examinée
+REVIEWED_STATUSES = ("reviewed", "interview", "test", "accepted", "rejected")
+INTERVIEW_STATUSES = ("interview", "test", "accepted")
+
+
+def offer_counts():
+    """Compteurs des offres (une requête)"""
+    counts = JobOffer.objects.aggregate(
+        total_offers=Count("pk"),
+        active_offers=Count("pk", filter=Q(is_active=True)),
+        featured_offers=Count("pk", filter=Q(is_featured=True, is_active=True)),
+    )
+    counts["inactive_offers"] = counts["total_offers"] - counts["active_offers"]
+    return counts
+
+
+def application_counts(now=None):
+    """Compteurs des candidatures par statut, type et période récente (une requête)"""
+    now = now or timezone.now()
+    this_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    this_week = now - timedelta(days=now.weekday())
+    statuses = {
+        f"{value}_applications": Count("pk", filter=Q(status=value))
+        for value in ("new", "reviewed", "interview", "accepted", "rejected")
+    }
+    return JobApplication.objects.aggregate(
+        total_applications=Count("pk"),
+        spontaneous_applications=Count("pk", filter=Q(is_spontaneous=True)),
+        applications_this_month=Count("pk", filter=Q(applied_at__gte=this_month)),
+        applications_this_week=Count("pk", filter=Q(applied_at__gte=this_week)),
+        **statuses,
+    )
+
+
+def application_series(start, end, interval="day"):
+    """Candidatures par période [start, end) avec cumul (une requête)"""
+    period = INTERVALS[interval]("applied_at")
+    # Fenêtres partitionnée (effectif de la période) et cumulative (RANGE jusqu'à la période)
+    rows = (
+        JobApplication.objects.filter(applied_at__gte=start, applied_at__lt=end)
+        .annotate(period=period)
+        .annotate(
+            count=Window(Count("pk"), partition_by=F("period")),
+            cumulative=Window(Count("pk"), order_by=F("period").asc()),
+        )
+        .values("period", "count", "cumulative")
+        .distinct()
+        .order_by("period")
+    )
+    return [
+        {"period": row["period"].date(), "count": row["count"], "cumulative": row["cumulative"]}
+        for row in rows
+    ]
+
+
+def offer_funnel(start, end, limit=20):
+    """Entonnoir new → examinée → entretien → acceptée / rejetée par offre (une requête)"""
+    reached_interview = Exists(
+        ApplicationStatusHistory.objects.filter(
+            application=OuterRef("pk"), new_status__in=INTERVIEW_STATUSES
+        )
+    )
+    by_offer = F("job_offer")
+    rows = (
+        JobApplication.objects.filter(
+            job_offer__isnull=False, applied_at__gte=start, applied_at__lt=end
+        )
+        .annotate(
+            received=Window(Count("pk"), partition_by=by_offer),
+            new=Window(Count("pk", filter=Q(status="new")), partition_by=by_offer),
+            reviewed=Window(
+                Count("pk", filter=Q(status__in=REVIEWED_STATUSES)), partition_by=by_offer
+            ),
+            interview=Window(
+                Count("pk", filter=Q(status__in=INTERVIEW_STATUSES) | Q(reached_interview)),
+                partition_by=by_offer,
+            ),
+            accepted=Window(Count("pk", filter=Q(status="accepted")), partition_by=by_offer),
+            rejected=Window(Count("pk", filter=Q(status="rejected")), partition_by=by_offer),
+            share=Cast(Window(Count("pk"), partition_by=by_offer), FloatField())
+            / Window(Count("pk")),
+        )
+        .values(
+            "job_offer",
+            "job_offer__title",
+            "received",
+            "new",
+            "reviewed",
+            "interview",
+            "accepted",
+            "rejected",
+            "share",
+        )
+        .distinct()
+        .order_by("-received", "job_offer")[:limit]
+    )
+    return [
+        {
+            "offer_id": row["job_offer"],
+            "title": row["job_offer__title"],
+            "received": row["received"],
+            "new": row["new"],
+            "reviewed": row["reviewed"],
+            "interview": row["interview"],
+            "accepted": row["accepted"],
+            "rejected": row["rejected"],
+            "share": round(row["share"], 4),
+        }
+        for row in rows
+    ]
+
+
+def median_time_to_review(start, end):
+    """Délai médian (secondes) entre la candidature et son premier changement de statut"""
+    first_review = Subquery(
+        ApplicationStatusHistory.objects.filter(application=OuterRef("pk"), old_status="new")
+        .order_by("changed_at")
+        .values("changed_at")[:1]
+    )
+    # Rang de chaque délai et effectif total en fenêtre : seules la ou les
+    # deux valeurs centrales sortent de la base
+    rows = (
+        JobApplication.objects.filter(applied_at__gte=start, applied_at__lt=end)
+        .annotate(first_review=first_review)
+        .filter(first_review__isnull=False)
+        .annotate(
+            delay=ExpressionWrapper(
+                F("first_review") - F("applied_at"), output_field=DurationField()
+            )
+        )
+        .annotate(
+            position=Window(RowNumber(), order_by=F("delay").asc()),
+            total=Window(Count("pk")),
+        )
+        .filter(Q(position=(F("total") + 1) / 2) | Q(position=(F("total") + 2) / 2))
+        .order_by()
+        .values_list("delay", "total")
+    )
+    rows = list(rows)
+    delays = [delay.total_seconds() for delay, _total in rows]
+    return {
+        "median_seconds": round(sum(delays) / len(delays)) if delays else None,
+        "reviewed": rows[0][1] if rows else 0,
+    }
+
+
+def recruitment_analytics(start, end, interval="day", now=None):
+    """Tableau de bord recrutement complet, mis en cache peu de temps"""
+    key = f"jobs:analytics:{interval}:{start.isoformat()}:{end.isoformat()}"
+    data = cache.get(key)
+    if data is None:
+        data = {
+            "window": {"start": start, "end": end, "interval": interval},
+            "offers": offer_counts(),
+            "applications": application_counts(now),
+            "series": application_series(start, end, interval),
+            "funnel": offer_funnel(start, end),
+            "time_to_review": median_time_to_review(start, end),
+        }
+        cache.set(key, data, timeout=getattr(settings, "JOBS_ANALYTICS_CACHE_TIMEOUT", 60))
+    return data
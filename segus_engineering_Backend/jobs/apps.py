@@ -5,3 +5,6 @@ class JobsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "jobs"
     verbose_name = "Gestion des Emplois"
+
+    def ready(self):
+        from . import signals  # noqa: F401
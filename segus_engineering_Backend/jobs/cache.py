@@ -0,0 +1,102 @@
+"""Cache HTTP des endpoints publics carrières.
+
+Chaque modèle publié (offres, catégories) a un numéro de version conservé dans
+le cache : l'horodatage en millisecondes de sa dernière écriture, avancé par
+``jobs.signals``. Les versions des modèles dont dépend une réponse forment son
+ETag et son Last-Modified : une requête conditionnelle à jour reçoit un
+``304 Not Modified`` sans requête SQL ni sérialisation. Les réponses anonymes
+sont en outre conservées ``JOBS_CAREERS_CACHE_TIMEOUT`` secondes sous une clé
+qui inclut ces versions ; une écriture les rend donc caduques d'elles-mêmes.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+def _version_key(model):
+    return f"jobs:careers:version:{model}"
+
+
+def bump_version(*models):
+    """Avancer la version des modèles donnés ('joboffer', 'jobcategory')"""
+    now = int(time.time() * 1000)
+    current = cache.get_many([_version_key(model) for model in models])
+    cache.set_many(
+        {
+            _version_key(model): max(now, current.get(_version_key(model), 0) + 1)
+            for model in models
+        },
+        timeout=None,
+    )
+
+
+def invalidate(*models):
+    """
+    Avancer la version tout de suite puis à la validation de la transaction :
+    une lecture concurrente faite avant le commit ne reste pas en cache sous
+    la nouvelle version.
+    """
+    bump_version(*models)
+    transaction.on_commit(lambda: bump_version(*models))
+
+
+def get_versions(models):
+    """Versions courantes ; une version absente (cache vidé) repart de maintenant"""
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        now = int(time.time() * 1000)
+        for key in missing:
+            cache.add(key, now, timeout=None)
+        versions.update(cache.get_many(missing))
+    return [versions[key] for key in keys]
+
+
+def careers_cache(*models):
+    """
+    Décorateur des actions GET publiques : ETag / Last-Modified tirés des
+    versions de `models`, 304 si le client est à jour, données des réponses
+    anonymes mises en cache.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            versions = get_versions(models)
+            # Le personnel voit aussi les offres inactives : représentation distincte
+            audience = "staff" if request.user.is_staff else "public"
+            etag = f'"{audience}-{"-".join(map(str, versions))}"'
+            last_modified = max(versions) // 1000
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                key = None
+                if request.user.is_anonymous:
+                    target = hashlib.sha1(request.get_full_path().encode()).hexdigest()
+                    key = f"jobs:careers:response:{target}:{etag}"
+                    data = cache.get(key)
+                    response = Response(data) if data is not None else None
+                if response is None:
+                    response = method(self, request, *args, **kwargs)
+                    if key is not None and response.status_code == 200:
+                        timeout = getattr(settings, "JOBS_CAREERS_CACHE_TIMEOUT", 300)
+                        cache.set(key, response.data, timeout=timeout)
+
+            if response.status_code in (200, 304):
+                response["ETag"] = etag
+                response["Last-Modified"] = http_date(last_modified)
+                patch_vary_headers(response, ["Authorization"])
+            return response
+
+        return wrapper
+
+    return decorator
@@ -2,6 +2,7 @@ import django_filters
 from django.db.models import Q
 
 from .models import JobApplication, JobCategory, JobOffer
+from .search import analyze, rank_offers
 
 
 class JobOfferFilter(django_filters.FilterSet):
@@ -17,11 +18,16 @@ class JobOfferFilter(django_filters.FilterSet):
         fields = ["category", "job_type", "location", "is_active", "is_featured"]
 
     def filter_search(self, queryset, name, value):
-        return queryset.filter(
-            Q(title__icontains=value)
-            | Q(description__icontains=value)
-            | Q(location__icontains=value)
-        )
+        # Index plein texte (titre, description, compétences, exigences) + lieu,
+        # sans la limite de pertinence de la recherche classée
+        if not analyze(value):
+            return queryset.filter(
+                Q(title__icontains=value)
+                | Q(description__icontains=value)
+                | Q(location__icontains=value)
+            )
+        ids = [offer_id for offer_id, _score in rank_offers(value, limit=None)]
+        return queryset.filter(Q(pk__in=ids) | Q(location__icontains=value))
 
 
 class JobApplicationFilter(django_filters.FilterSet):
@@ -29,7 +35,18 @@ class JobApplicationFilter(django_filters.FilterSet):
     is_spontaneous = django_filters.BooleanFilter()
     job_offer = django_filters.ModelChoiceFilter(queryset=JobOffer.objects.all())
     applied_date = django_filters.DateFromToRangeFilter(field_name="applied_at")
+    search = django_filters.CharFilter(method="filter_search")
 
     class Meta:
         model = JobApplication
         fields = ["status", "is_spontaneous", "job_offer"]
+
+    def filter_search(self, queryset, name, value):
+        """Recherche sur le candidat, son poste et le texte extrait de son CV"""
+        return queryset.filter(
+            Q(first_name__icontains=value)
+            | Q(last_name__icontains=value)
+            | Q(email__icontains=value)
+            | Q(current_position__icontains=value)
+            | Q(cv_text__icontains=value)
+        )
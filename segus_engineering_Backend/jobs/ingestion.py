@@ -0,0 +1,238 @@
+"""
+Réception et exploitation des CV.
+
+- `ContentHashUploadHandler` calcule le SHA-256 du fichier pendant que Django
+  le reçoit par morceaux (aucune relecture) ;
+- `store_cv` range le fichier sous un nom dérivé de ce hash : un CV identique
+  déjà reçu est réutilisé tel quel, sans nouvelle écriture ;
+- l'extraction du texte (PDF/DOCX, en Python pur) est confiée après commit à
+  un pool de threads (JOBS_CV_WORKERS, 0 = exécution immédiate) ; le texte
+  est stocké dans JobApplication.cv_text pour la recherche et le matching.
+"""
+
+import hashlib
+import html
+import logging
+import re
+import threading
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CV_DIRECTORY = "applications/cvs"
+MAX_CV_BYTES = 5 * 1024 * 1024
+# Bornes de l'extraction (fichiers venus du formulaire public) : texte retenu,
+# et octets décompressés au total (flux PDF, XML du DOCX) contre les bombes zip
+MAX_TEXT_BYTES = 256 * 1024
+MAX_INFLATED_BYTES = 16 * 1024 * 1024
+
+_PDF_STREAM = re.compile(rb"stream\r?\n(.*?)\r?\nendstream", re.DOTALL)
+_PDF_STRING = re.compile(rb"\(((?:\\.|[^\\)])*)\)")
+_PDF_ESCAPE = re.compile(rb"\\([nrtbf()\\]|[0-7]{1,3})")
+_PDF_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"", b"f": b""}
+_XML_TAG = re.compile(r"<[^>]+>")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ContentHashUploadHandler(FileUploadHandler):
+    """Calcule le SHA-256 de chaque fichier reçu, morceau par morceau, sans le stocker"""
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.digests = {}
+        self.hash = None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hash = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hash.update(raw_data)
+        # Les morceaux sont transmis au gestionnaire suivant qui, lui, les stocke
+        return raw_data
+
+    def file_complete(self, file_size):
+        self.digests[self.field_name] = self.hash.hexdigest()
+        return None
+
+
+def content_hash(file):
+    """SHA-256 d'un fichier lu par morceaux"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def store_cv(uploaded, digest=None):
+    """
+    Stocke un CV sous applications/cvs/<hash[:2]>/<hash>.<ext> et retourne
+    (nom, hash). Un contenu identique déjà stocké est réutilisé sans écriture.
+    """
+    from .models import JobApplication
+
+    storage = JobApplication._meta.get_field("cv_file").storage
+    digest = digest or content_hash(uploaded)
+    name = f"{CV_DIRECTORY}/{digest[:2]}/{digest}{Path(uploaded.name).suffix.lower()}"
+    if not storage.exists(name):
+        # FileSystemStorage déplace le fichier temporaire des gros envois au lieu de le copier
+        name = storage.save(name, uploaded)
+    return name, digest
+
+
+def _pdf_unescape(match):
+    code = match.group(1)
+    if code[:1].isdigit():
+        return bytes([int(code, 8) & 0xFF])
+    return _PDF_ESCAPES.get(code, code)
+
+
+def _pdf_text(content):
+    # Flux de contenu (compressés FlateDecode ou non) : chaînes des opérateurs Tj / TJ
+    chunks = []
+    size = 0
+    budget = MAX_INFLATED_BYTES
+    for stream in _PDF_STREAM.findall(content):
+        if size >= MAX_TEXT_BYTES or budget <= 0:
+            break
+        try:
+            # Sortie bornée : un flux de quelques Ko ne peut pas occuper des Go
+            stream = zlib.decompressobj().decompress(stream, budget)
+            budget -= len(stream)
+        except zlib.error:
+            pass
+        if b"Tj" not in stream and b"TJ" not in stream:
+            continue
+        for raw in _PDF_STRING.findall(stream):
+            chunk = _PDF_ESCAPE.sub(_pdf_unescape, raw)
+            chunks.append(chunk.decode("latin-1"))
+            size += len(chunk) + 1
+            if size >= MAX_TEXT_BYTES:
+                break
+    return " ".join(chunks)[:MAX_TEXT_BYTES]
+
+
+def _docx_text(file):
+    with zipfile.ZipFile(file) as archive:
+        info = archive.getinfo("word/document.xml")
+        if info.file_size > MAX_INFLATED_BYTES:
+            logger.warning("document.xml de %s octets : extraction tronquée", info.file_size)
+        # La taille annoncée peut mentir : la lecture elle-même est bornée
+        with archive.open(info) as document:
+            xml = document.read(MAX_INFLATED_BYTES).decode("utf-8", "ignore")
+    text = html.unescape(_XML_TAG.sub(" ", xml.replace("</w:p>", "\n")))
+    return text[:MAX_TEXT_BYTES]
+
+
+def extract_cv_text(field_file):
+    """Texte brut d'un CV PDF ou DOCX (meilleur effort, chaîne vide sinon)"""
+    if not field_file:
+        return ""
+    extension = Path(field_file.name).suffix.lower()
+    try:
+        field_file.open("rb")
+        try:
+            if extension == ".pdf":
+                return _pdf_text(field_file.read(MAX_CV_BYTES))
+            if extension == ".docx":
+                return _docx_text(field_file)
+        finally:
+            field_file.close()
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as exc:
+        logger.warning("Extraction du CV %s impossible: %s", field_file.name, exc)
+    return ""
+
+
+def extract_application_cv(application_id):
+    """
+    Extrait et stocke le texte du CV d'une candidature, puis met à jour son
+    vecteur de compétences. Un CV déjà extrait pour le même hash est recopié ;
+    le hash des CV reçus hors API (admin, anciens envois) est calculé ici.
+    """
+    from .matching import index_application_skills
+    from .models import JobApplication
+
+    application = JobApplication.objects.filter(pk=application_id).first()
+    if application is None or not application.cv_file:
+        return False
+
+    if not application.cv_sha256:
+        try:
+            with application.cv_file.open("rb") as cv_file:
+                application.cv_sha256 = content_hash(cv_file)
+        except OSError as exc:
+            logger.warning("CV %s illisible: %s", application.cv_file.name, exc)
+
+    text = None
+    if application.cv_sha256:
+        text = (
+            JobApplication.objects.filter(
+                cv_sha256=application.cv_sha256, cv_extracted_at__isnull=False
+            )
+            .exclude(pk=application.pk)
+            .values_list("cv_text", flat=True)
+            .first()
+        )
+    if text is None:
+        text = extract_cv_text(application.cv_file)
+
+    application.cv_text = text
+    application.cv_extracted_at = timezone.now()
+    JobApplication.objects.filter(pk=application.pk).update(
+        cv_sha256=application.cv_sha256,
+        cv_text=text,
+        cv_extracted_at=application.cv_extracted_at,
+    )
+    index_application_skills(application)
+    return True
+
+
+def _run_extraction(application_id):
+    close_old_connections()
+    try:
+        extract_application_cv(application_id)
+    except Exception:
+        logger.exception("Extraction du CV de la candidature %s échouée", application_id)
+    finally:
+        close_old_connections()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.JOBS_CV_WORKERS, thread_name_prefix="cv-extraction"
+            )
+        return _executor
+
+
+def schedule_cv_extraction(application_id):
+    """Programme l'extraction du CV une fois la transaction validée"""
+
+    def run():
+        if settings.JOBS_CV_WORKERS > 0:
+            get_executor().submit(_run_extraction, application_id)
+        else:
+            extract_application_cv(application_id)
+
+    transaction.on_commit(run)
+
+
+def ingest_existing_cvs():
+    """Hash et texte des CV pas encore traités (exécution immédiate)"""
+    from .models import JobApplication
+
+    pending = JobApplication.objects.filter(cv_extracted_at__isnull=True).exclude(cv_file="")
+    return sum(extract_application_cv(pk) for pk in pending.values_list("pk", flat=True).iterator())
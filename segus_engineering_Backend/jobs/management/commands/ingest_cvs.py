@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from jobs.ingestion import ingest_existing_cvs
+
+
+class Command(BaseCommand):
+    help = "Calcule l'empreinte et extrait le texte des CV pas encore traités"
+
+    def handle(self, *args, **options):
+        count = ingest_existing_cvs()
+        self.stdout.write(self.style.SUCCESS(f"CV traités: {count}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from jobs.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche plein texte des offres d'emploi"
+
+    def handle(self, *args, **options):
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Index de recherche reconstruit: {count} offre(s)"))
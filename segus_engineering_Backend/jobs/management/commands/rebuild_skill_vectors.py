@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from jobs.matching import rebuild_skill_vectors
+
+
+class Command(BaseCommand):
+    help = "Recalcule les vecteurs de compétences (offres et candidatures, CV compris)"
+
+    def handle(self, *args, **options):
+        offers, applications = rebuild_skill_vectors()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Vecteurs recalculés: {offers} offre(s), {applications} candidature(s)"
+            )
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from jobs.alerts import send_job_alerts
+
+
+class Command(BaseCommand):
+    help = "Envoie les digests des alertes emploi (offres publiées depuis le dernier envoi)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Emails envoyés par lot (défaut : 500)"
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Évaluer les alertes sans envoyer d'email"
+        )
+
+    def handle(self, *args, **options):
+        alerts, digests = send_job_alerts(
+            batch_size=max(options["batch_size"], 1), dry_run=options["dry_run"]
+        )
+        verb = "à envoyer" if options["dry_run"] else "envoyé(s)"
+        self.stdout.write(
+            self.style.SUCCESS(f"{alerts} alerte(s) évaluée(s), {digests} digest(s) {verb}")
+        )
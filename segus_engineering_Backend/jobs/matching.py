@@ -0,0 +1,201 @@
+"""
+Rapprochement candidats / offres par similarité cosinus TF-IDF.
+
+Chaque offre (compétences, exigences) et chaque candidature (poste actuel,
+formation, texte du CV extrait par jobs.ingestion) est réduite à un vecteur
+creux : termes normalisés par `jobs.search.analyze`, hachés sur DIMENSIONS
+colonnes, poids TF sous-linéaire.
+Les vecteurs sont stockés dans SkillVector sous forme de blobs uint32 / float32.
+
+Au moment du calcul, tous les vecteurs sont chargés une fois dans une matrice
+CSR NumPy (indptr, indices, data) pondérée IDF et normalisée, mise en cache
+dans le processus et reconstruite seulement si la table a changé. Le score
+d'une requête contre toutes les lignes est un produit creux vectorisé suivi
+d'un argpartition pour les K meilleurs.
+"""
+
+import hashlib
+import threading
+import zlib
+from collections import Counter
+
+import numpy as np
+from django.db.models import Count, Max
+
+from .search import analyze
+
+DIMENSIONS = 1 << 18
+
+_cache_lock = threading.Lock()
+_cache = {"version": None, "matrix": None}
+
+
+def term_frequencies(*texts):
+    """Indices hachés triés (uint32) et poids TF sous-linéaires (float32)"""
+    counts = Counter(
+        zlib.crc32(term.encode()) % DIMENSIONS for text in texts for term in analyze(text)
+    )
+    indices = np.fromiter(sorted(counts), dtype=np.uint32, count=len(counts))
+    weights = 1.0 + np.log(
+        np.array([counts[index] for index in indices.tolist()], dtype=np.float32)
+    )
+    return indices, weights.astype(np.float32)
+
+
+def offer_texts(offer):
+    return [offer.skills or [], offer.requirements or []]
+
+
+def application_signature(application):
+    """Empreinte des champs source : le vecteur n'est recalculé que s'ils changent"""
+    source = "\x1f".join([application.current_position, application.education, application.cv_text])
+    return hashlib.sha1(source.encode()).hexdigest()
+
+
+def index_offer_skills(offer):
+    """Crée ou met à jour le vecteur de compétences d'une offre"""
+    from .models import SkillVector
+
+    indices, weights = term_frequencies(*offer_texts(offer))
+    SkillVector.objects.update_or_create(
+        offer=offer, defaults={"terms": indices.tobytes(), "weights": weights.tobytes()}
+    )
+
+
+def index_application_skills(application, force=False):
+    """Crée ou met à jour le vecteur d'une candidature (texte du CV déjà extrait)"""
+    from .models import SkillVector
+
+    signature = application_signature(application)
+    if (
+        not force
+        and SkillVector.objects.filter(application=application, signature=signature).exists()
+    ):
+        return False
+    indices, weights = term_frequencies(
+        application.current_position,
+        application.education,
+        application.cv_text,
+    )
+    SkillVector.objects.update_or_create(
+        application=application,
+        defaults={"terms": indices.tobytes(), "weights": weights.tobytes(), "signature": signature},
+    )
+    return True
+
+
+class SkillMatrix:
+    """Matrice CSR TF-IDF normalisée de tous les vecteurs (offres et candidatures)"""
+
+    def __init__(self, rows):
+        offer_ids, application_ids, chunks, lengths = [], [], [], []
+        for offer_id, application_id, terms, weights in rows:
+            indices = np.frombuffer(terms, dtype=np.uint32)
+            if not len(indices):
+                continue
+            offer_ids.append(offer_id or 0)
+            application_ids.append(application_id or 0)
+            chunks.append((indices, np.frombuffer(weights, dtype=np.float32)))
+            lengths.append(len(indices))
+
+        self.offer_ids = np.array(offer_ids, dtype=np.int64)
+        self.application_ids = np.array(application_ids, dtype=np.int64)
+        self.indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.indptr[1:])
+        if chunks:
+            self.indices = np.concatenate([indices for indices, _weights in chunks])
+            data = np.concatenate([weights for _indices, weights in chunks])
+        else:
+            self.indices = np.zeros(0, dtype=np.uint32)
+            data = np.zeros(0, dtype=np.float32)
+
+        # IDF lissé calculé sur l'ensemble des documents, puis normalisation L2 par ligne
+        document_frequency = np.bincount(self.indices, minlength=DIMENSIONS)
+        self.idf = (np.log((1 + len(lengths)) / (1 + document_frequency)) + 1).astype(np.float32)
+        data = data * self.idf[self.indices]
+        self.data = data / np.repeat(self.row_norms(data), lengths)
+
+    def row_norms(self, data):
+        if not len(data):
+            return np.zeros(0, dtype=np.float32)
+        norms = np.sqrt(np.add.reduceat(data * data, self.indptr[:-1]))
+        norms[norms == 0] = 1
+        return norms
+
+    def scores(self, dense):
+        """Similarité cosinus de chaque ligne avec un vecteur dense normalisé"""
+        if not len(self.data):
+            return np.zeros(len(self.offer_ids), dtype=np.float32)
+        return np.add.reduceat(self.data * dense[self.indices], self.indptr[:-1])
+
+    def row(self, mask):
+        """Vecteur dense normalisé de la première ligne sélectionnée par `mask`"""
+        position = np.flatnonzero(mask)
+        if not len(position):
+            return None
+        start, end = self.indptr[position[0]], self.indptr[position[0] + 1]
+        dense = np.zeros(DIMENSIONS, dtype=np.float32)
+        dense[self.indices[start:end]] = self.data[start:end]
+        return dense
+
+    def top(self, dense, mask, ids, limit):
+        """K meilleures lignes de `mask` : [(id, score), ...] par score décroissant"""
+        scores = self.scores(dense)
+        candidates = np.flatnonzero(mask & (scores > 0))
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.lexsort((ids[candidates], -scores[candidates]))]
+        return [(int(ids[index]), round(float(scores[index]), 4)) for index in candidates]
+
+
+def skill_matrix():
+    """Matrice en cache, reconstruite si des vecteurs ont été ajoutés, modifiés ou supprimés"""
+    from .models import SkillVector
+
+    state = SkillVector.objects.aggregate(count=Count("pk"), changed=Max("updated_at"))
+    version = (state["count"], state["changed"])
+    with _cache_lock:
+        if _cache["version"] != version:
+            rows = SkillVector.objects.values_list(
+                "offer_id", "application_id", "terms", "weights"
+            ).iterator(chunk_size=2000)
+            _cache["matrix"] = SkillMatrix(rows)
+            _cache["version"] = version
+        return _cache["matrix"]
+
+
+def top_candidates(offer, limit=20):
+    """[(application_id, score), ...] des candidatures les plus proches d'une offre"""
+    matrix = skill_matrix()
+    dense = matrix.row(matrix.offer_ids == offer.pk)
+    if dense is None:
+        return []
+    return matrix.top(dense, matrix.application_ids > 0, matrix.application_ids, limit)
+
+
+def top_offers(application, limit=10, offer_ids=None):
+    """[(offer_id, score), ...] des offres les plus proches d'une candidature"""
+    matrix = skill_matrix()
+    dense = matrix.row(matrix.application_ids == application.pk)
+    if dense is None:
+        return []
+    mask = matrix.offer_ids > 0
+    if offer_ids is not None:
+        mask &= np.isin(matrix.offer_ids, list(offer_ids))
+    return matrix.top(dense, mask, matrix.offer_ids, limit)
+
+
+def rebuild_skill_vectors():
+    """Recalcule les vecteurs de toutes les offres et candidatures"""
+    from .models import JobApplication, JobOffer
+
+    offers = applications = 0
+    for offer in JobOffer.objects.only("pk", "skills", "requirements").iterator(chunk_size=500):
+        index_offer_skills(offer)
+        offers += 1
+    for application in JobApplication.objects.only(
+        "pk", "current_position", "education", "cv_text"
+    ).iterator(chunk_size=500):
+        index_application_skills(application, force=True)
+        applications += 1
+    return offers, applications
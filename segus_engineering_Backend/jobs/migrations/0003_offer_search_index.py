@@ -0,0 +1,108 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FTS_COLUMNS = "title, description, skills, requirements"
+NEW_VALUES = "new.title, new.description, new.skills, new.requirements"
+OLD_VALUES = "old.title, old.description, old.skills, old.requirements"
+
+# Index FTS5 à contenu externe, synchronisé par triggers sur la table des documents
+SQLITE_FTS = [
+    f"""
+    CREATE VIRTUAL TABLE job_offer_fts USING fts5(
+        {FTS_COLUMNS},
+        content='job_offer_search_documents',
+        content_rowid='offer_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER job_offer_fts_insert AFTER INSERT ON job_offer_search_documents BEGIN
+        INSERT INTO job_offer_fts(rowid, {FTS_COLUMNS}) VALUES (new.offer_id, {NEW_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER job_offer_fts_delete AFTER DELETE ON job_offer_search_documents BEGIN
+        INSERT INTO job_offer_fts(job_offer_fts, rowid, {FTS_COLUMNS})
+        VALUES ('delete', old.offer_id, {OLD_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER job_offer_fts_update AFTER UPDATE ON job_offer_search_documents BEGIN
+        INSERT INTO job_offer_fts(job_offer_fts, rowid, {FTS_COLUMNS})
+        VALUES ('delete', old.offer_id, {OLD_VALUES});
+        INSERT INTO job_offer_fts(rowid, {FTS_COLUMNS}) VALUES (new.offer_id, {NEW_VALUES});
+    END
+    """,
+]
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS job_offer_fts_insert",
+    "DROP TRIGGER IF EXISTS job_offer_fts_delete",
+    "DROP TRIGGER IF EXISTS job_offer_fts_update",
+    "DROP TABLE IF EXISTS job_offer_fts",
+]
+
+
+def create_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in SQLITE_FTS:
+            schema_editor.execute(statement)
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in SQLITE_FTS_DROP:
+            schema_editor.execute(statement)
+
+
+def index_existing_offers(apps, schema_editor):
+    from jobs.search import document_values
+
+    JobOffer = apps.get_model("jobs", "JobOffer")
+    JobOfferSearchDocument = apps.get_model("jobs", "JobOfferSearchDocument")
+    JobOfferSearchDocument.objects.bulk_create(
+        [
+            JobOfferSearchDocument(offer_id=offer.pk, **document_values(offer))
+            for offer in JobOffer.objects.all().iterator(chunk_size=500)
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (
+            "jobs",
+            "0002_rename_job_applica_status_5e2f3b_idx_job_applica_status_4768a2_idx_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobOfferSearchDocument",
+            fields=[
+                (
+                    "offer",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_document",
+                        serialize=False,
+                        to="jobs.joboffer",
+                    ),
+                ),
+                ("title", models.TextField(blank=True)),
+                ("description", models.TextField(blank=True)),
+                ("skills", models.TextField(blank=True)),
+                ("requirements", models.TextField(blank=True)),
+            ],
+            options={
+                "verbose_name": "Document de recherche",
+                "verbose_name_plural": "Documents de recherche",
+                "db_table": "job_offer_search_documents",
+            },
+        ),
+        migrations.RunPython(create_fts_index, drop_fts_index),
+        migrations.RunPython(index_existing_offers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0003_offer_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SkillVector",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("terms", models.BinaryField(verbose_name="Indices des termes (uint32)")),
+                ("weights", models.BinaryField(verbose_name="Poids TF (float32)")),
+                ("signature", models.CharField(blank=True, max_length=40)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "application",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="skill_vector",
+                        to="jobs.jobapplication",
+                    ),
+                ),
+                (
+                    "offer",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="skill_vector",
+                        to="jobs.joboffer",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Vecteur de compétences",
+                "verbose_name_plural": "Vecteurs de compétences",
+                "db_table": "job_skill_vectors",
+                "constraints": [
+                    models.CheckConstraint(
+                        condition=models.Q(
+                            models.Q(("application__isnull", True), ("offer__isnull", False)),
+                            models.Q(("application__isnull", False), ("offer__isnull", True)),
+                            _connector="OR",
+                        ),
+                        name="skill_vector_single_owner",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0004_skill_vectors"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobapplication",
+            name="cv_extracted_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Date d'extraction du CV"
+            ),
+        ),
+        migrations.AddField(
+            model_name="jobapplication",
+            name="cv_sha256",
+            field=models.CharField(
+                blank=True, max_length=64, verbose_name="Empreinte SHA-256 du CV"
+            ),
+        ),
+        migrations.AddField(
+            model_name="jobapplication",
+            name="cv_text",
+            field=models.TextField(blank=True, verbose_name="Texte extrait du CV"),
+        ),
+        migrations.AddIndex(
+            model_name="jobapplication",
+            index=models.Index(fields=["cv_sha256"], name="job_applica_cv_sha2_0fe768_idx"),
+        ),
+    ]
@@ -3,6 +3,29 @@ from django.core.validators import EmailValidator, RegexValidator
 from django.db import models
 from django.utils import timezone
 
+from segus_engineering_Backend.tracking import TrackedFieldsMixin
+
+
+class JobCategoryQuerySet(models.QuerySet):
+    def with_jobs_count(self):
+        """Annote le nombre d'offres actives par catégorie (une requête groupée)"""
+        return self.annotate(
+            active_jobs_total=models.Count(
+                "job_offers", filter=models.Q(job_offers__is_active=True)
+            )
+        )
+
+
+class JobOfferQuerySet(models.QuerySet):
+    def with_application_counts(self):
+        """Annote le nombre de candidatures (toutes et nouvelles) par offre"""
+        return self.annotate(
+            application_total=models.Count("job_applications"),
+            new_application_total=models.Count(
+                "job_applications", filter=models.Q(job_applications__status="new")
+            ),
+        )
+
 
 class JobCategory(models.Model):
     """Catégories d'emploi"""
@@ -14,6 +37,8 @@ class JobCategory(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = JobCategoryQuerySet.as_manager()
+
     class Meta:
         db_table = "job_categories"
         verbose_name = "Catégorie d'emploi"
@@ -81,6 +106,8 @@ class JobOffer(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = JobOfferQuerySet.as_manager()
+
     class Meta:
         db_table = "job_offers"
         verbose_name = "Offre d'emploi"
@@ -109,17 +136,43 @@ class JobOffer(models.Model):
     @property
     def applications_count(self):
         """Nombre de candidatures pour cette offre"""
+        if hasattr(self, "application_total"):
+            return self.application_total
         return self.job_applications.count()
 
     @property
     def new_applications_count(self):
         """Nombre de nouvelles candidatures"""
+        if hasattr(self, "new_application_total"):
+            return self.new_application_total
         return self.job_applications.filter(status="new").count()
 
 
-class JobApplication(models.Model):
+class JobOfferSearchDocument(models.Model):
+    """Termes normalisés d'une offre pour la recherche plein texte (voir jobs.search)"""
+
+    offer = models.OneToOneField(
+        JobOffer, on_delete=models.CASCADE, primary_key=True, related_name="search_document"
+    )
+    title = models.TextField(blank=True)
+    description = models.TextField(blank=True)
+    skills = models.TextField(blank=True)
+    requirements = models.TextField(blank=True)
+
+    class Meta:
+        db_table = "job_offer_search_documents"
+        verbose_name = "Document de recherche"
+        verbose_name_plural = "Documents de recherche"
+
+    def __str__(self):
+        return f"Index: {self.offer_id}"
+
+
+class JobApplication(TrackedFieldsMixin, models.Model):
     """Candidatures pour les offres d'emploi"""
 
+    tracked_fields = ("status", "current_position", "education")
+
     APPLICATION_STATUS = [
         ("new", "Nouvelle"),
         ("reviewed", "Examinée"),
@@ -159,6 +212,11 @@ class JobApplication(models.Model):
     # Candidature
     motivation_letter = models.TextField(verbose_name="Lettre de motivation")
     cv_file = models.FileField(upload_to="applications/cvs/", verbose_name="CV")
+    cv_sha256 = models.CharField(max_length=64, blank=True, verbose_name="Empreinte SHA-256 du CV")
+    cv_text = models.TextField(blank=True, verbose_name="Texte extrait du CV")
+    cv_extracted_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Date d'extraction du CV"
+    )
     portfolio_url = models.URLField(blank=True, verbose_name="Portfolio (URL)")
     linkedin_url = models.URLField(blank=True, verbose_name="LinkedIn (URL)")
 
@@ -200,6 +258,7 @@ class JobApplication(models.Model):
             models.Index(fields=["job_offer", "status"]),
             models.Index(fields=["is_spontaneous", "-applied_at"]),
             models.Index(fields=["email"]),
+            models.Index(fields=["cv_sha256"]),
         ]
 
     def __str__(self):
@@ -217,16 +276,51 @@ class JobApplication(models.Model):
         return self.job_offer.title if self.job_offer else "Candidature spontanée"
 
     def save(self, *args, **kwargs):
-        # Marquer comme examinée si le statut change
-        if self.pk:
-            old_instance = JobApplication.objects.get(pk=self.pk)
-            if old_instance.status != self.status and self.status != "new":
-                if not self.reviewed_at:
-                    self.reviewed_at = timezone.now()
+        # Marquer comme examinée si le statut change (comparé à la valeur chargée)
+        if self.pk and self.status != "new" and not self.reviewed_at and self.has_changed("status"):
+            self.reviewed_at = timezone.now()
 
         super().save(*args, **kwargs)
 
 
+class SkillVector(models.Model):
+    """
+    Vecteur creux (termes hachés, poids TF) d'une offre ou d'une candidature
+    pour le rapprochement candidats / offres (voir jobs.matching).
+    """
+
+    offer = models.OneToOneField(
+        JobOffer, on_delete=models.CASCADE, null=True, blank=True, related_name="skill_vector"
+    )
+    application = models.OneToOneField(
+        JobApplication,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="skill_vector",
+    )
+    terms = models.BinaryField(verbose_name="Indices des termes (uint32)")
+    weights = models.BinaryField(verbose_name="Poids TF (float32)")
+    signature = models.CharField(max_length=40, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "job_skill_vectors"
+        verbose_name = "Vecteur de compétences"
+        verbose_name_plural = "Vecteurs de compétences"
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(offer__isnull=False, application__isnull=True)
+                | models.Q(offer__isnull=True, application__isnull=False),
+                name="skill_vector_single_owner",
+            )
+        ]
+
+    def __str__(self):
+        owner = f"offre {self.offer_id}" if self.offer_id else f"candidature {self.application_id}"
+        return f"Vecteur: {owner}"
+
+
 class ApplicationStatusHistory(models.Model):
     """Historique des changements de statut des candidatures"""
 
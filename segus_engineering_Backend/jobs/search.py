@@ -0,0 +1,241 @@
+"""
+Recherche plein texte des offres d'emploi.
+
+Les textes (titre, description, compétences, exigences) sont normalisés par
+`analyze` : minuscules, suppression des accents, mots vides FR/EN retirés et
+racinisation légère. Les termes obtenus sont stockés dans JobOfferSearchDocument.
+
+- SQLite : index FTS5 `job_offer_fts` (contenu externe, maintenu par triggers),
+  classement BM25 pondéré par champ ;
+- PostgreSQL : tsvector calculé sur les documents, classement ts_rank_cd ;
+- autres moteurs : simple filtre sur les documents, sans pertinence.
+"""
+
+import html
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import connection
+from django.db.models import Count, Q
+
+FTS_TABLE = "job_offer_fts"
+DOCUMENT_TABLE = "job_offer_search_documents"
+DOCUMENT_FIELDS = ("title", "description", "skills", "requirements")
+# Poids BM25 par champ, dans l'ordre de DOCUMENT_FIELDS
+FIELD_WEIGHTS = (10.0, 1.0, 5.0, 2.0)
+MAX_MATCHES = 1000
+
+STOPWORDS = frozenset(
+    """
+    a au aux avec ce ces dans de des du elle en et il ils je la le les leur lui ma mais me
+    meme mes moi mon ne nos notre nous on ou par pas pour qu que qui sa se ses son sur ta te
+    tes toi ton tu un une vos votre vous c d j l m n s t y ete etre avoir sont est
+    an and are as at be by for from has have in is it its of on or that the this to was
+    will with you your we our
+    """.split()
+)
+
+# Suffixes flexionnels et dérivationnels courants (après suppression des accents)
+SUFFIXES = sorted(
+    """
+    issements issement ements ement ations ation atrices atrice ateurs ateur euses euse
+    eurs eur ites ite iques ique ismes isme istes iste ables able ances ance ences ence
+    ments ment ives ive ifs if eaux eau ees ee es er ers ings ing ed ies ness ly
+    """.split(),
+    key=len,
+    reverse=True,
+)
+_TOKEN = re.compile(r"[a-z0-9]+")
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def fold(text):
+    """Minuscules sans accents"""
+    normalized = unicodedata.normalize("NFKD", str(text or ""))
+    return "".join(char for char in normalized if not unicodedata.combining(char)).lower()
+
+
+def stem(token):
+    """Racinisation légère FR/EN : un suffixe retiré, puis le pluriel"""
+    if len(token) <= 3 or token.isdigit():
+        return token
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[: -len(suffix)]
+    if token[-1] in "sx":
+        return token[:-1]
+    return token
+
+
+def analyze(text):
+    """Termes indexables d'un texte (ou d'une liste de textes)"""
+    if isinstance(text, (list, tuple)):
+        text = " ".join(str(item) for item in text)
+    return [
+        stem(token)
+        for token in _TOKEN.findall(fold(text))
+        if token not in STOPWORDS and (len(token) > 1 or token.isdigit())
+    ]
+
+
+def document_values(offer):
+    """Colonnes du document d'indexation d'une offre"""
+    return {field: " ".join(analyze(getattr(offer, field))) for field in DOCUMENT_FIELDS}
+
+
+def index_offer(offer):
+    """Crée ou met à jour le document d'indexation d'une offre"""
+    from .models import JobOfferSearchDocument
+
+    JobOfferSearchDocument.objects.update_or_create(offer=offer, defaults=document_values(offer))
+
+
+def rebuild_index():
+    """Reconstruit tous les documents (et l'index FTS5 sous SQLite)"""
+    from .models import JobOffer, JobOfferSearchDocument
+
+    documents = [
+        JobOfferSearchDocument(offer=offer, **document_values(offer))
+        for offer in JobOffer.objects.only("pk", *DOCUMENT_FIELDS).iterator(chunk_size=500)
+    ]
+    JobOfferSearchDocument.objects.all().delete()
+    JobOfferSearchDocument.objects.bulk_create(documents, batch_size=500)
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return len(documents)
+
+
+def rank_offers(query, limit=MAX_MATCHES):
+    """
+    Identifiants des offres correspondant à `query` (tous les termes, en
+    préfixe), triés par pertinence décroissante : [(offer_id, score), ...].
+    Au plus `limit` résultats ; `limit=None` pour toutes les offres correspondantes.
+    """
+    terms = list(dict.fromkeys(analyze(query)))
+    if not terms:
+        return []
+    if connection.vendor == "sqlite":
+        return _rank_sqlite(terms, limit)
+    if connection.vendor == "postgresql":
+        return _rank_postgres(terms, limit)
+    return _rank_fallback(terms, limit)
+
+
+def _rank_sqlite(terms, limit):
+    match = " ".join(f'"{term}"*' for term in terms)
+    weights = ", ".join(str(weight) for weight in FIELD_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, -bm25({FTS_TABLE}, {weights}) AS score FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s ORDER BY score DESC LIMIT %s",
+            # LIMIT -1 : pas de limite sous SQLite
+            [match, -1 if limit is None else limit],
+        )
+        return cursor.fetchall()
+
+
+def _rank_postgres(terms, limit):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+    from .models import JobOfferSearchDocument
+
+    vector = (
+        SearchVector("title", weight="A", config="simple")
+        + SearchVector("skills", weight="B", config="simple")
+        + SearchVector("requirements", weight="C", config="simple")
+        + SearchVector("description", weight="D", config="simple")
+    )
+    search = SearchQuery(
+        " & ".join(f"{term}:*" for term in terms), search_type="raw", config="simple"
+    )
+    rows = (
+        JobOfferSearchDocument.objects.annotate(
+            score=SearchRank(vector, search, cover_density=True)
+        )
+        .filter(score__gt=0)
+        .order_by("-score")
+        .values_list("offer_id", "score")[:limit]
+    )
+    return list(rows)
+
+
+def _rank_fallback(terms, limit):
+    from .models import JobOfferSearchDocument
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(
+            *[Q(**{f"{field}__contains": term}) for field in DOCUMENT_FIELDS], _connector=Q.OR
+        )
+    ids = JobOfferSearchDocument.objects.filter(condition).values_list("offer_id", flat=True)
+    return [(offer_id, 0.0) for offer_id in ids[:limit]]
+
+
+def highlight(text, query, max_words=None, tag="mark"):
+    """
+    Texte échappé où les mots dont la racine correspond à un terme recherché
+    sont entourés de <mark>. `max_words` limite à un extrait centré sur la
+    première occurrence.
+    """
+    terms = set(analyze(query))
+    text = str(text or "")
+    words = list(_WORD.finditer(text))
+    hits = [
+        index
+        for index, word in enumerate(words)
+        if any(
+            stem(token).startswith(term)
+            for token in _TOKEN.findall(fold(word.group()))
+            for term in terms
+        )
+    ]
+
+    start, end = 0, len(text)
+    prefix = suffix = ""
+    if max_words and len(words) > max_words:
+        first = hits[0] if hits else 0
+        low = max(0, min(first - max_words // 3, len(words) - max_words))
+        high = low + max_words - 1
+        start, end = words[low].start(), words[high].end()
+        prefix = "… " if low else ""
+        suffix = " …" if high < len(words) - 1 else ""
+
+    parts = []
+    position = start
+    for index in hits:
+        word = words[index]
+        if word.start() < start or word.end() > end:
+            continue
+        parts.append(html.escape(text[position : word.start()]))
+        parts.append(f"<{tag}>{html.escape(word.group())}</{tag}>")
+        position = word.end()
+    parts.append(html.escape(text[position:end]))
+    return prefix + "".join(parts) + suffix
+
+
+def facet_counts(queryset):
+    """Nombre d'offres par catégorie, type de contrat et lieu"""
+    categories = (
+        queryset.order_by()
+        .values("category_id", "category__name")
+        .annotate(count=Count("pk"))
+        .order_by("-count", "category__name")
+    )
+    job_types = (
+        queryset.order_by().values("job_type").annotate(count=Count("pk")).order_by("-count")
+    )
+    locations = Counter()
+    for location, count in queryset.order_by().values_list("location").annotate(count=Count("pk")):
+        locations[location.strip()] += count
+    return {
+        "category": [
+            {"id": row["category_id"], "name": row["category__name"], "count": row["count"]}
+            for row in categories
+        ],
+        "job_type": [{"value": row["job_type"], "count": row["count"]} for row in job_types],
+        "location": [
+            {"value": location, "count": count} for location, count in locations.most_common()
+        ],
+    }
@@ -28,6 +28,8 @@ class JobCategorySerializer(serializers.ModelSerializer):
         read_only_fields = ["created_at"]
 
     def get_jobs_count(self, obj):
+        if hasattr(obj, "active_jobs_total"):
+            return obj.active_jobs_total
         return obj.job_offers.filter(is_active=True).count()
 
 
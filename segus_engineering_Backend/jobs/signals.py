@@ -0,0 +1,42 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate
+from .ingestion import schedule_cv_extraction
+from .matching import index_application_skills, index_offer_skills
+from .models import JobApplication, JobCategory, JobOffer
+from .search import index_offer
+
+
+@receiver(post_save, sender=JobOffer)
+def job_offer_saved(sender, instance, raw=False, **kwargs):
+    """Réindexe l'offre ; la suppression est propagée par la cascade du document"""
+    if not raw:
+        index_offer(instance)
+        index_offer_skills(instance)
+
+
+@receiver(post_save, sender=JobApplication)
+def job_application_saved(sender, instance, created=False, raw=False, **kwargs):
+    """Met à jour le vecteur de compétences ; le texte du CV est extrait en arrière-plan"""
+    if raw:
+        return
+    if created or instance.has_changed("current_position") or instance.has_changed("education"):
+        index_application_skills(instance)
+    if instance.cv_file and instance.cv_extracted_at is None:
+        schedule_cv_extraction(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=JobCategory)
+def job_category_changed(sender, raw=False, **kwargs):
+    """Invalide le cache HTTP des catégories"""
+    if not raw:
+        invalidate("jobcategory")
+
+
+@receiver([post_save, post_delete], sender=JobOffer)
+@receiver([post_save, post_delete], sender=JobApplication)
+def job_offer_changed(sender, raw=False, **kwargs):
+    """Invalide le cache HTTP des offres (les compteurs de candidatures y sont publiés)"""
+    if not raw:
+        invalidate("joboffer")
@@ -0,0 +1,947 @@
+import zipfile
+import zlib
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from jobs.alerts import AlertIndex
+from jobs.ingestion import extract_cv_text
+from jobs.matching import top_candidates
+from jobs.models import (
+    ApplicationStatusHistory,
+    JobAlert,
+    JobApplication,
+    JobCategory,
+    JobOffer,
+    JobOfferSearchDocument,
+)
+from jobs.search import analyze, rank_offers
+from segus_engineering_Backend.intake import client_ip, reset_local_buckets, throttle
+
+User = get_user_model()
+
+
+def docx_file(text, name="cv.docx"):
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr(
+            "word/document.xml", f"<w:document><w:p><w:t>{text}</w:t></w:p></w:document>"
+        )
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+def pdf_file(text, name="cv.pdf"):
+    content = zlib.compress(f"BT /F1 12 Tf ({text}) Tj ET".encode("latin-1"))
+    body = (
+        b"%PDF-1.4\n1 0 obj << /Filter /FlateDecode >>\nstream\n"
+        + content
+        + b"\nendstream\nendobj\n%%EOF"
+    )
+    return SimpleUploadedFile(name, body, content_type="application/pdf")
+
+
+class JobOfferSearchTest(APITestCase):
+    """Tests de la recherche plein texte des offres d'emploi"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+        )
+        self.engineering = JobCategory.objects.create(name="Ingénierie", slug="ingenierie")
+        self.drawing = JobCategory.objects.create(name="Dessin", slug="dessin")
+        self.engineer = self.create_offer(
+            "Ingénieur Génie Civil",
+            "Conception d'ouvrages routiers et suivi de chantiers.",
+            skills=["AutoCAD", "Covadis"],
+            category=self.engineering,
+        )
+        self.draftsman = self.create_offer(
+            "Dessinateur projeteur",
+            "Vous assisterez nos ingénieurs dans la production des plans.",
+            skills=["AutoCAD"],
+            category=self.drawing,
+            location="Sfax",
+            job_type="CDD",
+        )
+        self.intern = self.create_offer(
+            "Stage topographie",
+            "Relevés terrain au GPS.",
+            requirements=["Permis B"],
+            category=self.engineering,
+            job_type="Stage",
+        )
+
+    def create_offer(self, title, description, category, skills=(), requirements=(), **extra):
+        return JobOffer.objects.create(
+            title=title,
+            slug=title.lower().replace(" ", "-"),
+            category=category,
+            location=extra.pop("location", "Tunis"),
+            job_type=extra.pop("job_type", "CDI"),
+            description=description,
+            skills=list(skills),
+            requirements=list(requirements),
+            experience_level="Junior (0-2 ans)",
+            created_by=self.admin_user,
+            **extra,
+        )
+
+    def test_analyze_folds_accents_and_stems(self):
+        """Accents, casse et flexions FR/EN ramenés à la même racine"""
+        self.assertEqual(analyze("Ingénieurs"), analyze("ingenieur"))
+        self.assertEqual(analyze("développement"), analyze("Developpements"))
+        self.assertEqual(analyze("de la"), [])
+
+    def test_ranked_search_with_highlights_and_facets(self):
+        """Le titre pèse plus que la description ; extraits et facettes fournis"""
+        response = self.client.get("/api/jobs/offers/search/", {"q": "ingenieurs"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [row["id"] for row in response.data["results"]]
+        self.assertEqual(ids, [self.engineer.id, self.draftsman.id])
+        self.assertEqual(
+            response.data["results"][0]["highlights"]["title"], "<mark>Ingénieur</mark> Génie Civil"
+        )
+        self.assertIn(
+            "<mark>ingénieurs</mark>", response.data["results"][1]["highlights"]["description"]
+        )
+        facets = response.data["facets"]
+        self.assertEqual(
+            {row["name"]: row["count"] for row in facets["category"]},
+            {"Ingénierie": 1, "Dessin": 1},
+        )
+        self.assertEqual({row["value"] for row in facets["location"]}, {"Tunis", "Sfax"})
+
+    def test_skills_and_requirements_are_searchable(self):
+        """Les listes JSON compétences / exigences sont indexées"""
+        response = self.client.get("/api/jobs/offers/search/", {"q": "autocad", "job_type": "CDD"})
+        self.assertEqual([row["id"] for row in response.data["results"]], [self.draftsman.id])
+        self.assertEqual(
+            response.data["results"][0]["highlights"]["skills"], ["<mark>AutoCAD</mark>"]
+        )
+
+        response = self.client.get("/api/jobs/offers/", {"search": "permis"})
+        self.assertEqual([row["id"] for row in response.data], [self.intern.id])
+
+    def test_search_filter_is_not_capped_and_keeps_description_fallback(self):
+        """?search= n'est pas limité par la recherche classée ; mots vides : description"""
+        self.assertEqual(len(rank_offers("autocad", limit=1)), 1)
+        self.assertEqual(len(rank_offers("autocad", limit=None)), 2)
+
+        with mock.patch("jobs.filters.rank_offers", wraps=rank_offers) as ranked:
+            response = self.client.get("/api/jobs/offers/", {"search": "autocad"})
+        ranked.assert_called_once_with("autocad", limit=None)
+        self.assertEqual(
+            {row["id"] for row in response.data}, {self.engineer.id, self.draftsman.id}
+        )
+
+        response = self.client.get("/api/jobs/offers/", {"search": "nos"})
+        self.assertEqual([row["id"] for row in response.data], [self.draftsman.id])
+
+    def test_index_follows_updates_and_deletes(self):
+        """L'index suit les modifications et suppressions d'offres"""
+        self.intern.title = "Stage bureau d'études"
+        self.intern.save()
+        self.assertEqual(rank_offers("topographie"), [])
+        self.assertEqual([pk for pk, _score in rank_offers("etudes")], [self.intern.id])
+
+        self.intern.delete()
+        self.assertEqual(rank_offers("etudes"), [])
+
+        JobOfferSearchDocument.objects.all().delete()
+        call_command("rebuild_job_search_index", stdout=StringIO())
+        self.assertEqual(
+            {pk for pk, _score in rank_offers("autocad")}, {self.engineer.id, self.draftsman.id}
+        )
+
+
+class JobOfferListQueryCountTest(APITestCase):
+    """Tests du nombre de requêtes des listes d'offres et de catégories"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+            is_staff=True,
+        )
+        self.category = JobCategory.objects.create(name="Ingénierie", slug="ingenierie")
+        JobCategory.objects.create(name="Dessin", slug="dessin")
+        self.offers = [
+            JobOffer.objects.create(
+                title=f"Offre {index}",
+                slug=f"offre-{index}",
+                category=self.category,
+                location="Tunis",
+                job_type="CDI",
+                description="Description",
+                experience_level="Junior (0-2 ans)",
+                is_featured=True,
+                is_active=index != 4,
+                created_by=self.admin_user,
+            )
+            for index in range(5)
+        ]
+        for index, status_value in enumerate(["new", "new", "reviewed"]):
+            JobApplication.objects.create(
+                job_offer=self.offers[0],
+                first_name="Candidat",
+                last_name=str(index),
+                email=f"candidat{index}@example.com",
+                phone="+21612345678",
+                experience_years=2,
+                motivation_letter="Motivation",
+                cv_file="applications/cvs/cv.pdf",
+                status=status_value,
+            )
+
+    def test_offer_lists_annotate_application_counts(self):
+        """Liste, featured et recent : compteurs sans requête par offre"""
+        self.client.force_authenticate(self.admin_user)
+        for url in ["/api/jobs/offers/", "/api/jobs/offers/featured/", "/api/jobs/offers/recent/"]:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            counts = {
+                row["id"]: (row["applications_count"], row["new_applications_count"])
+                for row in response.data
+            }
+            self.assertEqual(counts[self.offers[0].id], (3, 2))
+            self.assertEqual(counts[self.offers[1].id], (0, 0))
+
+        # Repli sur les propriétés hors annotation
+        self.assertEqual(JobOffer.objects.get(pk=self.offers[0].pk).new_applications_count, 2)
+
+    def test_category_list_annotates_active_jobs(self):
+        """Les catégories comptent leurs offres actives en une requête"""
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/jobs/categories/")
+        self.assertEqual(
+            {row["name"]: row["jobs_count"] for row in response.data},
+            {"Ingénierie": 4, "Dessin": 0},
+        )
+
+
+class SkillMatchingTest(APITestCase):
+    """Tests du rapprochement candidats / offres"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+            is_staff=True,
+        )
+        category = JobCategory.objects.create(name="Ingénierie", slug="ingenierie")
+        offer_fields = {
+            "category": category,
+            "location": "Tunis",
+            "job_type": "CDI",
+            "description": "Description",
+            "experience_level": "Junior (0-2 ans)",
+            "created_by": self.admin_user,
+        }
+        self.roads = JobOffer.objects.create(
+            title="Projeteur routier",
+            slug="projeteur-routier",
+            skills=["AutoCAD", "Covadis", "Tracé routier"],
+            requirements=["Diplôme génie civil"],
+            **offer_fields,
+        )
+        self.survey = JobOffer.objects.create(
+            title="Topographe",
+            slug="topographe",
+            skills=["GPS", "Station totale"],
+            requirements=["Permis B"],
+            **offer_fields,
+        )
+        self.drafter = self.apply(
+            "Dessinateur AutoCAD",
+            docx_file("Maîtrise de Covadis et du tracé routier"),
+            job_offer=self.roads,
+        )
+        self.surveyor = self.apply("Technicien topographe", pdf_file("Levés GPS, station totale"))
+        self.spontaneous = self.apply(
+            "Géomètre", pdf_file("Station totale, GPS"), is_spontaneous=True
+        )
+
+    def apply(self, position, cv_file, **extra):
+        # Le texte du CV est extrait après commit
+        with self.captureOnCommitCallbacks(execute=True):
+            return JobApplication.objects.create(
+                first_name="Candidat",
+                last_name=position,
+                email=f"{position.split()[0].lower()}@example.com",
+                phone="+21612345678",
+                current_position=position,
+                experience_years=2,
+                motivation_letter="Motivation",
+                cv_file=cv_file,
+                **extra,
+            )
+
+    def test_offer_candidates_ranked_by_similarity(self):
+        """Les candidats les plus proches d'une offre sont classés, CV compris"""
+        self.client.force_authenticate(self.admin_user)
+        response = self.client.get(f"/api/jobs/offers/{self.roads.id}/candidates/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["id"] for row in response.data], [self.drafter.id])
+        self.assertTrue(response.data[0]["applied"])
+        self.assertGreater(response.data[0]["score"], 0)
+
+        ranked = [pk for pk, _score in top_candidates(self.survey)]
+        self.assertEqual(set(ranked), {self.surveyor.id, self.spontaneous.id})
+
+        self.client.force_authenticate(None)
+        response = self.client.get(f"/api/jobs/offers/{self.roads.id}/candidates/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_spontaneous_application_matching_offers(self):
+        """Offres actives proposées pour une candidature spontanée"""
+        self.client.force_authenticate(self.admin_user)
+        url = f"/api/jobs/applications/{self.spontaneous.id}/matching_offers/"
+        response = self.client.get(url)
+        self.assertEqual([row["id"] for row in response.data], [self.survey.id])
+
+        # Le vecteur suit les modifications ; une offre désactivée n'est plus proposée
+        self.spontaneous.current_position = "Projeteur AutoCAD Covadis"
+        self.spontaneous.save()
+        self.survey.is_active = False
+        self.survey.save()
+        response = self.client.get(url)
+        self.assertEqual([row["id"] for row in response.data], [self.roads.id])
+
+        response = self.client.get(f"/api/jobs/applications/{self.drafter.id}/matching_offers/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class JobAlertDigestTest(APITestCase):
+    """Tests de l'évaluation des alertes emploi et de l'envoi des digests"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="adminpass123", role="ADMIN"
+        )
+        self.engineering = JobCategory.objects.create(name="Ingénierie", slug="ingenierie")
+        drawing = JobCategory.objects.create(name="Dessin", slug="dessin")
+        past = timezone.now() - timedelta(days=7)
+
+        self.by_keyword = JobAlert.objects.create(
+            email="routes@example.com", keywords="ingénieur routier"
+        )
+        self.by_category = JobAlert.objects.create(
+            email="sfax@example.com", job_types=["CDI"], locations=["sfax"]
+        )
+        self.by_category.categories.add(self.engineering)
+        self.unmatched = JobAlert.objects.create(email="stage@example.com", job_types=["Stage"])
+        JobAlert.objects.create(email="off@example.com", is_active=False)
+        JobAlert.objects.filter(pk__gt=0).update(created_at=past)
+
+        offer_fields = {
+            "description": "Description",
+            "experience_level": "Junior (0-2 ans)",
+            "created_by": admin,
+        }
+        self.civil = JobOffer.objects.create(
+            title="Ingénieurs génie civil",
+            slug="civil",
+            category=self.engineering,
+            location="Sfax, Tunisie",
+            job_type="CDI",
+            **offer_fields,
+        )
+        JobOffer.objects.create(
+            title="Dessinateur",
+            slug="dessinateur",
+            category=drawing,
+            location="Tunis",
+            job_type="CDI",
+            skills=["Tracé routier"],
+            **offer_fields,
+        )
+        old = JobOffer.objects.create(
+            title="Ingénieur structure",
+            slug="structure",
+            category=self.engineering,
+            location="Sfax",
+            job_type="CDI",
+            **offer_fields,
+        )
+        JobOffer.objects.filter(pk=old.pk).update(created_at=past - timedelta(days=1))
+
+    def test_one_digest_per_matching_subscriber(self):
+        """Un digest par abonné concerné, last_sent mis à jour, rien au second passage"""
+        output = StringIO()
+        call_command("send_job_alerts", stdout=output)
+
+        self.assertIn("3 alerte(s) évaluée(s), 2 digest(s)", output.getvalue())
+        digests = {message.to[0]: message for message in mail.outbox}
+        self.assertEqual(set(digests), {"routes@example.com", "sfax@example.com"})
+        self.assertIn("Dessinateur", digests["routes@example.com"].body)
+        self.assertIn("Ingénieurs génie civil", digests["routes@example.com"].body)
+        self.assertNotIn("Ingénieur structure", digests["routes@example.com"].body)
+        self.assertNotIn("Dessinateur", digests["sfax@example.com"].body)
+
+        self.by_keyword.refresh_from_db()
+        self.unmatched.refresh_from_db()
+        self.assertIsNotNone(self.by_keyword.last_sent)
+        self.assertIsNone(self.unmatched.last_sent)
+
+        mail.outbox.clear()
+        call_command("send_job_alerts", stdout=StringIO())
+        self.assertEqual(mail.outbox, [])
+
+    def test_dry_run_sends_nothing(self):
+        """--dry-run évalue sans envoyer ni marquer les alertes"""
+        output = StringIO()
+        call_command("send_job_alerts", "--dry-run", stdout=output)
+        self.assertIn("2 digest(s) à envoyer", output.getvalue())
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(JobAlert.objects.filter(last_sent__isnull=False).exists())
+
+    def test_index_locations_and_wide_masks(self):
+        """Lieux cherchés par suites de mots entiers ; 5000 alertes extraites du masque"""
+        past = timezone.now() - timedelta(days=1)
+        alerts = [
+            {"id": pk, "keywords": "", "job_types": [], "locations": [], "last_sent": None}
+            for pk in range(5000)
+        ]
+        for alert in alerts:
+            alert["created_at"] = past
+        alerts[10]["locations"] = ["La Marsa"]
+        alerts[11]["locations"] = ["fax"]
+        alerts[12]["last_sent"] = timezone.now() + timedelta(days=1)
+        index = AlertIndex(alerts, {})
+
+        offer = JobOffer(title="Géomètre", location="La Marsa, Tunis", created_at=timezone.now())
+        digests = index.matches([offer])
+        self.assertEqual(len(digests), 4998)
+        self.assertIn(10, digests)
+        self.assertNotIn(11, digests)
+        self.assertNotIn(12, digests)
+        self.assertEqual(digests[4999], [offer])
+
+        offer.location = "Sfax"
+        self.assertNotIn(11, index.matches([offer]))
+
+
+class CvIngestionTest(APITestCase):
+    """Tests de la réception des CV : déduplication et extraction du texte"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+            is_staff=True,
+        )
+        category = JobCategory.objects.create(name="Ingénierie", slug="ingenierie")
+        self.offers = [
+            JobOffer.objects.create(
+                title=f"Offre {index}",
+                slug=f"offre-{index}",
+                category=category,
+                location="Tunis",
+                job_type="CDI",
+                description="Description",
+                experience_level="Junior (0-2 ans)",
+                created_by=self.admin_user,
+            )
+            for index in range(2)
+        ]
+
+    def apply(self, offer, cv_file):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                "/api/jobs/applications/",
+                {
+                    "job_offer": offer.id,
+                    "first_name": "Sami",
+                    "last_name": "Ben Ali",
+                    "email": "sami@example.com",
+                    "phone": "+21612345678",
+                    "experience_years": 3,
+                    "motivation_letter": "Motivation",
+                    "cv_file": cv_file,
+                },
+                format="multipart",
+            )
+
+    def test_identical_cv_is_stored_once_and_text_extracted(self):
+        """Un CV identique réutilise le fichier stocké ; son texte est indexé"""
+        first = self.apply(self.offers[0], pdf_file("Projeteur Covadis", name="cv-sami.pdf"))
+        second = self.apply(self.offers[1], pdf_file("Projeteur Covadis", name="autre-nom.pdf"))
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+
+        applications = JobApplication.objects.order_by("pk")
+        names = {application.cv_file.name for application in applications}
+        self.assertEqual(len(names), 1)
+        digest = applications[0].cv_sha256
+        self.assertEqual(names, {f"applications/cvs/{digest[:2]}/{digest}.pdf"})
+        self.assertTrue(
+            all(application.cv_text == "Projeteur Covadis" for application in applications)
+        )
+        self.assertTrue(all(application.cv_extracted_at for application in applications))
+
+        self.client.force_authenticate(self.admin_user)
+        response = self.client.get("/api/jobs/applications/", {"search": "covadis"})
+        self.assertEqual(len(response.data), 2)
+
+    def test_cv_text_extraction(self):
+        """Le texte des CV PDF et DOCX est extrait"""
+        self.apply(self.offers[0], docx_file("Maîtrise de Covadis &amp; AutoCAD"))
+        application = JobApplication.objects.get()
+        self.assertIn("Covadis & AutoCAD", application.cv_text)
+        self.assertIn("station totale", extract_cv_text(pdf_file("GPS, station totale")))
+
+    @mock.patch("jobs.ingestion.MAX_TEXT_BYTES", 1024)
+    @mock.patch("jobs.ingestion.MAX_INFLATED_BYTES", 64 * 1024)
+    def test_cv_text_extraction_is_bounded(self):
+        """Décompression et texte extrait bornés (bombe de décompression)"""
+
+        def pdf(*streams):
+            body = b"".join(b"stream\n" + stream + b"\nendstream\n" for stream in streams)
+            return SimpleUploadedFile("cv.pdf", b"%PDF-1.4\n" + body)
+
+        bomb = zlib.compress(b"BT (" + b"0" * 8 * 1024 * 1024 + b") Tj ET", 9)
+        sections = [zlib.compress(f"BT (Covadis {index}) Tj ET".encode()) for index in range(500)]
+
+        # Le budget de décompression est épuisé par la bombe : rien d'autre n'est lu
+        self.assertEqual(extract_cv_text(pdf(bomb, *sections)), "")
+        text = extract_cv_text(pdf(*sections))
+        self.assertTrue(text.startswith("Covadis 0 Covadis 1"))
+        self.assertLessEqual(len(text), 1024)
+
+        docx = extract_cv_text(docx_file("AutoCAD " * 1024 * 1024))
+        self.assertTrue(docx.strip().startswith("AutoCAD"))
+        self.assertLessEqual(len(docx), 1024)
+
+
+class ApplicationStatusTransitionTest(APITestCase):
+    """Tests du suivi des champs et du changement de statut en masse"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+            is_staff=True,
+        )
+        self.reviewer = User.objects.create_user(
+            username="rh", email="rh@example.com", password="rhpass123", role="ADMIN"
+        )
+        category = JobCategory.objects.create(name="Ingénierie", slug="ingenierie")
+        offer = JobOffer.objects.create(
+            title="Projeteur",
+            slug="projeteur",
+            category=category,
+            location="Tunis",
+            job_type="CDI",
+            description="Description",
+            experience_level="Junior (0-2 ans)",
+            created_by=self.admin_user,
+        )
+        JobApplication.objects.bulk_create(
+            [
+                JobApplication(
+                    job_offer=offer,
+                    first_name="Candidat",
+                    last_name=str(index),
+                    email=f"candidat{index}@example.com",
+                    phone="+21612345678",
+                    experience_years=2,
+                    motivation_letter="Motivation",
+                    cv_file="applications/cvs/cv.pdf",
+                )
+                for index in range(25)
+            ]
+        )
+        self.ids = list(JobApplication.objects.order_by("pk").values_list("pk", flat=True))
+        JobApplication.objects.filter(pk=self.ids[0]).update(
+            status="reviewed", reviewed_by=self.reviewer
+        )
+
+    def test_save_compares_status_without_extra_query(self):
+        """save() détecte le changement de statut sans relire la ligne"""
+        application = JobApplication.objects.get(pk=self.ids[1])
+        application.status = "interview"
+        self.assertEqual(application.changed_fields(), ["status"])
+        self.assertEqual(application.previous_value("status"), "new")
+        with self.assertNumQueries(1):
+            application.save()
+        self.assertIsNotNone(application.reviewed_at)
+        self.assertFalse(application.has_changed("status"))
+
+    def test_bulk_status_transition(self):
+        """Une mise à jour, un historique groupé et des emails envoyés après commit"""
+        self.client.force_authenticate(self.admin_user)
+        payload = {"ids": self.ids + [999999], "status": "rejected", "notes": "Profil junior"}
+        # Lecture, UPDATE, INSERT groupé (+ savepoint / release du bloc atomique)
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(5):
+            response = self.client.post(
+                "/api/jobs/applications/bulk-status/", payload, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["updated"], self.ids)
+        self.assertEqual(response.data["skipped"], [999999])
+        self.assertEqual(len(mail.outbox), 25)
+        self.assertEqual(
+            ApplicationStatusHistory.objects.filter(
+                new_status="rejected", notes="Profil junior"
+            ).count(),
+            25,
+        )
+        first = JobApplication.objects.get(pk=self.ids[0])
+        self.assertEqual(first.reviewed_by, self.reviewer)
+        self.assertEqual(
+            set(
+                JobApplication.objects.exclude(pk=self.ids[0]).values_list("reviewed_by", flat=True)
+            ),
+            {self.admin_user.pk},
+        )
+        self.assertFalse(JobApplication.objects.filter(reviewed_at__isnull=True).exists())
+
+        # Déjà dans ce statut : rien à faire
+        response = self.client.post(
+            "/api/jobs/applications/bulk-status/",
+            {"ids": self.ids[:3], "status": "rejected"},
+            format="json",
+        )
+        self.assertEqual(response.data["skipped"], self.ids[:3])
+
+        response = self.client.post(
+            "/api/jobs/applications/bulk-status/",
+            {"ids": "1,2", "status": "rejected"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_status_email_failure_is_logged(self):
+        """Un échec SMTP après commit est journalisé, la transition reste appliquée"""
+        self.client.force_authenticate(self.admin_user)
+        payload = {"ids": self.ids[:2], "status": "rejected"}
+        with (
+            mock.patch("jobs.views.get_connection") as connection,
+            self.assertLogs("jobs.views", level="ERROR") as logs,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            connection.return_value.send_messages.side_effect = OSError("SMTP indisponible")
+            response = self.client.post(
+                "/api/jobs/applications/bulk-status/", payload, format="json"
+            )
+
+        self.assertEqual(response.data["updated"], self.ids[:2])
+        self.assertIn("2 email(s)", logs.output[0])
+        self.assertIn("SMTP indisponible", logs.output[0])
+
+
+class RecruitmentAnalyticsTest(APITestCase):
+    """Tests des statistiques de recrutement agrégées"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        cache.clear()
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+            is_staff=True,
+        )
+        category = JobCategory.objects.create(name="Ingénierie", slug="ingenierie")
+        self.offers = [
+            JobOffer.objects.create(
+                title=title,
+                slug=title.lower(),
+                category=category,
+                location="Tunis",
+                job_type="CDI",
+                description="Description",
+                experience_level="Junior (0-2 ans)",
+                created_by=self.admin_user,
+                is_featured=featured,
+            )
+            for title, featured in (("Projeteur", True), ("Dessinateur", False))
+        ]
+        now = timezone.now()
+        # (offre, statut, jours écoulés, heures avant le premier examen)
+        rows = [
+            (0, "new", 0, None),
+            (0, "reviewed", 1, 1),
+            (0, "interview", 1, 3),
+            (0, "rejected", 2, 5),
+            (1, "accepted", 2, 10),
+            (None, "new", 0, None),
+        ]
+        for index, (offer, status_value, days, hours) in enumerate(rows):
+            application = JobApplication.objects.create(
+                job_offer=self.offers[offer] if offer is not None else None,
+                is_spontaneous=offer is None,
+                first_name="Candidat",
+                last_name=str(index),
+                email=f"candidat{index}@example.com",
+                phone="+21612345678",
+                experience_years=2,
+                motivation_letter="Motivation",
+                cv_file="applications/cvs/cv.pdf",
+                status=status_value,
+            )
+            applied_at = now - timedelta(days=days)
+            JobApplication.objects.filter(pk=application.pk).update(applied_at=applied_at)
+            if hours is not None:
+                history = ApplicationStatusHistory.objects.create(
+                    application=application,
+                    old_status="new",
+                    new_status=status_value,
+                    changed_by=self.admin_user,
+                )
+                ApplicationStatusHistory.objects.filter(pk=history.pk).update(
+                    changed_at=applied_at + timedelta(hours=hours)
+                )
+        self.client.force_authenticate(user=self.admin_user)
+
+    def test_stats_in_two_queries(self):
+        """Les compteurs historiques sortent de deux agrégats"""
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/jobs/applications/stats/")
+        self.assertEqual(response.data["total_offers"], 2)
+        self.assertEqual(response.data["featured_offers"], 1)
+        self.assertEqual(response.data["total_applications"], 6)
+        self.assertEqual(response.data["new_applications"], 2)
+        self.assertEqual(response.data["spontaneous_applications"], 1)
+
+    def test_analytics_series_funnel_and_median(self):
+        """Série, entonnoir et médiane calculés en requêtes bornées puis mis en cache"""
+        with self.assertNumQueries(5):
+            response = self.client.get("/api/jobs/applications/analytics/?days=7")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        series = response.data["series"]
+        self.assertEqual(sum(point["count"] for point in series), 6)
+        self.assertEqual(series[-1]["cumulative"], 6)
+        self.assertEqual([point["count"] for point in series], [2, 2, 2])
+
+        projeteur, dessinateur = response.data["funnel"]
+        self.assertEqual(projeteur["offer_id"], self.offers[0].pk)
+        self.assertEqual(
+            [projeteur[key] for key in ("received", "new", "reviewed", "interview", "rejected")],
+            [4, 1, 3, 1, 1],
+        )
+        self.assertEqual(projeteur["share"], 0.8)
+        self.assertEqual((dessinateur["accepted"], dessinateur["interview"]), (1, 1))
+
+        # Délais 1 h, 3 h, 5 h, 10 h : médiane 4 h
+        self.assertEqual(
+            response.data["time_to_review"], {"median_seconds": 4 * 3600, "reviewed": 4}
+        )
+
+        with self.assertNumQueries(0):
+            self.client.get("/api/jobs/applications/analytics/?days=7")
+
+        response = self.client.get("/api/jobs/applications/analytics/?interval=month")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CareersHttpCacheTest(APITestCase):
+    """Tests du cache HTTP (ETag / Last-Modified) des endpoints carrières"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        cache.clear()
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+            is_staff=True,
+        )
+        self.category = JobCategory.objects.create(name="Ingénierie", slug="ingenierie")
+        self.offer = JobOffer.objects.create(
+            title="Projeteur",
+            slug="projeteur",
+            category=self.category,
+            location="Tunis",
+            job_type="CDI",
+            description="Description",
+            experience_level="Junior (0-2 ans)",
+            created_by=self.admin_user,
+            is_featured=True,
+        )
+
+    def test_conditional_get_and_anonymous_cache(self):
+        """304 sans requête SQL si l'ETag est à jour, réponse anonyme servie du cache"""
+        response = self.client.get("/api/jobs/offers/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/jobs/offers/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/jobs/offers/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]["title"], "Projeteur")
+
+        # Une écriture change la version : nouvel ETag et contenu à jour
+        self.offer.title = "Projeteur senior"
+        self.offer.save()
+        response = self.client.get("/api/jobs/offers/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data[0]["title"], "Projeteur senior")
+
+    def test_categories_and_actions_revalidate(self):
+        """Catégories, détail et offres mises en avant répondent aux requêtes conditionnelles"""
+        for url in (
+            "/api/jobs/categories/",
+            f"/api/jobs/categories/{self.category.pk}/",
+            f"/api/jobs/offers/{self.offer.pk}/",
+            "/api/jobs/offers/featured/",
+            "/api/jobs/offers/recent/",
+        ):
+            etag = self.client.get(url)["ETag"]
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED, url)
+
+        # Le personnel voit aussi les offres inactives : ETag distinct, pas de cache partagé
+        public_etag = self.client.get("/api/jobs/offers/")["ETag"]
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get("/api/jobs/offers/", HTTP_IF_NONE_MATCH=public_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], public_etag)
+
+
+@override_settings(INTAKE_RATES={"ip": "4/minute", "email": "10/hour"}, INTAKE_DEDUP_WINDOW=600)
+class IntakeGuardTest(APITestCase):
+    """Tests de la garde des formulaires publics sur les candidatures"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        cache.clear()
+        reset_local_buckets()
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+            is_staff=True,
+        )
+        category = JobCategory.objects.create(name="Ingénierie", slug="ingenierie")
+        self.offers = [
+            JobOffer.objects.create(
+                title=f"Offre {index}",
+                slug=f"offre-{index}",
+                category=category,
+                location="Tunis",
+                job_type="CDI",
+                description="Description",
+                experience_level="Junior (0-2 ans)",
+                created_by=self.admin_user,
+            )
+            for index in range(3)
+        ]
+
+    def apply(self, offer, motivation="Motivation"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                "/api/jobs/applications/",
+                {
+                    "job_offer": offer.id,
+                    "first_name": "Sami",
+                    "last_name": "Ben Ali",
+                    "email": "sami@example.com",
+                    "phone": "+21612345678",
+                    "experience_years": 3,
+                    "motivation_letter": motivation,
+                    "cv_file": pdf_file("Projeteur"),
+                },
+                format="multipart",
+            )
+
+    def test_duplicates_spam_and_flood_are_rejected_before_any_work(self):
+        """Doublon, spam et dépassement de débit refusés sans écriture ni email"""
+        self.assertEqual(self.apply(self.offers[0]).status_code, status.HTTP_201_CREATED)
+        emails_per_application = len(mail.outbox)
+
+        response = self.apply(self.offers[0], motivation="  MOTIVATION ")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        links = " ".join(f"https://promo{index}.example.com" for index in range(6))
+        response = self.apply(self.offers[1], motivation=links)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertEqual(self.apply(self.offers[1]).status_code, status.HTTP_201_CREATED)
+        response = self.apply(self.offers[2])
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response["Retry-After"]), 0)
+
+        self.assertEqual(JobApplication.objects.count(), 2)
+        self.assertEqual(len(mail.outbox), 2 * emails_per_application)
+
+        self.client.force_authenticate(self.admin_user)
+        response = self.client.get("/api/intake/stats/")
+        self.assertEqual(
+            response.data["application"],
+            {"accepted": 2, "rate_limited": 1, "duplicate": 1, "spam": 1},
+        )
+
+    @override_settings(INTAKE_TRUSTED_PROXIES=1)
+    def test_rate_limit_ignores_client_supplied_forwarded_addresses(self):
+        """Un X-Forwarded-For tournant ne donne pas un nouveau seau à chaque envoi"""
+        request = RequestFactory().post("/", HTTP_X_FORWARDED_FOR="1.2.3.4, 10.0.0.7")
+        self.assertEqual(client_ip(request), "10.0.0.7")
+        with override_settings(INTAKE_TRUSTED_PROXIES=0):
+            self.assertEqual(client_ip(request), "127.0.0.1")
+
+        statuses = [
+            self.client.post(
+                "/api/contact-messages/",
+                {
+                    "first_name": "Sami",
+                    "last_name": "Ben Ali",
+                    "email": f"sami{index}@example.com",
+                    "subject": "Devis",
+                    "message": f"Demande de devis numéro {index}",
+                },
+                HTTP_X_FORWARDED_FOR=f"203.0.113.{index}, 10.0.0.7",
+            ).status_code
+            for index in range(5)
+        ]
+        self.assertEqual(statuses[:4], [status.HTTP_201_CREATED] * 4)
+        self.assertEqual(statuses[4], status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_shared_tier_limits_across_workers(self):
+        """Le compteur du cache partagé refuse même si le seau local est neuf"""
+        for _ in range(4):
+            self.assertEqual(throttle("intake:test", "4/minute", now=1200.0), 0)
+        reset_local_buckets()  # autre worker : seau local vide
+        self.assertEqual(throttle("intake:test", "4/minute", now=1201.0), 59.0)
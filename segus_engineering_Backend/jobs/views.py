@@ -1,16 +1,24 @@
+import logging
 from datetime import timedelta
 
 from django.conf import settings
-from django.core.mail import send_mail
-from django.db.models import Case, Count, IntegerField, When
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 
+from segus_engineering_Backend.intake import IntakeGuard, client_ip
+
+from .analytics import INTERVALS, application_counts, offer_counts, recruitment_analytics
+from .cache import careers_cache, invalidate
 from .filters import JobApplicationFilter, JobOfferFilter
+from .ingestion import ContentHashUploadHandler, store_cv
 from .models import (
     ApplicationStatusHistory,
     JobAlert,
@@ -18,6 +26,7 @@ from .models import (
     JobCategory,
     JobOffer,
 )
+from .search import facet_counts, highlight, rank_offers
 from .serializers import (
     JobAlertSerializer,
     JobApplicationCreateSerializer,
@@ -31,12 +40,74 @@ from .serializers import (
     JobStatsSerializer,
 )
 
+logger = logging.getLogger(__name__)
+
+BULK_STATUS_MAX = 1000
+
+application_guard = IntakeGuard(
+    "application",
+    fingerprint_fields=("email", "job_offer", "motivation_letter"),
+    text_fields=("motivation_letter",),
+)
+STATUS_EMAIL_MESSAGES = {
+    "interview": "Félicitations ! Votre candidature pour le poste de {job_title} a retenu notre attention. Nous vous contacterons prochainement pour organiser un entretien.",
+    "accepted": "Excellente nouvelle ! Votre candidature pour le poste de {job_title} a été acceptée. Nous vous contacterons très bientôt pour finaliser les détails.",
+    "rejected": "Nous vous remercions pour votre candidature au poste de {job_title}. Malheureusement, nous ne pouvons pas donner suite à votre candidature pour le moment. Nous conservons votre profil pour de futures opportunités.",
+}
+
+
+def status_update_email(application, new_status):
+    """Email au candidat pour un nouveau statut (None si le statut n'en prévoit pas)"""
+    if new_status not in STATUS_EMAIL_MESSAGES:
+        return None
+    status_message = STATUS_EMAIL_MESSAGES[new_status].format(job_title=application.job_title)
+    return EmailMessage(
+        subject=f"Mise à jour de votre candidature - {application.job_title}",
+        body=f"""
+Bonjour {application.first_name},
+
+{status_message}
+
+Cordialement,
+L'équipe Segus Engineering
+                """,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[application.email],
+    )
+
+
+def send_messages(messages):
+    """Envoie des emails sur une seule connexion SMTP ; un échec est journalisé"""
+    try:
+        get_connection().send_messages(messages)
+    except Exception:
+        logger.exception("Échec de l'envoi de %d email(s)", len(messages))
+
+
+def matching_limit(request, default):
+    """Paramètre ?limit= borné à [1, 100] ; None s'il est invalide"""
+    try:
+        return min(max(int(request.query_params.get("limit", default)), 1), 100)
+    except ValueError:
+        return None
+
 
 class JobCategoryViewSet(viewsets.ModelViewSet):
     queryset = JobCategory.objects.filter(is_active=True)
     serializer_class = JobCategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    def get_queryset(self):
+        return super().get_queryset().with_jobs_count()
+
+    @careers_cache("jobcategory", "joboffer")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @careers_cache("jobcategory", "joboffer")
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def get_permissions(self):
         if self.action in ["create", "update", "partial_update", "destroy"]:
             permission_classes = [permissions.IsAdminUser]
@@ -58,8 +129,21 @@ class JobOfferViewSet(viewsets.ModelViewSet):
         if not self.request.user.is_staff:
             queryset = queryset.filter(is_active=True)
 
+        # Compteurs de candidatures en une requête groupée ; la recherche les
+        # annote sur la seule page servie (les facettes comptent des offres)
+        if self.action != "search":
+            queryset = queryset.with_application_counts()
+
         return queryset.order_by("-created_at")
 
+    @careers_cache("joboffer", "jobcategory")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @careers_cache("joboffer", "jobcategory")
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def get_serializer_class(self):
         if self.action == "list":
             return JobOfferListSerializer
@@ -69,7 +153,7 @@ class JobOfferViewSet(viewsets.ModelViewSet):
             return JobOfferDetailSerializer
 
     def get_permissions(self):
-        if self.action in ["create", "update", "partial_update", "destroy"]:
+        if self.action in ["create", "update", "partial_update", "destroy", "candidates"]:
             permission_classes = [permissions.IsAdminUser]
         else:
             permission_classes = [permissions.AllowAny]
@@ -127,7 +211,84 @@ class JobOfferViewSet(viewsets.ModelViewSet):
         )
         return Response(serializer.data)
 
+    @action(detail=True, methods=["get"], permission_classes=[permissions.IsAdminUser])
+    def candidates(self, request, pk=None):
+        """Candidatures les plus proches de l'offre (similarité TF-IDF), ?limit= (20)"""
+        from .matching import top_candidates
+
+        job_offer = self.get_object()
+        limit = matching_limit(request, default=20)
+        if limit is None:
+            return Response(
+                {"error": "limit doit être un entier"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        scores = dict(top_candidates(job_offer, limit))
+        applications = sorted(
+            JobApplication.objects.filter(pk__in=scores).select_related("job_offer"),
+            key=lambda application: (-scores[application.pk], application.pk),
+        )
+        results = JobApplicationListSerializer(
+            applications, many=True, context={"request": request}
+        ).data
+        for row, application in zip(results, applications):
+            row["score"] = scores[application.pk]
+            row["applied"] = application.job_offer_id == job_offer.pk
+        return Response(results)
+
     @action(detail=False, methods=["get"])
+    def search(self, request):
+        """
+        Recherche plein texte classée par pertinence (?q=), avec extraits
+        surlignés et facettes ; les filtres habituels (category, job_type,
+        location...) s'appliquent. Pagination par ?limit= et ?offset=.
+        """
+        query = request.query_params.get("q", "").strip()
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), 100)
+            offset = max(int(request.query_params.get("offset", 0)), 0)
+        except ValueError:
+            return Response(
+                {"error": "limit et offset doivent être des entiers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        scores = {}
+        if query:
+            scores = dict(rank_offers(query))
+            queryset = queryset.filter(pk__in=scores)
+
+        facets = facet_counts(queryset)
+        if scores:
+            # Ordre de pertinence, puis récence ; seule la page demandée est chargée
+            ids = sorted(queryset.values_list("pk", flat=True), key=lambda pk: (-scores[pk], -pk))
+            page_ids = ids[offset : offset + limit]
+            offers = sorted(
+                queryset.filter(pk__in=page_ids).with_application_counts(),
+                key=lambda offer: page_ids.index(offer.pk),
+            )
+            count = len(ids)
+        else:
+            count = queryset.count()
+            offers = list(queryset.with_application_counts()[offset : offset + limit])
+
+        results = JobOfferListSerializer(offers, many=True, context={"request": request}).data
+        for row, offer in zip(results, offers):
+            row["score"] = scores.get(offer.pk)
+            if query:
+                row["highlights"] = {
+                    "title": highlight(offer.title, query),
+                    "description": highlight(offer.description, query, max_words=30),
+                    "skills": [
+                        marked
+                        for marked in (highlight(skill, query) for skill in offer.skills or [])
+                        if "<mark>" in marked
+                    ],
+                }
+        return Response({"query": query, "count": count, "results": results, "facets": facets})
+
+    @action(detail=False, methods=["get"])
+    @careers_cache("joboffer", "jobcategory")
     def featured(self, request):
         """Récupérer les offres mises en avant"""
         featured_offers = self.get_queryset().filter(is_featured=True, is_active=True)[:6]
@@ -135,6 +296,7 @@ class JobOfferViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=["get"])
+    @careers_cache("joboffer", "jobcategory")
     def recent(self, request):
         """Récupérer les offres récentes"""
         recent_offers = self.get_queryset().filter(is_active=True)[:10]
@@ -149,6 +311,12 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_class = JobApplicationFilter
 
+    def initialize_request(self, request, *args, **kwargs):
+        # Le hash du CV est calculé pendant la réception, avant l'analyse du corps
+        self.upload_hashes = ContentHashUploadHandler(request)
+        request.upload_handlers.insert(0, self.upload_hashes)
+        return super().initialize_request(request, *args, **kwargs)
+
     def get_queryset(self):
         return JobApplication.objects.select_related(
             "job_offer", "job_offer__category", "reviewed_by"
@@ -173,15 +341,30 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
 
     def create(self, request, *args, **kwargs):
         """Créer une nouvelle candidature"""
+        # Débit, doublons et spam filtrés avant toute validation, écriture ou email
+        rejection = application_guard.check(request)
+        if rejection:
+            return rejection
+
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
+        # CV stocké sous son hash : un fichier identique déjà reçu est réutilisé
+        cv = {}
+        if serializer.validated_data.get("cv_file"):
+            cv["cv_file"], cv["cv_sha256"] = store_cv(
+                serializer.validated_data["cv_file"], self.upload_hashes.digests.get("cv_file")
+            )
+
         # Enregistrer les métadonnées
         application = serializer.save(
             ip_address=self.get_client_ip(request),
             user_agent=request.META.get("HTTP_USER_AGENT", ""),
+            **cv,
         )
 
+        application_guard.accepted(request)
+
         # Envoyer un email de confirmation au candidat
         self.send_application_confirmation_email(application)
 
@@ -195,12 +378,7 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
 
     def get_client_ip(self, request):
         """Récupérer l'IP du client"""
-        x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(",")[0]
-        else:
-            ip = request.META.get("REMOTE_ADDR")
-        return ip
+        return client_ip(request)
 
     def send_application_confirmation_email(self, application):
         """Envoyer un email de confirmation au candidat"""
@@ -307,86 +485,116 @@ Connectez-vous à l'interface d'administration pour examiner cette candidature.
     def send_status_update_email(self, application, old_status, new_status):
         """Envoyer un email au candidat lors du changement de statut"""
         try:
-            status_messages = {
-                "interview": f"Félicitations ! Votre candidature pour le poste de {application.job_title} a retenu notre attention. Nous vous contacterons prochainement pour organiser un entretien.",
-                "accepted": f"Excellente nouvelle ! Votre candidature pour le poste de {application.job_title} a été acceptée. Nous vous contacterons très bientôt pour finaliser les détails.",
-                "rejected": f"Nous vous remercions pour votre candidature au poste de {application.job_title}. Malheureusement, nous ne pouvons pas donner suite à votre candidature pour le moment. Nous conservons votre profil pour de futures opportunités.",
-            }
-
-            if new_status in status_messages:
-                subject = f"Mise à jour de votre candidature - {application.job_title}"
-                message = f"""
-Bonjour {application.first_name},
-
-{status_messages[new_status]}
-
-Cordialement,
-L'équipe Segus Engineering
-                """
-
-                send_mail(
-                    subject,
-                    message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [application.email],
-                    fail_silently=True,
-                )
+            message = status_update_email(application, new_status)
+            if message:
+                message.send(fail_silently=True)
         except Exception as e:
             print(f"Erreur envoi email statut: {e}")
 
-    @action(detail=False, methods=["get"], permission_classes=[permissions.IsAdminUser])
-    def stats(self, request):
-        """Statistiques des candidatures"""
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-status",
+        permission_classes=[permissions.IsAdminUser],
+        parser_classes=[JSONParser],
+    )
+    def bulk_status(self, request):
+        """
+        Changer le statut de plusieurs candidatures : {"ids": [...], "status": ...,
+        "notes": ""}. Une mise à jour, un bulk_create d'historique ; les emails
+        partent après commit sur une seule connexion.
+        """
+        new_status = request.data.get("status")
+        notes = request.data.get("notes", "")
+        ids = request.data.get("ids")
+        if new_status not in dict(JobApplication.APPLICATION_STATUS):
+            return Response({"error": "Statut invalide"}, status=status.HTTP_400_BAD_REQUEST)
+        if (
+            not isinstance(ids, list)
+            or not ids
+            or len(ids) > BULK_STATUS_MAX
+            or not all(isinstance(pk, int) for pk in ids)
+        ):
+            return Response(
+                {"error": f"ids doit être une liste de 1 à {BULK_STATUS_MAX} identifiants"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        applications = list(
+            JobApplication.objects.filter(pk__in=ids)
+            .exclude(status=new_status)
+            .select_related("job_offer")
+            .only("pk", "status", "first_name", "email", "job_offer__title")
+        )
         now = timezone.now()
-        this_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        this_week = now - timedelta(days=now.weekday())
-
-        # Statistiques des offres
-        total_offers = JobOffer.objects.count()
-        active_offers = JobOffer.objects.filter(is_active=True).count()
-        inactive_offers = total_offers - active_offers
-        featured_offers = JobOffer.objects.filter(is_featured=True, is_active=True).count()
-
-        # Statistiques des candidatures
-        applications = JobApplication.objects.all()
-        total_applications = applications.count()
-
-        status_counts = applications.aggregate(
-            new_applications=Count(Case(When(status="new", then=1), output_field=IntegerField())),
-            reviewed_applications=Count(
-                Case(When(status="reviewed", then=1), output_field=IntegerField())
-            ),
-            interview_applications=Count(
-                Case(When(status="interview", then=1), output_field=IntegerField())
-            ),
-            accepted_applications=Count(
-                Case(When(status="accepted", then=1), output_field=IntegerField())
-            ),
-            rejected_applications=Count(
-                Case(When(status="rejected", then=1), output_field=IntegerField())
-            ),
-            spontaneous_applications=Count(
-                Case(When(is_spontaneous=True, then=1), output_field=IntegerField())
-            ),
+        with transaction.atomic():
+            changes = {"status": new_status, "updated_at": now}
+            # Premier examen : examinateur et date conservés s'ils existent déjà
+            changes["reviewed_by"] = Coalesce(F("reviewed_by"), Value(request.user.pk))
+            if new_status != "new":
+                changes["reviewed_at"] = Coalesce(F("reviewed_at"), Value(now))
+            JobApplication.objects.filter(pk__in=[app.pk for app in applications]).update(**changes)
+            ApplicationStatusHistory.objects.bulk_create(
+                [
+                    ApplicationStatusHistory(
+                        application=application,
+                        old_status=application.status,
+                        new_status=new_status,
+                        changed_by=request.user,
+                        notes=notes,
+                    )
+                    for application in applications
+                ]
+            )
+            messages = [
+                message
+                for message in (status_update_email(app, new_status) for app in applications)
+                if message
+            ]
+            if messages:
+                transaction.on_commit(lambda: send_messages(messages))
+            # update() n'émet pas de signal : compteurs publics des offres à invalider
+            invalidate("joboffer")
+
+        updated = {application.pk for application in applications}
+        return Response(
+            {
+                "status": new_status,
+                "updated": sorted(updated),
+                "skipped": sorted(set(ids) - updated),
+                "notified": len(messages),
+            }
         )
 
-        applications_this_month = applications.filter(applied_at__gte=this_month).count()
-        applications_this_week = applications.filter(applied_at__gte=this_week).count()
-
-        stats_data = {
-            "total_offers": total_offers,
-            "active_offers": active_offers,
-            "inactive_offers": inactive_offers,
-            "featured_offers": featured_offers,
-            "total_applications": total_applications,
-            "applications_this_month": applications_this_month,
-            "applications_this_week": applications_this_week,
-            **status_counts,
-        }
-
+    @action(detail=False, methods=["get"], permission_classes=[permissions.IsAdminUser])
+    def stats(self, request):
+        """Statistiques des candidatures"""
+        stats_data = {**offer_counts(), **application_counts()}
         serializer = JobStatsSerializer(stats_data)
         return Response(serializer.data)
 
+    @action(detail=False, methods=["get"], permission_classes=[permissions.IsAdminUser])
+    def analytics(self, request):
+        """Tableau de bord recrutement : série temporelle, entonnoir par offre, délai d'examen"""
+        interval = request.query_params.get("interval", "day")
+        if interval not in INTERVALS:
+            return Response(
+                {"error": "interval doit valoir 'day' ou 'week'"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            days = min(max(int(request.query_params.get("days", 30)), 1), 366)
+        except ValueError:
+            return Response(
+                {"error": "days doit être un entier"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Fenêtre alignée sur le jour : la clé de cache reste stable pendant la journée
+        end = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        end += timedelta(days=1)
+        start = end - timedelta(days=days)
+        return Response(recruitment_analytics(start, end, interval))
+
     @action(detail=False, methods=["get"], permission_classes=[permissions.IsAdminUser])
     def spontaneous(self, request):
         """Récupérer les candidatures spontanées"""
@@ -402,6 +610,35 @@ L'équipe Segus Engineering
         )
         return Response(serializer.data)
 
+    @action(detail=True, methods=["get"], permission_classes=[permissions.IsAdminUser])
+    def matching_offers(self, request, pk=None):
+        """Offres actives les plus proches d'une candidature spontanée, ?limit= (10)"""
+        from .matching import top_offers
+
+        application = self.get_object()
+        if not application.is_spontaneous:
+            return Response(
+                {"error": "Réservé aux candidatures spontanées"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = matching_limit(request, default=10)
+        if limit is None:
+            return Response(
+                {"error": "limit doit être un entier"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        active = JobOffer.objects.filter(is_active=True).values_list("pk", flat=True)
+        scores = dict(top_offers(application, limit, offer_ids=active))
+        offers = sorted(
+            JobOffer.objects.filter(pk__in=scores)
+            .select_related("category")
+            .with_application_counts(),
+            key=lambda offer: (-scores[offer.pk], offer.pk),
+        )
+        results = JobOfferListSerializer(offers, many=True, context={"request": request}).data
+        for row, offer in zip(results, offers):
+            row["score"] = scores[offer.pk]
+        return Response(results)
+
 
 class JobAlertViewSet(viewsets.ModelViewSet):
     queryset = JobAlert.objects.all()
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationDispatcher:
+    """
+    Regroupe les notifications produites pendant une requête.
+
+    `notify_user` enregistre une notification persistée (table Notification)
+    et son message temps réel ; `notify_group` un message temps réel seul
+    (ex. groupe "admins"). `dispatch()` écrit toutes les lignes en un
+    bulk_create puis, après le commit de la transaction, envoie tous les
+    messages en un seul lot asynchrone.
+    """
+
+    def __init__(self, using=None):
+        self.using = using
+        self.notifications = []
+        self.messages = []
+
+    def __len__(self):
+        return len(self.messages)
+
+    def notify_user(self, user_id, title, message, type="general", realtime_type=None, **data):
+        """Notification persistée + message temps réel sur le groupe `user_{id}`"""
+        notification = Notification(
+            user_id=user_id,
+            title=title,
+            message=message,
+            type=type,
+            project_id=data.get("project_id"),
+            task_id=data.get("task_id"),
+        )
+        self.notifications.append(notification)
+        self.messages.append(
+            (
+                f"user_{user_id}",
+                {
+                    "title": title,
+                    "message": message,
+                    "type": realtime_type or type,
+                    **data,
+                },
+                notification,
+            )
+        )
+
+    def notify_group(self, group, title, message, type="general", **data):
+        """Message temps réel seul, sans ligne Notification"""
+        self.messages.append(
+            (group, {"title": title, "message": message, "type": type, **data}, None)
+        )
+
+    def dispatch(self):
+        """Persiste les notifications et programme l'envoi après le commit"""
+        if not self.messages:
+            return
+        if self.notifications:
+            Notification.objects.using(self.using).bulk_create(self.notifications)
+        messages, self.notifications, self.messages = self.messages, [], []
+        transaction.on_commit(lambda: self.send(messages), using=self.using)
+
+    @staticmethod
+    def send(messages):
+        """Envoie tous les messages en un seul passage dans la boucle d'événements"""
+        created_at = timezone.now().isoformat()
+        events = []
+        for group, data, notification in messages:
+            data = {"created_at": created_at, "is_read": False, **data}
+            if notification is not None and notification.pk:
+                data["notification_id"] = notification.pk
+            events.append((group, {"type": "notification", "data": data}))
+        try:
+            async_to_sync(_group_send_all)(get_channel_layer(), events)
+        except Exception:
+            # Ne jamais casser la requête si la couche temps réel est indisponible
+            logger.exception("Erreur d'envoi de notification temps réel")
+
+
+async def _group_send_all(channel_layer, events):
+    results = await asyncio.gather(
+        *(channel_layer.group_send(group, event) for group, event in events),
+        return_exceptions=True,
+    )
+    for (group, _event), result in zip(events, results):
+        if isinstance(result, Exception):
+            logger.error("Erreur d'envoi de notification temps réel vers %s: %s", group, result)
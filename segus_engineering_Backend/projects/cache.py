@@ -0,0 +1,32 @@
+"""Cache par utilisateur du tableau de bord projets des employés.
+
+Le payload de ``ProjectViewSet.employee_dashboard`` est conservé peu de temps
+(``PROJECTS_EMPLOYEE_DASHBOARD_CACHE_TIMEOUT``) et invalidé par les signaux de
+``projects.signals`` lors des changements d'affectation et de statut des
+projets, tâches et sous-tâches de l'utilisateur.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _dashboard_key(user_id):
+    return f"projects:employee-dashboard:user:{user_id}"
+
+
+def get_or_build_employee_dashboard(user_id, build):
+    """Retourner le payload en cache ou le construire avec ``build()`` puis le stocker"""
+    key = _dashboard_key(user_id)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        timeout = getattr(settings, "PROJECTS_EMPLOYEE_DASHBOARD_CACHE_TIMEOUT", 60)
+        cache.set(key, data, timeout=timeout)
+    return data
+
+
+def invalidate_employee_dashboards(user_ids):
+    """Invalider le tableau de bord des utilisateurs donnés"""
+    keys = [_dashboard_key(user_id) for user_id in set(user_ids) if user_id is not None]
+    if keys:
+        cache.delete_many(keys)
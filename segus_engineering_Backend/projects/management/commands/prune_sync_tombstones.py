@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from projects.models import SyncTombstone
+
+
+class Command(BaseCommand):
+    help = "Purge les retraits ?since plus anciens que PROJECTS_SYNC_RETENTION_DAYS"
+
+    def handle(self, *args, **options):
+        days = getattr(settings, "PROJECTS_SYNC_RETENTION_DAYS", 30)
+        deleted, _ = SyncTombstone.objects.filter(
+            removed_at__lt=timezone.now() - timedelta(days=days)
+        ).delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"{deleted} retrait(s) de plus de {days} jour(s) purgé(s)")
+        )
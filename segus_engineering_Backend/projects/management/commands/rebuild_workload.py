@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from projects.workload import rebuild_workload
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de capacité (charge journalière) des employés"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="Premier jour (AAAA-MM-JJ), défaut : il y a 90 jours")
+        parser.add_argument("--end", help="Dernier jour (AAAA-MM-JJ), défaut : dans 365 jours")
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Limiter la reconstruction à cet utilisateur (option répétable)",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        start = self.parse(options["start"], today - timedelta(days=90))
+        end = self.parse(options["end"], today + timedelta(days=365))
+        if start > end:
+            raise CommandError("--start doit précéder --end")
+
+        user_ids = options.get("user_ids") or list(
+            User.objects.filter(employee_profile__isnull=False).values_list("pk", flat=True)
+        )
+        days = rebuild_workload(user_ids, start, end)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Index de capacité reconstruit du {start} au {end}: "
+                f"{len(user_ids)} employé(s), {days} jour(s) chargé(s)"
+            )
+        )
+
+    @staticmethod
+    def parse(value, default):
+        if not value:
+            return default
+        parsed = parse_date(value)
+        if parsed is None:
+            raise CommandError(f"Date invalide: {value}")
+        return parsed
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from projects.services import recount_progress
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs de progression dénormalisés des projets et des tâches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--project",
+            type=int,
+            action="append",
+            dest="project_ids",
+            help="Limiter le recalcul à ce projet (option répétable)",
+        )
+
+    def handle(self, *args, **options):
+        fixed = recount_progress(options.get("project_ids"))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Compteurs corrigés: {fixed['tasks']} tâche(s), {fixed['projects']} projet(s), "
+                f"{fixed['sections']} section(s) repositionnée(s)"
+            )
+        )
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:48
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def _count(model, fk, **filters):
+    counts = (
+        model.objects.filter(**{fk: OuterRef("pk")}, **filters)
+        .order_by()
+        .values(fk)
+        .annotate(n=Count("pk"))
+        .values("n")
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def backfill_counters(apps, schema_editor):
+    """Initialiser les compteurs à partir des tâches et sous-tâches existantes"""
+    Project = apps.get_model("projects", "Project")
+    Task = apps.get_model("projects", "Task")
+    SubTask = apps.get_model("projects", "SubTask")
+
+    kilometrage = (
+        SubTask.objects.filter(task=OuterRef("pk"), is_completed=True)
+        .order_by()
+        .values("task")
+        .annotate(total=Sum("kilometrage"))
+        .values("total")
+    )
+    Task.objects.update(
+        subtask_count=_count(SubTask, "task"),
+        completed_subtask_count=_count(SubTask, "task", is_completed=True),
+        completed_kilometrage=Coalesce(
+            Subquery(kilometrage),
+            Value(Decimal("0.00")),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        ),
+    )
+    Project.objects.update(
+        task_count=_count(Task, "project"),
+        completed_task_count=_count(Task, "project", status="COMPLETED"),
+        in_progress_task_count=_count(Task, "project", status="IN_PROGRESS"),
+        blocked_task_count=_count(Task, "project", status="BLOCKED"),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("projects", "0002_alter_project_options_remove_project_date_debut_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="blocked_task_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="completed_task_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="in_progress_task_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="task_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="completed_kilometrage",
+            field=models.DecimalField(
+                decimal_places=2, default=Decimal("0.00"), editable=False, max_digits=12
+            ),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="completed_subtask_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="subtask_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
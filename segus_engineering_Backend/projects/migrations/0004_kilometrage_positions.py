@@ -0,0 +1,85 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:51
+
+import re
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def _natural_key(value):
+    return [
+        int(chunk) if chunk.isdigit() else chunk.lower()
+        for chunk in re.split(r"(\d+)", value or "")
+    ]
+
+
+def backfill_kilometrage(apps, schema_editor):
+    """Initialiser le kilométrage total des tâches et le PK de début des sections"""
+    Task = apps.get_model("projects", "Task")
+    SubTask = apps.get_model("projects", "SubTask")
+
+    totals = (
+        SubTask.objects.filter(task=OuterRef("pk"))
+        .order_by()
+        .values("task")
+        .annotate(total=Sum("kilometrage"))
+        .values("total")
+    )
+    Task.objects.update(
+        total_kilometrage=Coalesce(
+            Subquery(totals),
+            Value(Decimal("0.00")),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        )
+    )
+
+    sections = {}
+    for row in SubTask.objects.values_list("task_id", "pk", "section_number", "kilometrage"):
+        sections.setdefault(row[0], []).append(row[1:])
+    changed = []
+    for rows in sections.values():
+        position = Decimal("0.00")
+        for pk, _number, kilometrage in sorted(
+            rows, key=lambda row: (_natural_key(row[1]), row[0])
+        ):
+            changed.append(SubTask(pk=pk, km_start=position))
+            position += kilometrage
+    SubTask.objects.bulk_update(changed, ["km_start"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("projects", "0003_progress_counters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="subtask",
+            name="km_start",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=2,
+                editable=False,
+                help_text="Point kilométrique de début de la section dans sa tâche",
+                max_digits=12,
+                null=True,
+                verbose_name="PK de début",
+            ),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="total_kilometrage",
+            field=models.DecimalField(
+                decimal_places=2, default=Decimal("0.00"), editable=False, max_digits=12
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="subtask",
+            index=models.Index(fields=["task", "km_start"], name="projects_su_task_id_898687_idx"),
+        ),
+        migrations.RunPython(backfill_kilometrage, migrations.RunPython.noop),
+    ]
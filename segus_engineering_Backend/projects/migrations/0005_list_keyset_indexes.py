@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("projects", "0004_kilometrage_positions"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="subtask",
+            index=models.Index(
+                fields=["section_number", "id"], name="projects_su_section_73b0c6_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="subtask",
+            index=models.Index(fields=["updated_at"], name="projects_su_updated_6b3e69_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["-created_at", "id"], name="projects_ta_created_9d1484_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["updated_at"], name="projects_ta_updated_738d40_idx"),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("projects", "0005_list_keyset_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmployeeWorkload",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "task_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Tâches ouvertes"),
+                ),
+                (
+                    "subtask_count",
+                    models.PositiveIntegerField(default=0, verbose_name="Sous-tâches ouvertes"),
+                ),
+                (
+                    "worked_seconds",
+                    models.PositiveIntegerField(default=0, verbose_name="Temps travaillé (s)"),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="workload_days",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Charge journalière",
+                "verbose_name_plural": "Charges journalières",
+                "indexes": [
+                    models.Index(fields=["date", "user"], name="projects_em_date_a96e64_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "date"), name="unique_employee_workload_day"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:18
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("projects", "0006_employee_workload"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("model", models.CharField(max_length=20)),
+                ("object_id", models.PositiveBigIntegerField()),
+                ("removed_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Retrait synchronisé",
+                "verbose_name_plural": "Retraits synchronisés",
+                "indexes": [
+                    models.Index(
+                        fields=["model", "removed_at"], name="projects_sy_model_9dd561_idx"
+                    )
+                ],
+            },
+        ),
+    ]
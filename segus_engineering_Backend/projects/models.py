@@ -1,11 +1,92 @@
 # projects/models.py
 
+import re
+from decimal import ROUND_HALF_UP, Decimal
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Now
+from django.utils import timezone
 
 User = get_user_model()
 
 
+# Champ de compteur dénormalisé de Project pour chaque statut de tâche
+TASK_STATUS_COUNTERS = {
+    "COMPLETED": "completed_task_count",
+    "IN_PROGRESS": "in_progress_task_count",
+    "BLOCKED": "blocked_task_count",
+}
+
+_DIGITS = re.compile(r"(\d+)")
+
+KILOMETRAGE_FIELD = models.DecimalField(max_digits=12, decimal_places=2)
+
+
+def natural_key(value):
+    """Clé de tri naturel : "S2" avant "S10" """
+    return [
+        int(chunk) if chunk.isdigit() else chunk.lower() for chunk in _DIGITS.split(value or "")
+    ]
+
+
+def kilometrage_progress(completed, total):
+    """Pourcentage de kilomètres terminés"""
+    if not total:
+        return 0
+    return round(float(completed) / float(total) * 100, 2)
+
+
+def subtask_progress(completed, total, status=None):
+    """Pourcentage de sous-tâches terminées (une tâche sans section terminée vaut 100)"""
+    if not total:
+        return 100 if status == "COMPLETED" else 0
+    return round(completed / total * 100, 2)
+
+
+class ProjectQuerySet(models.QuerySet):
+    def with_live_progress(self):
+        """Annote les compteurs de tâches recalculés depuis la table des tâches"""
+        annotations = {"live_task_count": Count("tasks", distinct=True)}
+        for status, field in TASK_STATUS_COUNTERS.items():
+            annotations[f"live_{field}"] = Count(
+                "tasks", filter=Q(tasks__status=status), distinct=True
+            )
+        return self.annotate(**annotations)
+
+    def with_kilometrage(self):
+        """Annote le kilométrage total et terminé à partir des compteurs des tâches"""
+        zero = Value(Decimal("0.00"))
+        return self.annotate(
+            kilometrage_total=Coalesce(
+                Sum("tasks__total_kilometrage"), zero, output_field=KILOMETRAGE_FIELD
+            ),
+            kilometrage_completed=Coalesce(
+                Sum("tasks__completed_kilometrage"), zero, output_field=KILOMETRAGE_FIELD
+            ),
+        )
+
+
+class TaskQuerySet(models.QuerySet):
+    def with_live_progress(self):
+        """Annote les compteurs de sous-tâches recalculés depuis la table des sous-tâches"""
+        return self.annotate(
+            live_subtask_count=Count("subtasks"),
+            live_completed_subtask_count=Count("subtasks", filter=Q(subtasks__is_completed=True)),
+            live_total_kilometrage=Coalesce(
+                Sum("subtasks__kilometrage"),
+                Value(Decimal("0.00")),
+                output_field=KILOMETRAGE_FIELD,
+            ),
+            live_completed_kilometrage=Coalesce(
+                Sum("subtasks__kilometrage", filter=Q(subtasks__is_completed=True)),
+                Value(Decimal("0.00")),
+                output_field=KILOMETRAGE_FIELD,
+            ),
+        )
+
+
 class Project(models.Model):
     STATUS_CHOICES = [
         ("ACTIVE", "Actif"),
@@ -36,10 +117,18 @@ class Project(models.Model):
         verbose_name="Créé par",
     )
 
+    # Compteurs dénormalisés (maintenus par projects.signals)
+    task_count = models.PositiveIntegerField(default=0, editable=False)
+    completed_task_count = models.PositiveIntegerField(default=0, editable=False)
+    in_progress_task_count = models.PositiveIntegerField(default=0, editable=False)
+    blocked_task_count = models.PositiveIntegerField(default=0, editable=False)
+
     # Métadonnées
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProjectQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Projet"
         verbose_name_plural = "Projets"
@@ -48,22 +137,41 @@ class Project(models.Model):
     def __str__(self):
         return f"{self.title} ({self.get_status_display()})"
 
+    def count_tasks(self, status=None):
+        """Nombre de tâches (éventuellement pour un statut) lu depuis les compteurs"""
+        if status is None:
+            return self.task_count
+        if status == "TODO":
+            return self.task_count - sum(
+                getattr(self, field) for field in TASK_STATUS_COUNTERS.values()
+            )
+        return getattr(self, TASK_STATUS_COUNTERS[status])
+
     @property
     def progress_percentage(self):
         """Calcule le pourcentage d'avancement du projet"""
-        total_tasks = self.tasks.count()
+        total_tasks = self.total_tasks
         if total_tasks == 0:
             return 0
-        completed_tasks = self.tasks.filter(status="COMPLETED").count()
-        return round((completed_tasks / total_tasks) * 100, 2)
+        return round((self.completed_tasks / total_tasks) * 100, 2)
 
     @property
     def total_tasks(self):
-        return self.tasks.count()
+        return self.count_tasks()
 
     @property
     def completed_tasks(self):
-        return self.tasks.filter(status="COMPLETED").count()
+        return self.count_tasks("COMPLETED")
+
+    @property
+    def kilometrage_progress(self):
+        """Pourcentage d'avancement pondéré par le kilométrage des sections"""
+        if not hasattr(self, "kilometrage_total"):
+            totals = self.tasks.aggregate(
+                total=Sum("total_kilometrage"), completed=Sum("completed_kilometrage")
+            )
+            return kilometrage_progress(totals["completed"], totals["total"])
+        return kilometrage_progress(self.kilometrage_completed, self.kilometrage_total)
 
 
 class Task(models.Model):
@@ -112,34 +220,112 @@ class Task(models.Model):
         verbose_name="Créé par",
     )
 
+    # Compteurs dénormalisés (maintenus par projects.signals)
+    subtask_count = models.PositiveIntegerField(default=0, editable=False)
+    completed_subtask_count = models.PositiveIntegerField(default=0, editable=False)
+    total_kilometrage = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0.00"), editable=False
+    )
+    completed_kilometrage = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal("0.00"), editable=False
+    )
+
     # Métadonnées
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TaskQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Tâche"
         verbose_name_plural = "Tâches"
         ordering = ["priority", "-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "id"]),
+            models.Index(fields=["updated_at"]),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.project.title})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._progress_state = instance.progress_state()
+        instance._schedule_state = instance.schedule_state()
+        return instance
+
+    def progress_state(self):
+        """Contribution de la tâche aux compteurs de son projet"""
+        return (self.__dict__.get("project_id"), self.__dict__.get("status"))
+
+    def schedule_state(self):
+        """Contribution de la tâche à l'index de capacité (dates, ouverte ou non)"""
+        return (
+            self.__dict__.get("start_date"),
+            self.__dict__.get("end_date"),
+            self.__dict__.get("status") == "COMPLETED",
+        )
+
     @property
     def progress_percentage(self):
         """Calcule le pourcentage d'avancement de la tâche"""
-        total_subtasks = self.subtasks.count()
-        if total_subtasks == 0:
-            return 100 if self.status == "COMPLETED" else 0
-        completed_subtasks = self.subtasks.filter(is_completed=True).count()
-        return round((completed_subtasks / total_subtasks) * 100, 2)
+        return subtask_progress(self.completed_subtasks, self.total_subtasks, self.status)
 
     @property
     def total_subtasks(self):
-        return self.subtasks.count()
+        return self.subtask_count
 
     @property
     def completed_subtasks(self):
-        return self.subtasks.filter(is_completed=True).count()
+        return self.completed_subtask_count
+
+    @property
+    def kilometrage_progress(self):
+        """Pourcentage d'avancement pondéré par le kilométrage des sections"""
+        return kilometrage_progress(self.completed_kilometrage, self.total_kilometrage)
+
+    def lock(self):
+        """Verrou de ligne sur la tâche (jusqu'à la fin de la transaction en cours)"""
+        list(Task.objects.select_for_update().filter(pk=self.pk).values_list("pk", flat=True))
+
+    def reindex_kilometrage(self):
+        """
+        Recalcule le point kilométrique de début (km_start) de chaque section :
+        les sections sont mises bout à bout dans l'ordre naturel de section_number.
+        Retourne le nombre de sections modifiées.
+        """
+        with transaction.atomic():
+            # Deux repositionnements concurrents de la même tâche se suivent
+            self.lock()
+            sections = sorted(
+                self.subtasks.order_by().values_list(
+                    "pk", "section_number", "kilometrage", "km_start"
+                ),
+                key=lambda row: (natural_key(row[1]), row[0]),
+            )
+            position = Decimal("0.00")
+            now = timezone.now()
+            changed = []
+            for pk, _number, kilometrage, km_start in sections:
+                if km_start != position:
+                    changed.append(SubTask(pk=pk, km_start=position, updated_at=now))
+                position += kilometrage
+            SubTask.objects.bulk_update(changed, ["km_start", "updated_at"], batch_size=1000)
+        return len(changed)
+
+    def shift_kilometrage(self, subtask_id, delta):
+        """
+        Décale de `delta` les sections placées après `subtask_id` (longueur de
+        cette section modifiée) en un seul UPDATE. La position de référence est
+        relue en base : une instance chargée avant un repositionnement reste juste.
+        """
+        with transaction.atomic():
+            self.lock()
+            position = SubTask.objects.filter(pk=subtask_id).values("km_start")
+            return self.subtasks.filter(km_start__gt=Subquery(position)).update(
+                km_start=F("km_start") + delta, updated_at=Now()
+            )
 
 
 class SubTask(models.Model):
@@ -152,6 +338,15 @@ class SubTask(models.Model):
         verbose_name="Kilométrage",
         help_text="Kilométrage correspondant à la section",
     )
+    km_start = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="PK de début",
+        help_text="Point kilométrique de début de la section dans sa tâche",
+    )
     is_completed = models.BooleanField(default=False, verbose_name="Terminée")
 
     # Relations
@@ -180,24 +375,49 @@ class SubTask(models.Model):
         verbose_name = "Sous-tâche"
         verbose_name_plural = "Sous-tâches"
         ordering = ["section_number"]
+        indexes = [
+            models.Index(fields=["task", "km_start"]),
+            models.Index(fields=["section_number", "id"]),
+            models.Index(fields=["updated_at"]),
+        ]
+
+    @staticmethod
+    def quantize_kilometrage(value):
+        """Arrondit le kilométrage à 2 décimales"""
+        return Decimal(value).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
     def save(self, *args, **kwargs):
         # Quantize kilometrage to 2 decimals to ensure precision in tests
         if self.kilometrage is not None:
-            from decimal import Decimal, ROUND_HALF_UP
-
-            self.kilometrage = (
-                Decimal(self.kilometrage).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-            )
+            self.kilometrage = self.quantize_kilometrage(self.kilometrage)
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.section_name} ({self.section_number})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._progress_state = instance.progress_state()
+        return instance
+
+    def progress_state(self):
+        """Contribution de la sous-tâche aux compteurs de sa tâche"""
+        return (
+            self.__dict__.get("task_id"),
+            self.__dict__.get("is_completed"),
+            self.__dict__.get("kilometrage"),
+            self.__dict__.get("section_number"),
+        )
+
+    @property
+    def km_end(self):
+        if self.km_start is None:
+            return None
+        return self.km_start + self.kilometrage
+
     def mark_completed(self):
         """Marque la sous-tâche comme terminée"""
-        from django.utils import timezone
-
         self.is_completed = True
         self.completed_at = timezone.now()
         self.save()
@@ -207,3 +427,44 @@ class SubTask(models.Model):
         self.is_completed = False
         self.completed_at = None
         self.save()
+
+
+class EmployeeWorkload(models.Model):
+    """Index de capacité : charge d'un employé pour un jour (maintenu par projects.workload)"""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="workload_days")
+    date = models.DateField()
+    task_count = models.PositiveIntegerField(default=0, verbose_name="Tâches ouvertes")
+    subtask_count = models.PositiveIntegerField(default=0, verbose_name="Sous-tâches ouvertes")
+    worked_seconds = models.PositiveIntegerField(default=0, verbose_name="Temps travaillé (s)")
+
+    class Meta:
+        verbose_name = "Charge journalière"
+        verbose_name_plural = "Charges journalières"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "date"], name="unique_employee_workload_day")
+        ]
+        indexes = [models.Index(fields=["date", "user"])]
+
+    def __str__(self):
+        return f"{self.user} - {self.date}: {self.task_count} tâche(s)"
+
+
+class SyncTombstone(models.Model):
+    """Ligne sortie d'une liste synchronisée par ?since (suppression ou désaffectation)"""
+
+    model = models.CharField(max_length=20)
+    object_id = models.PositiveBigIntegerField()
+    # Vide : ligne supprimée pour tous ; sinon, retirée de la liste de cet utilisateur
+    user = models.ForeignKey(
+        User, null=True, blank=True, on_delete=models.CASCADE, related_name="+"
+    )
+    removed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Retrait synchronisé"
+        verbose_name_plural = "Retraits synchronisés"
+        indexes = [models.Index(fields=["model", "removed_at"])]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} retiré le {self.removed_at}"
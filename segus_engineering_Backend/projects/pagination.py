@@ -0,0 +1,181 @@
+# projects/pagination.py
+
+import base64
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .models import SyncTombstone
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pagination par clé (keyset) sur un ordre total `ordering`, ex. ("section_number", "id").
+
+    Le curseur encode les valeurs de la dernière ligne servie ; la page suivante
+    est filtrée par comparaison de tuple, sans OFFSET. Opt-in : la pagination ne
+    s'applique que si `cursor`, `page_size` ou `since` est fourni, l'ancienne
+    liste complète reste servie sinon.
+
+    `?since=<updated_at ISO>` limite aux lignes modifiées depuis la dernière
+    synchronisation ; la réponse fournit `synced_at` à renvoyer au prochain appel.
+    La première page d'un delta liste aussi dans `removed` les ids sortis de la
+    liste depuis `since` (suppression, ou désaffectation de l'employé filtré, voir
+    `removal_user_id` de la vue), d'après les SyncTombstone ; les ids inconnus du
+    client sont à ignorer. Une ligne qui sort
+    d'un autre filtre (statut, complétion...) est renvoyée dans `results` avec ses
+    nouvelles valeurs. Un `since` antérieur à PROJECTS_SYNC_RETENTION_DAYS est
+    refusé (400) : le client doit alors resynchroniser la liste complète.
+    """
+
+    ordering = ("-created_at", "id")
+    page_size = 100
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    since_query_param = "since"
+    since_field = "updated_at"
+
+    def is_requested(self, request):
+        params = request.query_params
+        return any(
+            name in params
+            for name in (
+                self.cursor_query_param,
+                self.page_size_query_param,
+                self.since_query_param,
+            )
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        # Horodatage pris avant la lecture : aucune modification concurrente n'est perdue
+        self.synced_at = timezone.now()
+        self.page_size = self.get_page_size(request)
+
+        since = request.query_params.get(self.since_query_param)
+        cursor = request.query_params.get(self.cursor_query_param)
+        self.removed = None
+        if since:
+            since = self.parse_since(since)
+            if not cursor:
+                self.removed = self.get_removed(queryset, since, view)
+            queryset = queryset.filter(**{f"{self.since_field}__gte": since})
+
+        if cursor:
+            queryset = queryset.filter(self.after(self.decode_cursor(cursor)))
+
+        rows = list(queryset.order_by(*self.ordering)[: self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        self.last = rows[-1] if rows else None
+        return rows
+
+    def get_removed(self, queryset, since, view=None):
+        """Ids retirés depuis `since` et absents de la liste actuelle (ré-ajouts exclus)"""
+        user_id = getattr(view, "removal_user_id", lambda: None)()
+        scope = Q(user__isnull=True)
+        if user_id:
+            scope |= Q(user_id=user_id)
+        return list(
+            SyncTombstone.objects.filter(
+                scope, model=queryset.model._meta.model_name, removed_at__gte=since
+            )
+            .exclude(object_id__in=queryset.order_by().values("pk"))
+            .order_by("object_id")
+            .values_list("object_id", flat=True)
+            .distinct()
+        )
+
+    def get_paginated_response(self, data):
+        payload = {"next": self.get_next_link(), "synced_at": self.synced_at.isoformat()}
+        if self.removed is not None:
+            payload["removed"] = self.removed
+        payload["results"] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "synced_at": {"type": "string", "format": "date-time"},
+                "removed": {"type": "array", "items": {"type": "integer"}},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            raise ValidationError({"page_size": "Doit être un entier."}) from None
+        return max(1, min(size, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        values = [self.field_value(self.last, field) for field in self.ordering]
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values))
+
+    def parse_since(self, value):
+        since = parse_datetime(value)
+        if since is None:
+            raise ValidationError({self.since_query_param: "Date ISO 8601 attendue."})
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        retention = timedelta(days=getattr(settings, "PROJECTS_SYNC_RETENTION_DAYS", 30))
+        if since < timezone.now() - retention:
+            raise ValidationError(
+                {self.since_query_param: "Synchronisation trop ancienne : recharger la liste."}
+            )
+        return since
+
+    def after(self, values):
+        """Q() sélectionnant les lignes strictement après `values` dans l'ordre"""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return condition
+
+    @staticmethod
+    def field_value(obj, field):
+        value = getattr(obj, field.lstrip("-"))
+        return value.isoformat() if isinstance(value, datetime) else value
+
+    @staticmethod
+    def encode_cursor(values):
+        return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            values = None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise ValidationError({self.cursor_query_param: "Curseur invalide."})
+        return values
+
+
+class TaskKeysetPagination(KeysetPagination):
+    ordering = ("-created_at", "id")
+
+
+class SubTaskKeysetPagination(KeysetPagination):
+    ordering = ("section_number", "id")
@@ -1,9 +1,15 @@
 # projects/serializers.py
 
+import csv
+import io
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model
+from django.db.models import F
 from rest_framework import serializers
 
-from .models import Project, SubTask, Task
+from .models import Project, SubTask, Task, natural_key
+from .services import resolve_assignees
 
 User = get_user_model()
 
@@ -36,6 +42,7 @@ class SubTaskSerializer(serializers.ModelSerializer):
             "section_number",
             "section_id",
             "kilometrage",
+            "km_start",
             "is_completed",
             "completed_at",
             "task",
@@ -52,6 +59,8 @@ class SubTaskSerializer(serializers.ModelSerializer):
         try:
             if data.get("kilometrage") is not None:
                 data["kilometrage"] = float(instance.kilometrage)
+            if data.get("km_start") is not None:
+                data["km_start"] = float(instance.km_start)
         except Exception:
             pass
         return data
@@ -62,12 +71,8 @@ class SubTaskSerializer(serializers.ModelSerializer):
 
         if assigned_employee_ids:
             # Convertir les IDs d'employés en IDs d'utilisateurs
-            from employees.models import Employee
-
-            employee_objects = Employee.objects.filter(id__in=assigned_employee_ids)
-            user_ids = [emp.user.id for emp in employee_objects]
-            employees = User.objects.filter(id__in=user_ids, role="EMPLOYE")
-            subtask.assigned_employees.set(employees)
+            users, _unknown = resolve_assignees(assigned_employee_ids)
+            subtask.assigned_employees.set(users)
 
         return subtask
 
@@ -80,17 +85,8 @@ class SubTaskSerializer(serializers.ModelSerializer):
 
         if assigned_employee_ids is not None:
             # Convertir les IDs d'employés en IDs d'utilisateurs
-            from employees.models import Employee
-
-            employee_objects = Employee.objects.filter(id__in=assigned_employee_ids)
-            user_ids = [emp.user.id for emp in employee_objects]
-            print(
-                f"DEBUG UPDATE: Converting employee IDs {assigned_employee_ids} to user IDs {user_ids}"
-            )
-
-            employees = User.objects.filter(id__in=user_ids, role="EMPLOYE")
-            print(f"DEBUG UPDATE: Found {employees.count()} users with role EMPLOYE for update")
-            instance.assigned_employees.set(employees)
+            users, _unknown = resolve_assignees(assigned_employee_ids)
+            instance.assigned_employees.set(users)
 
         return instance
 
@@ -107,6 +103,7 @@ class TaskSerializer(serializers.ModelSerializer):
     progress_percentage = serializers.ReadOnlyField()
     total_subtasks = serializers.ReadOnlyField()
     completed_subtasks = serializers.ReadOnlyField()
+    kilometrage_progress = serializers.ReadOnlyField()
 
     class Meta:
         model = Task
@@ -126,6 +123,9 @@ class TaskSerializer(serializers.ModelSerializer):
             "progress_percentage",
             "total_subtasks",
             "completed_subtasks",
+            "total_kilometrage",
+            "completed_kilometrage",
+            "kilometrage_progress",
             "created_at",
             "updated_at",
         ]
@@ -136,12 +136,8 @@ class TaskSerializer(serializers.ModelSerializer):
 
         if assigned_employee_ids:
             # Convertir les IDs d'employés en IDs d'utilisateurs
-            from employees.models import Employee
-
-            employee_objects = Employee.objects.filter(id__in=assigned_employee_ids)
-            user_ids = [emp.user.id for emp in employee_objects]
-            employees = User.objects.filter(id__in=user_ids, role="EMPLOYE")
-            task.assigned_employees.set(employees)
+            users, _unknown = resolve_assignees(assigned_employee_ids)
+            task.assigned_employees.set(users)
 
         return task
 
@@ -154,12 +150,8 @@ class TaskSerializer(serializers.ModelSerializer):
 
         if assigned_employee_ids is not None:
             # Convertir les IDs d'employés en IDs d'utilisateurs
-            from employees.models import Employee
-
-            employee_objects = Employee.objects.filter(id__in=assigned_employee_ids)
-            user_ids = [emp.user.id for emp in employee_objects]
-            employees = User.objects.filter(id__in=user_ids, role="EMPLOYE")
-            instance.assigned_employees.set(employees)
+            users, _unknown = resolve_assignees(assigned_employee_ids)
+            instance.assigned_employees.set(users)
 
         return instance
 
@@ -168,6 +160,7 @@ class TaskSimpleSerializer(serializers.ModelSerializer):
     """Serializer simple pour les tâches dans les relations"""
 
     progress_percentage = serializers.ReadOnlyField()
+    kilometrage_progress = serializers.ReadOnlyField()
 
     class Meta:
         model = Task
@@ -177,11 +170,51 @@ class TaskSimpleSerializer(serializers.ModelSerializer):
             "status",
             "priority",
             "progress_percentage",
+            "kilometrage_progress",
             "start_date",
             "end_date",
         ]
 
 
+class TaskListSerializer(serializers.ModelSerializer):
+    """Représentation compacte des tâches pour les listes paginées / synchronisées"""
+
+    assigned_employees = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    progress_percentage = serializers.ReadOnlyField()
+    kilometrage_progress = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Task
+        fields = [
+            "id",
+            "project",
+            "status",
+            "progress_percentage",
+            "subtask_count",
+            "completed_subtask_count",
+            "kilometrage_progress",
+            "assigned_employees",
+            "updated_at",
+        ]
+
+
+class SubTaskListSerializer(serializers.ModelSerializer):
+    """Représentation compacte des sous-tâches pour les listes paginées / synchronisées"""
+
+    assigned_employees = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+    class Meta:
+        model = SubTask
+        fields = [
+            "id",
+            "task",
+            "section_number",
+            "is_completed",
+            "assigned_employees",
+            "updated_at",
+        ]
+
+
 class ProjectSerializer(serializers.ModelSerializer):
     assigned_employees = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
     assigned_employee_ids = serializers.ListField(
@@ -194,6 +227,7 @@ class ProjectSerializer(serializers.ModelSerializer):
     progress_percentage = serializers.ReadOnlyField()
     total_tasks = serializers.ReadOnlyField()
     completed_tasks = serializers.ReadOnlyField()
+    kilometrage_progress = serializers.ReadOnlyField()
 
     class Meta:
         model = Project
@@ -211,55 +245,19 @@ class ProjectSerializer(serializers.ModelSerializer):
             "progress_percentage",
             "total_tasks",
             "completed_tasks",
+            "kilometrage_progress",
             "created_at",
             "updated_at",
         ]
 
     def create(self, validated_data):
-        print(f"DEBUG: Raw validated_data received: {validated_data}")
         assigned_employee_ids = validated_data.pop("assigned_employee_ids", [])
-        print(f"DEBUG: Extracted assigned_employee_ids: {assigned_employee_ids}")
-
         project = Project.objects.create(**validated_data)
-        print(f"DEBUG: Project created with ID: {project.id}")
 
         if assigned_employee_ids:
-            print(f"DEBUG: Assigning employees with IDs: {assigned_employee_ids}")
-            # Vérifier tous les utilisateurs avec ces IDs
-            all_users = User.objects.filter(id__in=assigned_employee_ids)
-            print(f"DEBUG: All users found with these IDs: {all_users.count()} users")
-            if all_users.count() == 0:
-                print(f"DEBUG: AUCUN utilisateur trouvé avec les IDs: {assigned_employee_ids}")
-                print("DEBUG: Vérification de tous les utilisateurs existants:")
-                all_existing_users = User.objects.all()
-                for user in all_existing_users:
-                    print(
-                        f"DEBUG: Existing User ID={user.id}, username={user.username}, email={user.email}, role={user.role}"
-                    )
-            else:
-                for user in all_users:
-                    print(
-                        f"DEBUG: User ID={user.id}, username={user.username}, email={user.email}, role={user.role}"
-                    )
-
-            # Convertir les IDs d'employés en IDs d'utilisateurs
-            from employees.models import Employee
-
-            employee_objects = Employee.objects.filter(id__in=assigned_employee_ids)
-            user_ids = [emp.user.id for emp in employee_objects]
-            print(f"DEBUG: Converting employee IDs {assigned_employee_ids} to user IDs {user_ids}")
-
-            # Filtrer seulement les employés avec rôle EMPLOYE
-            employees = User.objects.filter(id__in=user_ids, role="EMPLOYE")
-            print(f"DEBUG: Found {employees.count()} users with role EMPLOYE to assign")
-            for emp in employees:
-                print(
-                    f"DEBUG: User to assign: ID={emp.id}, username={emp.username}, role={emp.role}"
-                )
-            project.assigned_employees.set(employees)
-            print(f"DEBUG: Successfully assigned {project.assigned_employees.count()} employees")
-        else:
-            print("DEBUG: No assigned_employee_ids provided - no employees will be assigned")
+            # Convertir les IDs d'employés en IDs d'utilisateurs (rôle EMPLOYE)
+            users, _unknown = resolve_assignees(assigned_employee_ids)
+            project.assigned_employees.set(users)
 
         return project
 
@@ -272,12 +270,8 @@ class ProjectSerializer(serializers.ModelSerializer):
 
         if assigned_employee_ids is not None:
             # Convertir les IDs d'employés en IDs d'utilisateurs
-            from employees.models import Employee
-
-            employee_objects = Employee.objects.filter(id__in=assigned_employee_ids)
-            user_ids = [emp.user.id for emp in employee_objects]
-            employees = User.objects.filter(id__in=user_ids, role="EMPLOYE")
-            instance.assigned_employees.set(employees)
+            users, _unknown = resolve_assignees(assigned_employee_ids)
+            instance.assigned_employees.set(users)
 
         return instance
 
@@ -315,12 +309,8 @@ class ProjectCreateSerializer(serializers.ModelSerializer):
         project = Project.objects.create(**validated_data)
 
         if assigned_employee_ids:
-            from employees.models import Employee
-
-            employee_objects = Employee.objects.filter(id__in=assigned_employee_ids)
-            user_ids = [emp.user.id for emp in employee_objects]
-            employees = User.objects.filter(id__in=user_ids, role="EMPLOYE")
-            project.assigned_employees.set(employees)
+            users, _unknown = resolve_assignees(assigned_employee_ids)
+            project.assigned_employees.set(users)
 
         return project
 
@@ -351,12 +341,8 @@ class ProjectUpdateSerializer(serializers.ModelSerializer):
         instance.save()
 
         if assigned_employee_ids is not None:
-            from employees.models import Employee
-
-            employee_objects = Employee.objects.filter(id__in=assigned_employee_ids)
-            user_ids = [emp.user.id for emp in employee_objects]
-            employees = User.objects.filter(id__in=user_ids, role="EMPLOYE")
-            instance.assigned_employees.set(employees)
+            users, _unknown = resolve_assignees(assigned_employee_ids)
+            instance.assigned_employees.set(users)
 
         return instance
 
@@ -386,12 +372,8 @@ class TaskCreateSerializer(serializers.ModelSerializer):
         task = Task.objects.create(**validated_data)
 
         if assigned_employee_ids:
-            from employees.models import Employee
-
-            employee_objects = Employee.objects.filter(id__in=assigned_employee_ids)
-            user_ids = [emp.user.id for emp in employee_objects]
-            employees = User.objects.filter(id__in=user_ids, role="EMPLOYE")
-            task.assigned_employees.set(employees)
+            users, _unknown = resolve_assignees(assigned_employee_ids)
+            task.assigned_employees.set(users)
 
         return task
 
@@ -423,12 +405,8 @@ class TaskUpdateSerializer(serializers.ModelSerializer):
         instance.save()
 
         if assigned_employee_ids is not None:
-            from employees.models import Employee
-
-            employee_objects = Employee.objects.filter(id__in=assigned_employee_ids)
-            user_ids = [emp.user.id for emp in employee_objects]
-            employees = User.objects.filter(id__in=user_ids, role="EMPLOYE")
-            instance.assigned_employees.set(employees)
+            users, _unknown = resolve_assignees(assigned_employee_ids)
+            instance.assigned_employees.set(users)
 
         return instance
 
@@ -456,12 +434,8 @@ class SubTaskCreateSerializer(serializers.ModelSerializer):
         subtask = SubTask.objects.create(**validated_data)
 
         if assigned_employee_ids:
-            from employees.models import Employee
-
-            employee_objects = Employee.objects.filter(id__in=assigned_employee_ids)
-            user_ids = [emp.user.id for emp in employee_objects]
-            employees = User.objects.filter(id__in=user_ids, role="EMPLOYE")
-            subtask.assigned_employees.set(employees)
+            users, _unknown = resolve_assignees(assigned_employee_ids)
+            subtask.assigned_employees.set(users)
 
         return subtask
 
@@ -492,11 +466,152 @@ class SubTaskUpdateSerializer(serializers.ModelSerializer):
         instance.save()
 
         if assigned_employee_ids is not None:
-            from employees.models import Employee
-
-            employee_objects = Employee.objects.filter(id__in=assigned_employee_ids)
-            user_ids = [emp.user.id for emp in employee_objects]
-            employees = User.objects.filter(id__in=user_ids, role="EMPLOYE")
-            instance.assigned_employees.set(employees)
+            users, _unknown = resolve_assignees(assigned_employee_ids)
+            instance.assigned_employees.set(users)
 
         return instance
+
+
+class BulkAssignmentSerializer(serializers.Serializer):
+    """Assignation en masse d'employés (ids ou matricules) à des projets, tâches ou sous-tâches"""
+
+    MAX_OBJECTS = 5000
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=MAX_OBJECTS
+    )
+    employee_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list
+    )
+    matricules = serializers.ListField(
+        child=serializers.CharField(max_length=20), required=False, default=list
+    )
+
+    def validate(self, attrs):
+        if not attrs["employee_ids"] and not attrs["matricules"]:
+            raise serializers.ValidationError("Fournir employee_ids et/ou matricules.")
+        return attrs
+
+
+class SubTaskRowSerializer(serializers.ModelSerializer):
+    """Une ligne (section) d'une création de sous-tâches en masse"""
+
+    # Même précision que SubTask.kilometrage : un dépassement est une erreur de ligne
+    kilometrage = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=Decimal("0.01")
+    )
+
+    class Meta:
+        model = SubTask
+        fields = ["section_name", "section_number", "section_id", "kilometrage"]
+
+
+class SubTaskBulkCreateSerializer(serializers.Serializer):
+    """Création de sections en masse : tableau JSON `sections` ou fichier CSV `file`"""
+
+    MAX_ROWS = 5000
+    CSV_COLUMNS = ["section_name", "section_number", "section_id", "kilometrage"]
+
+    task = serializers.PrimaryKeyRelatedField(queryset=Task.objects.all())
+    sections = serializers.ListField(
+        child=serializers.DictField(), required=False, max_length=MAX_ROWS
+    )
+    file = serializers.FileField(required=False)
+    employee_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list
+    )
+    matricules = serializers.ListField(
+        child=serializers.CharField(max_length=20), required=False, default=list
+    )
+
+    def validate(self, attrs):
+        upload = attrs.pop("file", None)
+        if bool(upload) == bool(attrs.get("sections")):
+            raise serializers.ValidationError(
+                "Fournir soit `sections`, soit un fichier CSV `file`."
+            )
+        if upload:
+            attrs["sections"] = self._read_csv(upload)
+        return attrs
+
+    def _read_csv(self, upload):
+        try:
+            text = upload.read().decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise serializers.ValidationError(
+                {"file": "Le fichier doit être encodé en UTF-8."}
+            ) from None
+
+        try:
+            dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+        missing = [column for column in self.CSV_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise serializers.ValidationError(
+                {"file": f"Colonnes manquantes : {', '.join(missing)}"}
+            )
+
+        rows = [{column: row[column] for column in self.CSV_COLUMNS} for row in reader]
+        if not rows:
+            raise serializers.ValidationError({"file": "Le fichier ne contient aucune section."})
+        if len(rows) > self.MAX_ROWS:
+            raise serializers.ValidationError(
+                {"file": f"Au plus {self.MAX_ROWS} sections par fichier."}
+            )
+        return rows
+
+
+class SubTaskBulkCompletionSerializer(serializers.Serializer):
+    """
+    Complétion en masse des sections d'une tâche, désignées par `ids`, par une
+    plage de numéros (`section_from`/`section_to`) ou par une plage kilométrique.
+    """
+
+    task = serializers.PrimaryKeyRelatedField(queryset=Task.objects.all())
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False, max_length=5000
+    )
+    section_from = serializers.CharField(required=False)
+    section_to = serializers.CharField(required=False)
+    km_from = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    km_to = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    completed = serializers.BooleanField(default=True)
+
+    def validate(self, attrs):
+        selectors = [
+            "ids" in attrs,
+            "section_from" in attrs or "section_to" in attrs,
+            "km_from" in attrs or "km_to" in attrs,
+        ]
+        if sum(selectors) != 1:
+            raise serializers.ValidationError(
+                "Désigner les sections par `ids`, par une plage de sections ou par une plage kilométrique."
+            )
+        return attrs
+
+    def selected_subtask_ids(self):
+        """Identifiants des sections désignées (dans la tâche)"""
+        data = self.validated_data
+        subtasks = data["task"].subtasks.all()
+        if "ids" in data:
+            return data["ids"]
+
+        if "km_from" in data or "km_to" in data:
+            if "km_from" in data:
+                subtasks = subtasks.filter(km_start__gte=data["km_from"])
+            if "km_to" in data:
+                subtasks = subtasks.alias(km_end=F("km_start") + F("kilometrage")).filter(
+                    km_end__lte=data["km_to"]
+                )
+            return list(subtasks.values_list("pk", flat=True))
+
+        low = natural_key(data["section_from"]) if "section_from" in data else None
+        high = natural_key(data["section_to"]) if "section_to" in data else None
+        return [
+            pk
+            for pk, number in subtasks.values_list("pk", "section_number")
+            if (low is None or natural_key(number) >= low)
+            and (high is None or natural_key(number) <= high)
+        ]
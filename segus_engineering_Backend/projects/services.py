@@ -0,0 +1,319 @@
+# projects/services.py
+
+from decimal import Decimal
+
+from django.db import router, transaction
+from django.db.models import F, Q
+from django.db.models.signals import m2m_changed
+from django.utils import timezone
+
+from .cache import invalidate_employee_dashboards
+from .models import TASK_STATUS_COUNTERS, Project, SubTask, Task, subtask_progress
+from .signals import assigned_user_ids, shift_counters, subtasks_completion_changed
+from .workload import batched_workload, employee_daily_load
+
+TASK_PROGRESS_FIELDS = [
+    "subtask_count",
+    "completed_subtask_count",
+    "total_kilometrage",
+    "completed_kilometrage",
+]
+PROJECT_PROGRESS_FIELDS = ["task_count", *TASK_STATUS_COUNTERS.values()]
+
+
+def _repair(queryset, fields):
+    """Compare les compteurs stockés aux valeurs recalculées et corrige les écarts"""
+    model = queryset.model
+    stale = []
+    for obj in queryset.only("pk", *fields).order_by("pk").iterator(chunk_size=2000):
+        changed = False
+        for field in fields:
+            live = getattr(obj, f"live_{field}")
+            if getattr(obj, field) != live:
+                setattr(obj, field, live)
+                changed = True
+        if changed:
+            stale.append(obj)
+    model.objects.bulk_update(stale, fields, batch_size=500)
+    return len(stale)
+
+
+def recount_progress(project_ids=None):
+    """
+    Recalcule les compteurs de progression des tâches puis des projets, ainsi
+    que les points kilométriques des sections. Retourne le nombre de lignes corrigées.
+    """
+    tasks = Task.objects.all()
+    projects = Project.objects.all()
+    if project_ids:
+        tasks = tasks.filter(project_id__in=project_ids)
+        projects = projects.filter(pk__in=project_ids)
+    return {
+        "tasks": _repair(tasks.with_live_progress(), TASK_PROGRESS_FIELDS),
+        "projects": _repair(projects.with_live_progress(), PROJECT_PROGRESS_FIELDS),
+        "sections": sum(task.reindex_kilometrage() for task in tasks.only("pk")),
+    }
+
+
+def kilometrage_spans(subtasks, km_from=None, km_to=None):
+    """
+    Plages kilométriques terminées / restantes par tâche, les sections contiguës
+    de même état étant fusionnées. Les bornes optionnelles découpent le résultat.
+    """
+    rows = subtasks.filter(km_start__isnull=False)
+    if km_from is not None:
+        rows = rows.alias(km_end=F("km_start") + F("kilometrage")).filter(km_end__gt=km_from)
+    if km_to is not None:
+        rows = rows.filter(km_start__lt=km_to)
+    rows = rows.order_by("task_id", "km_start").values_list(
+        "task_id", "km_start", "kilometrage", "is_completed"
+    )
+
+    spans = {}
+    current = None  # [task_id, is_completed, start, end]
+
+    def flush():
+        if current and current[3] > current[2]:
+            task_spans = spans.setdefault(
+                current[0], {"task": current[0], "completed": [], "pending": []}
+            )
+            key = "completed" if current[1] else "pending"
+            task_spans[key].append([float(current[2]), float(current[3])])
+
+    for task_id, start, kilometrage, is_completed in rows.iterator(chunk_size=5000):
+        end = start + kilometrage
+        if km_from is not None:
+            start = max(start, km_from)
+        if km_to is not None:
+            end = min(end, km_to)
+        if current and current[:2] == [task_id, is_completed] and current[3] == start:
+            current[3] = end
+            continue
+        flush()
+        current = [task_id, is_completed, start, end]
+    flush()
+    return list(spans.values())
+
+
+TIMELINE_FIELDS = ["id", "project", "start", "end", "status", "progress", "overdue", "assignees"]
+
+
+def task_timeline(tasks, window_start=None, window_end=None, today=None):
+    """
+    Frise (Gantt) compacte des tâches `tasks`, en une seule requête : une ligne
+    par tâche dans l'ordre de TIMELINE_FIELDS, les dates clés et la charge
+    journalière de chaque employé. Une fenêtre optionnelle filtre les tâches
+    qui la chevauchent et borne la charge.
+    """
+    today = today or timezone.localdate()
+    if window_start is not None:
+        tasks = tasks.filter(end_date__gte=window_start)
+    if window_end is not None:
+        tasks = tasks.filter(start_date__lte=window_end)
+    rows = tasks.order_by("start_date", "id").values_list(
+        "id",
+        "project_id",
+        "start_date",
+        "end_date",
+        "status",
+        "subtask_count",
+        "completed_subtask_count",
+        "assigned_employees",
+    )
+
+    timeline = {}
+    for task_id, project_id, start, end, status, total, completed, user_id in rows:
+        row = timeline.get(task_id)
+        if row is None:
+            row = timeline[task_id] = [
+                task_id,
+                project_id,
+                start,
+                end,
+                status,
+                subtask_progress(completed, total, status),
+                end < today and status != "COMPLETED",
+                [],
+            ]
+        if user_id is not None:
+            row[7].append(user_id)
+    rows = list(timeline.values())
+
+    open_ends = [row[3] for row in rows if row[4] != "COMPLETED" and row[3] >= today]
+    load = employee_daily_load(
+        ((user_id, row[2], row[3]) for row in rows for user_id in row[7]),
+        window_start,
+        window_end,
+    )
+    return {
+        "fields": TIMELINE_FIELDS,
+        "tasks": rows,
+        "critical_dates": {
+            "start": min((row[2] for row in rows), default=None),
+            "end": max((row[3] for row in rows), default=None),
+            "next_deadline": min(open_ends, default=None),
+            "overdue": sum(1 for row in rows if row[6]),
+        },
+        "load": load,
+    }
+
+
+def resolve_assignees(employee_ids=(), matricules=()):
+    """
+    Résout des identifiants d'employés et/ou des matricules en utilisateurs de
+    rôle EMPLOYE, en une seule requête. Retourne (utilisateurs, non résolus).
+    """
+    from employees.models import Employee
+
+    employee_ids = list(employee_ids or [])
+    matricules = list(matricules or [])
+    if not employee_ids and not matricules:
+        return [], []
+
+    employees = Employee.objects.filter(
+        Q(pk__in=employee_ids) | Q(matricule__in=matricules), user__role="EMPLOYE"
+    ).select_related("user")
+    users = {}
+    found = set()
+    for employee in employees:
+        users[employee.user_id] = employee.user
+        found.update([employee.pk, employee.matricule])
+    unknown = [value for value in employee_ids + matricules if value not in found]
+    return list(users.values()), unknown
+
+
+def _send_reverse_m2m(model, users, pairs, action):
+    """
+    Émet m2m_changed côté utilisateur (une fois par utilisateur) pour que les
+    récepteurs existants (cache, registre de gamification...) restent synchronisés.
+    """
+    through = model.assigned_employees.through
+    using = router.db_for_write(through)
+    for user in users:
+        pk_set = {obj_id for obj_id, user_id in pairs if user_id == user.pk}
+        if pk_set:
+            m2m_changed.send(
+                sender=through,
+                instance=user,
+                action=action,
+                reverse=True,
+                model=model,
+                pk_set=pk_set,
+                using=using,
+            )
+
+
+def _assignment_pairs(model, object_ids, users):
+    """Objets existants parmi object_ids et couples (objet, utilisateur) déjà assignés"""
+    through = model.assigned_employees.through
+    fk = f"{model._meta.model_name}_id"
+    object_ids = list(model.objects.filter(pk__in=object_ids).values_list("pk", flat=True))
+    existing = set(
+        through.objects.filter(
+            **{f"{fk}__in": object_ids, "user_id__in": [user.pk for user in users]}
+        ).values_list(fk, "user_id")
+    )
+    return through, fk, object_ids, existing
+
+
+def bulk_assign(model, object_ids, users):
+    """
+    Assigne tous les utilisateurs à tous les objets (Project, Task ou SubTask)
+    avec un seul bulk_create sur la table d'association.
+    Retourne {"objects": [...], "pairs": {(objet, utilisateur), ...}} des ajouts.
+    """
+    through, fk, object_ids, existing = _assignment_pairs(model, object_ids, users)
+    pairs = {(obj_id, user.pk) for obj_id in object_ids for user in users} - existing
+    with transaction.atomic(), batched_workload():
+        _send_reverse_m2m(model, users, pairs, "pre_add")
+        through.objects.bulk_create(
+            [through(**{fk: obj_id, "user_id": user_id}) for obj_id, user_id in pairs],
+            ignore_conflicts=True,
+            batch_size=1000,
+        )
+        _send_reverse_m2m(model, users, pairs, "post_add")
+    return {"objects": object_ids, "pairs": pairs}
+
+
+def bulk_unassign(model, object_ids, users):
+    """Retire tous les utilisateurs de tous les objets avec un seul DELETE"""
+    through, fk, object_ids, existing = _assignment_pairs(model, object_ids, users)
+    with transaction.atomic(), batched_workload():
+        _send_reverse_m2m(model, users, existing, "pre_remove")
+        through.objects.filter(
+            **{f"{fk}__in": object_ids, "user_id__in": [user.pk for user in users]}
+        ).delete()
+        _send_reverse_m2m(model, users, existing, "post_remove")
+    return {"objects": object_ids, "pairs": existing}
+
+
+def bulk_create_subtasks(task, rows, created_by, users=()):
+    """
+    Crée les sections `rows` (dicts validés) d'une tâche en une transaction :
+    un bulk_create, une mise à jour des compteurs, un repositionnement
+    kilométrique et, si `users` est fourni, une assignation en masse.
+    """
+    subtasks = [
+        SubTask(
+            task=task,
+            created_by=created_by,
+            section_name=row["section_name"],
+            section_number=row["section_number"],
+            section_id=row["section_id"],
+            kilometrage=SubTask.quantize_kilometrage(row["kilometrage"]),
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        subtasks = SubTask.objects.bulk_create(subtasks, batch_size=1000)
+        shift_counters(
+            Task,
+            task.pk,
+            task,
+            subtask_count=len(subtasks),
+            total_kilometrage=sum((subtask.kilometrage for subtask in subtasks), Decimal("0")),
+        )
+        task.reindex_kilometrage()
+        if users:
+            bulk_assign(SubTask, [subtask.pk for subtask in subtasks], users)
+        invalidate_employee_dashboards(assigned_user_ids(Task, task.pk))
+    return subtasks
+
+
+def bulk_set_completion(task, subtask_ids, completed=True):
+    """
+    Marque les sections données comme terminées (ou non) en un seul UPDATE.
+    Seules les sections qui changent d'état sont touchées ; leurs ids sont retournés.
+    """
+    with transaction.atomic():
+        changed = list(
+            SubTask.objects.select_for_update()
+            .filter(task=task, pk__in=subtask_ids)
+            .exclude(is_completed=completed)
+            .values_list("pk", "kilometrage")
+        )
+        if not changed:
+            return []
+
+        changed_ids = [pk for pk, _kilometrage in changed]
+        now = timezone.now()
+        SubTask.objects.filter(pk__in=changed_ids).update(
+            is_completed=completed,
+            completed_at=now if completed else None,
+            updated_at=now,
+        )
+        sign = 1 if completed else -1
+        shift_counters(
+            Task,
+            task.pk,
+            task,
+            completed_subtask_count=sign * len(changed),
+            completed_kilometrage=sign * sum((km for _pk, km in changed), Decimal("0")),
+        )
+        subtasks_completion_changed.send(
+            sender=SubTask, subtask_ids=changed_ids, completed=completed
+        )
+        invalidate_employee_dashboards(
+            assigned_user_ids(SubTask, *changed_ids) + assigned_user_ids(Task, task.pk)
+        )
+    return changed_ids
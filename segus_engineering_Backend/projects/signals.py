@@ -0,0 +1,360 @@
+# projects/signals.py
+
+import threading
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest, Now
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from .cache import invalidate_employee_dashboards
+from .models import TASK_STATUS_COUNTERS, Project, SubTask, SyncTombstone, Task
+from .workload import refresh_assignments, refresh_workload, task_span, workload_scope
+
+# Émis après un changement de complétion en masse (UPDATE sans post_save) :
+# kwargs subtask_ids (liste) et completed (bool)
+subtasks_completion_changed = Signal()
+
+
+def shift_counters(model, pk, cached=None, **deltas):
+    """Applique des deltas atomiques (F()) aux compteurs d'une ligne
+
+    L'instance parente déjà chargée en mémoire (`cached`) est mise à jour de la
+    même façon pour que les propriétés de progression restent justes.
+    """
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if pk is None or not deltas:
+        return
+    model.objects.filter(pk=pk).update(
+        updated_at=Now(),
+        **{
+            name: Greatest(F(name) + delta, Value(0), output_field=model._meta.get_field(name))
+            for name, delta in deltas.items()
+        },
+    )
+    if cached is not None and cached.pk == pk:
+        for name, delta in deltas.items():
+            setattr(cached, name, max(getattr(cached, name) + delta, 0))
+
+
+def _task_contribution(state, sign):
+    project_id, status = state
+    deltas = {"task_count": sign}
+    if status in TASK_STATUS_COUNTERS:
+        deltas[TASK_STATUS_COUNTERS[status]] = sign
+    return project_id, deltas
+
+
+def _subtask_contribution(state, sign):
+    task_id, is_completed, kilometrage, _section_number = state
+    completed = 1 if is_completed else 0
+    kilometrage = Decimal(kilometrage or 0)
+    return task_id, {
+        "subtask_count": sign,
+        "completed_subtask_count": sign * completed,
+        "total_kilometrage": sign * kilometrage,
+        "completed_kilometrage": sign * completed * kilometrage,
+    }
+
+
+def _sync_parent(parent_model, cached, contribution, old_state, new_state):
+    """Retire l'ancienne contribution et ajoute la nouvelle, par parent"""
+    if old_state == new_state:
+        return
+    totals = {}
+    for state, sign in ((old_state, -1), (new_state, 1)):
+        if state is None:
+            continue
+        parent_id, deltas = contribution(state, sign)
+        bucket = totals.setdefault(parent_id, {})
+        for name, delta in deltas.items():
+            bucket[name] = bucket.get(name, 0) + delta
+    for parent_id, deltas in totals.items():
+        shift_counters(parent_model, parent_id, cached, **deltas)
+
+
+def _cached_parent(descriptor, instance):
+    return descriptor.__get__(instance) if descriptor.is_cached(instance) else None
+
+
+def _parent_deleted(origin, *models):
+    """Vrai si la suppression vient d'un parent (cascade) : inutile de le mettre à jour"""
+    model = getattr(origin, "model", type(origin))
+    return model in models
+
+
+def assigned_user_ids(model, *pks):
+    """Utilisateurs assignés aux objets donnés (table d'association du M2M)"""
+    pks = [pk for pk in pks if pk is not None]
+    if not pks:
+        return []
+    field = f"{model._meta.model_name}_id__in"
+    through = model.assigned_employees.through
+    return list(through.objects.filter(**{field: pks}).values_list("user_id", flat=True))
+
+
+def record_removals(model, object_ids, user_ids=(None,)):
+    """Journalise les lignes sorties des listes ?since (user None : supprimée pour tous)"""
+    SyncTombstone.objects.bulk_create(
+        SyncTombstone(model=model._meta.model_name, object_id=pk, user_id=user_id)
+        for pk in object_ids
+        for user_id in user_ids
+    )
+
+
+# Tâches à repositionner à la validation de la transaction en cours (par thread)
+_pending_reindex = threading.local()
+
+
+def _pending_tasks():
+    if not hasattr(_pending_reindex, "ids"):
+        _pending_reindex.ids = set()
+    return _pending_reindex.ids
+
+
+def _flush_reindex():
+    ids, _pending_reindex.ids = _pending_tasks(), set()
+    for task in Task.objects.filter(pk__in=ids):
+        task.reindex_kilometrage()
+
+
+def _reindex_tasks(task_ids, instance=None):
+    """
+    Repositionne les tâches une seule fois, après le commit : créer ou
+    supprimer N sections dans une transaction coûte un seul parcours par tâche.
+    Hors transaction, le commit est immédiat. `instance` reçoit ensuite son km_start.
+    """
+    _pending_tasks().update(pk for pk in task_ids if pk is not None)
+
+    def flush():
+        # Le premier rappel de la transaction traite toutes les tâches en attente
+        _flush_reindex()
+        if instance is not None:
+            instance.km_start = (
+                SubTask.objects.filter(pk=instance.pk).values_list("km_start", flat=True).first()
+            )
+
+    transaction.on_commit(flush)
+
+
+def _reposition(instance, old_state, new_state):
+    """Géométrie d'une section modifiée : décalage des suivantes ou repositionnement"""
+    task_id, _completed, kilometrage, number = new_state
+    resized = (
+        old_state is not None
+        and old_state[0] == task_id
+        and old_state[3] == number
+        and Decimal(old_state[2] or 0) > 0
+        and instance.km_start is not None
+        and task_id not in _pending_tasks()
+    )
+    if resized:
+        # Seule la longueur change : un UPDATE relatif des sections suivantes
+        Task(pk=task_id).shift_kilometrage(
+            instance.pk, Decimal(kilometrage or 0) - Decimal(old_state[2])
+        )
+    else:
+        _reindex_tasks({task_id, old_state[0] if old_state else None}, instance)
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    new_state = instance.progress_state()
+    old_state = None if created else getattr(instance, "_progress_state", None)
+    _sync_parent(
+        Project,
+        _cached_parent(Task.project, instance),
+        _task_contribution,
+        old_state,
+        new_state,
+    )
+    instance._progress_state = new_state
+    if old_state != new_state:
+        invalidate_employee_dashboards(
+            assigned_user_ids(Task, instance.pk)
+            + assigned_user_ids(Project, new_state[0], old_state[0] if old_state else None)
+        )
+
+    # Replanification ou (ré)ouverture : index de capacité des employés concernés
+    new_schedule = instance.schedule_state()
+    old_schedule = None if created else getattr(instance, "_schedule_state", None)
+    instance._schedule_state = new_schedule
+    if old_schedule is not None and old_schedule != new_schedule:
+        users, span = workload_scope(Task, instance)
+        refresh_workload(users, span, old_schedule[:2])
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, origin=None, **kwargs):
+    if _parent_deleted(origin, Project):
+        return
+    old_state = getattr(instance, "_progress_state", None) or instance.progress_state()
+    _sync_parent(
+        Project,
+        _cached_parent(Task.project, instance),
+        _task_contribution,
+        old_state,
+        None,
+    )
+
+
+@receiver(post_save, sender=SubTask)
+def subtask_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    new_state = instance.progress_state()
+    old_state = None if created else getattr(instance, "_progress_state", None)
+    _sync_parent(
+        Task,
+        _cached_parent(SubTask.task, instance),
+        _subtask_contribution,
+        old_state,
+        new_state,
+    )
+    instance._progress_state = new_state
+    if old_state is None or old_state[:2] != new_state[:2]:
+        invalidate_employee_dashboards(
+            assigned_user_ids(SubTask, instance.pk) + assigned_user_ids(Task, new_state[0])
+        )
+    if old_state is not None and old_state[:2] != new_state[:2]:
+        refresh_workload(
+            assigned_user_ids(SubTask, instance.pk), task_span({old_state[0], new_state[0]})
+        )
+    # Les positions kilométriques ne bougent que si la géométrie change
+    if old_state is None or old_state[0] != new_state[0] or old_state[2:] != new_state[2:]:
+        _reposition(instance, old_state, new_state)
+
+
+@receiver(post_delete, sender=SubTask)
+def subtask_deleted(sender, instance, origin=None, **kwargs):
+    if _parent_deleted(origin, Task, Project):
+        return
+    old_state = getattr(instance, "_progress_state", None) or instance.progress_state()
+    _sync_parent(
+        Task,
+        _cached_parent(SubTask.task, instance),
+        _subtask_contribution,
+        old_state,
+        None,
+    )
+    _reindex_tasks({old_state[0]})
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw and not created:
+        invalidate_employee_dashboards(assigned_user_ids(Project, instance.pk))
+
+
+@receiver(pre_delete, sender=Project)
+@receiver(pre_delete, sender=Task)
+@receiver(pre_delete, sender=SubTask)
+def assignable_deleting(sender, instance, origin=None, **kwargs):
+    if sender is not Project and _parent_deleted(origin, Task, Project):
+        return
+    invalidate_employee_dashboards(assigned_user_ids(sender, instance.pk))
+    # Les lignes d'affectation disparaissent en cascade : périmètre capturé avant
+    instance._workload_scope = workload_scope(sender, instance)
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=SubTask)
+def assignable_deleted(sender, instance, **kwargs):
+    scope = getattr(instance, "_workload_scope", None)
+    if scope:
+        refresh_workload(*scope)
+
+
+@receiver(m2m_changed, sender=Project.assigned_employees.through)
+@receiver(m2m_changed, sender=Task.assigned_employees.through)
+@receiver(m2m_changed, sender=SubTask.assigned_employees.through)
+def assignment_changed(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Les changements d'affectation invalident le dashboard des employés concernés"""
+    if reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalidate_employee_dashboards([instance.pk])
+    elif action in ("post_add", "post_remove"):
+        invalidate_employee_dashboards(pk_set or [])
+    elif action == "pre_clear":
+        invalidate_employee_dashboards(assigned_user_ids(type(instance), instance.pk))
+
+
+@receiver(m2m_changed, sender=Project.assigned_employees.through)
+@receiver(m2m_changed, sender=Task.assigned_employees.through)
+@receiver(m2m_changed, sender=SubTask.assigned_employees.through)
+def assignment_touched(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Une affectation modifiée compte comme une modification (synchronisation ?since)"""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        type(instance).objects.filter(pk=instance.pk).update(updated_at=Now())
+    elif pk_set:
+        model.objects.filter(pk__in=pk_set).update(updated_at=Now())
+
+
+@receiver(m2m_changed, sender=Task.assigned_employees.through)
+@receiver(m2m_changed, sender=SubTask.assigned_employees.through)
+def assignment_workload(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Les affectations de tâches et sous-tâches alimentent l'index de capacité"""
+    if reverse:
+        # instance : l'utilisateur ; pk_set : tâches ou sous-tâches
+        if action == "pre_clear":
+            instance._workload_cleared = list(
+                model.objects.filter(assigned_employees=instance).values_list("pk", flat=True)
+            )
+        elif action == "post_clear":
+            refresh_assignments([instance.pk], model, getattr(instance, "_workload_cleared", []))
+        elif action in ("post_add", "post_remove") and pk_set:
+            refresh_assignments([instance.pk], model, pk_set)
+        return
+
+    owner = type(instance)
+    if action == "pre_clear":
+        instance._workload_cleared = assigned_user_ids(owner, instance.pk)
+    elif action == "post_clear":
+        refresh_assignments(getattr(instance, "_workload_cleared", []), owner, [instance.pk])
+    elif action in ("post_add", "post_remove") and pk_set:
+        refresh_assignments(pk_set, owner, [instance.pk])
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=SubTask)
+def assignable_removed(sender, instance, **kwargs):
+    """Suppression, cascades comprises : retrait annoncé à tous les clients ?since"""
+    record_removals(sender, [instance.pk])
+
+
+@receiver(m2m_changed, sender=Task.assigned_employees.through)
+@receiver(m2m_changed, sender=SubTask.assigned_employees.through)
+def assignment_removed(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Une désaffectation retire la ligne des listes ?since de l'employé"""
+    if action not in ("post_remove", "post_clear"):
+        return
+    # Après un clear, les lignes retirées ont été capturées par assignment_workload
+    removed = pk_set if action == "post_remove" else getattr(instance, "_workload_cleared", [])
+    if reverse:
+        record_removals(model, removed or [], [instance.pk])
+    else:
+        record_removals(type(instance), [instance.pk], removed or [])
+
+
+@receiver(subtasks_completion_changed, sender=SubTask)
+def subtasks_completion_workload(sender, subtask_ids, completed, **kwargs):
+    refresh_workload(assigned_user_ids(SubTask, *subtask_ids), task_span(subtask_ids=subtask_ids))
+
+
+@receiver(post_save, sender="employees.WorkSession")
+def work_session_saved(sender, instance, created=False, raw=False, **kwargs):
+    """Le temps travaillé d'une session terminée est reporté dans l'index"""
+    if raw or instance.total_work_time is None:
+        return
+    if not created and not instance.has_changed("total_work_time"):
+        return
+    day = timezone.localdate(instance.start_time)
+    refresh_workload([instance.employee.user_id], (day, day))
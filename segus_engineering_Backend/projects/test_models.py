@@ -1,10 +1,14 @@
 from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 from django.utils import timezone
 
-from projects.models import Project, SubTask, Task
+from projects.models import EmployeeWorkload, Project, SubTask, Task
 
 User = get_user_model()
 
@@ -390,3 +394,259 @@ class SubTaskModelTest(TestCase):
         # Vérifier que la précision est maintenue (2 décimales)
         from decimal import Decimal
         self.assertEqual(subtask.kilometrage, Decimal('123.46'))
+
+
+class ProgressCountersTest(TestCase):
+    """Tests des compteurs de progression dénormalisés"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+        )
+        self.project = Project.objects.create(
+            title="Projet",
+            description="Description",
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=30),
+            created_by=self.admin_user,
+        )
+        self.task = Task.objects.create(
+            title="Tâche",
+            description="Description",
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=7),
+            project=self.project,
+            created_by=self.admin_user,
+        )
+
+    def create_subtask(self, number, kilometrage="2.50"):
+        return SubTask.objects.create(
+            section_name=f"Section {number}",
+            section_number=str(number),
+            section_id=f"S{number}",
+            kilometrage=kilometrage,
+            task=self.task,
+            created_by=self.admin_user,
+        )
+
+    def test_subtask_events_update_task_counters(self):
+        """Création, complétion et suppression mettent à jour la tâche"""
+        first = self.create_subtask(1)
+        self.create_subtask(2, kilometrage="1.25")
+
+        first.mark_completed()
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.subtask_count, 2)
+        self.assertEqual(self.task.completed_subtask_count, 1)
+        self.assertEqual(self.task.completed_kilometrage, Decimal("2.50"))
+
+        first.mark_uncompleted()
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.completed_subtask_count, 0)
+        self.assertEqual(self.task.completed_kilometrage, Decimal("0.00"))
+
+        first.delete()
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.subtask_count, 1)
+
+    def test_task_status_change_moves_project_counter(self):
+        """Un changement de statut déplace le compteur du projet"""
+        task = Task.objects.get(pk=self.task.pk)
+        task.status = "IN_PROGRESS"
+        task.save()
+        task.status = "COMPLETED"
+        task.save()
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.task_count, 1)
+        self.assertEqual(self.project.in_progress_task_count, 0)
+        self.assertEqual(self.project.completed_task_count, 1)
+        self.assertEqual(self.project.count_tasks("TODO"), 0)
+
+        task.delete()
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.task_count, 0)
+        self.assertEqual(self.project.completed_task_count, 0)
+
+    def test_recount_command_repairs_drift(self):
+        """La commande recount_project_progress corrige les écarts"""
+        self.create_subtask(1).mark_completed()
+        Task.objects.filter(pk=self.task.pk).update(subtask_count=7, completed_subtask_count=0)
+        Project.objects.filter(pk=self.project.pk).update(task_count=0)
+
+        call_command("recount_project_progress", stdout=StringIO())
+
+        self.task.refresh_from_db()
+        self.project.refresh_from_db()
+        self.assertEqual(self.task.subtask_count, 1)
+        self.assertEqual(self.task.completed_subtask_count, 1)
+        self.assertEqual(self.task.completed_kilometrage, Decimal("2.50"))
+        self.assertEqual(self.project.task_count, 1)
+
+    def test_kilometrage_positions_follow_natural_section_order(self):
+        """Les sections sont positionnées bout à bout dans l'ordre naturel"""
+        with self.captureOnCommitCallbacks(execute=True):
+            s10 = self.create_subtask(10, kilometrage="4.00")
+            s2 = self.create_subtask(2, kilometrage="3.00")
+            s1 = self.create_subtask(1, kilometrage="1.50")
+
+        self.assertEqual(s1.km_start, Decimal("0.00"))
+        self.assertEqual(s2.km_start, Decimal("1.50"))
+        self.assertEqual(s10.km_start, Decimal("4.50"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            s2.delete()
+        s10.refresh_from_db()
+        self.assertEqual(s10.km_start, Decimal("1.50"))
+
+    def test_kilometrage_positions_are_reindexed_once_per_transaction(self):
+        """N sections créées dans une transaction : un seul repositionnement"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            for number in range(1, 6):
+                self.create_subtask(number, kilometrage="1.00")
+        self.assertEqual(len(callbacks), 5)
+        reindex = Task.reindex_kilometrage
+        with mock.patch.object(
+            Task, "reindex_kilometrage", autospec=True, side_effect=reindex
+        ) as reindexed:
+            for callback in callbacks:
+                callback()
+        self.assertEqual(reindexed.call_count, 1)
+
+        self.assertEqual(
+            list(self.task.subtasks.order_by("km_start").values_list("km_start", flat=True)),
+            [Decimal(km) for km in ("0.00", "1.00", "2.00", "3.00", "4.00")],
+        )
+
+    def test_resized_section_shifts_following_sections(self):
+        """Changer la longueur d'une section décale les suivantes en un UPDATE"""
+        with self.captureOnCommitCallbacks(execute=True):
+            s1 = self.create_subtask(1, kilometrage="1.00")
+            self.create_subtask(2, kilometrage="2.00")
+            s3 = self.create_subtask(3, kilometrage="3.00")
+
+        s1 = SubTask.objects.get(pk=s1.pk)
+        s1.kilometrage = Decimal("1.50")
+        with self.captureOnCommitCallbacks() as callbacks:
+            s1.save()
+        self.assertEqual(callbacks, [])
+
+        s3.refresh_from_db()
+        self.assertEqual(s3.km_start, Decimal("3.50"))
+        self.assertEqual(self.task.subtasks.get(section_number="2").km_start, Decimal("1.50"))
+
+    def test_kilometrage_progress(self):
+        """L'avancement pondéré utilise le kilométrage des sections terminées"""
+        self.create_subtask(1, kilometrage="3.00").mark_completed()
+        self.create_subtask(2, kilometrage="1.00")
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.total_kilometrage, Decimal("4.00"))
+        self.assertEqual(self.task.kilometrage_progress, 75.0)
+        self.assertEqual(self.task.progress_percentage, 50.0)
+        self.assertEqual(Project.objects.with_kilometrage().get().kilometrage_progress, 75.0)
+
+
+class EmployeeWorkloadTest(TestCase):
+    """Tests de l'index de capacité (charge journalière des employés)"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        from employees.models import Employee
+
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+        )
+        self.user = User.objects.create_user(
+            username="employee",
+            email="employee@example.com",
+            password="emppass123",
+            role="EMPLOYE",
+        )
+        self.employee = Employee.objects.create(user=self.user, position="Topographe")
+        self.today = date.today()
+        self.project = Project.objects.create(
+            title="Projet",
+            description="Description",
+            start_date=self.today,
+            end_date=self.today + timedelta(days=30),
+            created_by=self.admin_user,
+        )
+        self.task = Task.objects.create(
+            title="Tâche",
+            description="Description",
+            start_date=self.today,
+            end_date=self.today + timedelta(days=4),
+            project=self.project,
+            created_by=self.admin_user,
+        )
+
+    def loaded_days(self, field="task_count"):
+        return dict(
+            EmployeeWorkload.objects.filter(user=self.user, **{f"{field}__gt": 0}).values_list(
+                "date", field
+            )
+        )
+
+    def test_assignment_and_reschedule(self):
+        """Affectation, replanification et clôture de tâche mettent l'index à jour"""
+        self.task.assigned_employees.add(self.user)
+        self.assertEqual(len(self.loaded_days()), 5)
+
+        self.task.end_date = self.today + timedelta(days=1)
+        self.task.save()
+        self.assertEqual(sorted(self.loaded_days()), [self.today, self.today + timedelta(days=1)])
+
+        self.task.status = "COMPLETED"
+        self.task.save()
+        self.assertEqual(self.loaded_days(), {})
+
+    def test_subtasks_and_removal(self):
+        """Les sous-tâches ouvertes comptent, la désaffectation libère l'employé"""
+        subtask = SubTask.objects.create(
+            section_name="Section 1",
+            section_number="1",
+            section_id="SEC-1",
+            kilometrage="1.00",
+            task=self.task,
+            created_by=self.admin_user,
+        )
+        subtask.assigned_employees.add(self.user)
+        self.assertEqual(set(self.loaded_days("subtask_count").values()), {1})
+
+        subtask.mark_completed()
+        self.assertEqual(self.loaded_days("subtask_count"), {})
+
+        self.task.assigned_employees.add(self.user)
+        self.user.assigned_tasks.remove(self.task)
+        self.assertEqual(self.loaded_days(), {})
+
+    def test_work_sessions_and_rebuild_command(self):
+        """Le temps travaillé est indexé et la commande reconstruit à l'identique"""
+        from employees.models import WorkSession
+
+        self.task.assigned_employees.add(self.user)
+        session = WorkSession.objects.create(employee=self.employee)
+        session.end_session()
+        session.total_work_time = timedelta(hours=2)
+        session.save()
+        self.assertEqual(
+            self.loaded_days("worked_seconds"), {timezone.localdate(session.start_time): 7200}
+        )
+
+        before = set(
+            EmployeeWorkload.objects.values_list("user_id", "date", "task_count", "worked_seconds")
+        )
+        EmployeeWorkload.objects.all().delete()
+        call_command("rebuild_workload", stdout=StringIO())
+        after = set(
+            EmployeeWorkload.objects.values_list("user_id", "date", "task_count", "worked_seconds")
+        )
+        self.assertEqual(before, after)
@@ -1,11 +1,15 @@
 from datetime import date, timedelta
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from projects.models import Project, SubTask, Task
+from projects.services import recount_progress
 
 User = get_user_model()
 
@@ -36,9 +40,10 @@ class ProjectViewSetTest(APITestCase):
             first_name="Employee",
             last_name="User",
         )
-        
+
         # Créer l'objet Employee correspondant
         from employees.models import Employee
+
         self.employee = Employee.objects.create(user=self.employee_user)
 
         # Créer un projet test
@@ -198,9 +203,10 @@ class TaskViewSetTest(APITestCase):
             password="emppass123",
             role="EMPLOYE",
         )
-        
+
         # Créer l'objet Employee correspondant
         from employees.models import Employee
+
         self.employee = Employee.objects.create(user=self.employee_user)
 
         # Créer un projet parent
@@ -345,9 +351,10 @@ class SubTaskViewSetTest(APITestCase):
             password="emppass123",
             role="EMPLOYE",
         )
-        
+
         # Créer l'objet Employee correspondant
         from employees.models import Employee
+
         self.employee = Employee.objects.create(user=self.employee_user)
 
         # Créer un projet et une tâche parents
@@ -522,3 +529,895 @@ class SubTaskViewSetTest(APITestCase):
         response = self.client.get(self.subtasks_url)
 
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ProjectListQueryCountTest(APITestCase):
+    """Le listage des projets doit coûter un nombre constant de requêtes"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+        )
+        self.client.force_authenticate(user=self.admin_user)
+
+    def create_projects(self, count):
+        """Crée `count` projets avec deux tâches et deux sous-tâches chacun"""
+        projects = Project.objects.bulk_create(
+            Project(
+                title=f"Projet {i}",
+                description="Description",
+                start_date=date.today(),
+                end_date=date.today() + timedelta(days=30),
+                created_by=self.admin_user,
+            )
+            for i in range(count)
+        )
+        tasks = Task.objects.bulk_create(
+            Task(
+                title=f"Tâche {i}",
+                description="Description",
+                status="COMPLETED" if i == 0 else "TODO",
+                start_date=date.today(),
+                end_date=date.today() + timedelta(days=10),
+                project=project,
+                created_by=self.admin_user,
+            )
+            for project in projects
+            for i in range(2)
+        )
+        SubTask.objects.bulk_create(
+            SubTask(
+                section_name="Section",
+                section_number=str(i),
+                section_id=f"S{task.pk}-{i}",
+                kilometrage="1.00",
+                is_completed=i == 0,
+                task=task,
+                created_by=self.admin_user,
+            )
+            for task in tasks
+            for i in range(2)
+        )
+        # bulk_create ne déclenche pas les signaux : recalculer les compteurs
+        recount_progress()
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/api/projects/all/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries), response
+
+    def test_list_query_count_is_constant(self):
+        """500 projets coûtent autant de requêtes que 5"""
+        self.create_projects(5)
+        small_count, _ = self.count_list_queries()
+
+        self.create_projects(495)
+        large_count, response = self.count_list_queries()
+
+        self.assertEqual(len(response.data), 500)
+        self.assertEqual(small_count, large_count)
+
+    def test_progress_values(self):
+        """Les compteurs stockés correspondent aux valeurs calculées"""
+        self.create_projects(1)
+        _, response = self.count_list_queries()
+
+        project_data = response.data[0]
+        self.assertEqual(project_data["total_tasks"], 2)
+        self.assertEqual(project_data["completed_tasks"], 1)
+        self.assertEqual(project_data["progress_percentage"], 50.0)
+        self.assertEqual(project_data["tasks"][0]["progress_percentage"], 50.0)
+
+
+class KilometrageSpansTest(APITestCase):
+    """Tests des plages kilométriques d'un projet"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        self.project = Project.objects.create(
+            title="Autoroute",
+            description="Description",
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=30),
+            created_by=self.admin_user,
+        )
+        self.task = Task.objects.create(
+            title="Fibre",
+            description="Description",
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=10),
+            project=self.project,
+            created_by=self.admin_user,
+        )
+        # Sections de 10 km : terminées, terminées, restante, terminée
+        # (points kilométriques calculés au commit)
+        with self.captureOnCommitCallbacks(execute=True):
+            for number, completed in enumerate([True, True, False, True], start=1):
+                SubTask.objects.create(
+                    section_name=f"Section {number}",
+                    section_number=f"S{number}",
+                    section_id=f"SEC-{number}",
+                    kilometrage="10.00",
+                    is_completed=completed,
+                    task=self.task,
+                    created_by=self.admin_user,
+                )
+
+    def test_project_spans_are_merged(self):
+        """Les sections contiguës de même état sont fusionnées"""
+        response = self.client.get(f"/api/projects/{self.project.id}/kilometrage/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_km"], 40.0)
+        self.assertEqual(response.data["progress"], 75.0)
+        spans = response.data["tasks"][0]
+        self.assertEqual(spans["completed"], [[0.0, 20.0], [30.0, 40.0]])
+        self.assertEqual(spans["pending"], [[20.0, 30.0]])
+
+    def test_spans_are_clipped_to_range(self):
+        """Les bornes km_from / km_to découpent les plages"""
+        response = self.client.get(
+            f"/api/tasks/{self.task.id}/kilometrage/", {"km_from": 12, "km_to": 35}
+        )
+
+        spans = response.data["tasks"][0]
+        self.assertEqual(spans["completed"], [[12.0, 20.0], [30.0, 35.0]])
+        self.assertEqual(spans["pending"], [[20.0, 30.0]])
+
+    def test_subtask_range_filter(self):
+        """Le filtre de plage retourne les sections chevauchant l'intervalle"""
+        response = self.client.get("/api/subtasks/", {"km_from": 12, "km_to": 25})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([s["section_number"] for s in response.data], ["S2", "S3"])
+
+    def test_invalid_range(self):
+        """Une borne non numérique est refusée"""
+        response = self.client.get(
+            f"/api/projects/{self.project.id}/kilometrage/", {"km_from": "abc"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class EmployeeDashboardTest(APITestCase):
+    """Tests du dashboard projets de l'employé connecté"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        cache.clear()
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+        )
+        self.employee_user = User.objects.create_user(
+            username="employee",
+            email="employee@example.com",
+            password="emppass123",
+            role="EMPLOYE",
+            first_name="Jean",
+            last_name="Dupont",
+        )
+        from employees.models import Employee
+
+        Employee.objects.create(user=self.employee_user, position="Technicien")
+        self.client.force_authenticate(user=self.employee_user)
+        self.url = "/api/projects/employee/dashboard/"
+
+        for i in range(6):
+            project = Project.objects.create(
+                title=f"Projet {i}",
+                description="Description",
+                start_date=date.today() - timedelta(days=30),
+                end_date=date.today() + timedelta(days=i - 2),
+                created_by=self.admin_user,
+            )
+            project.assigned_employees.add(self.employee_user)
+            for status_value in ("TODO", "COMPLETED"):
+                task = Task.objects.create(
+                    title=f"Tâche {i} {status_value}",
+                    description="Description",
+                    status=status_value,
+                    start_date=date.today(),
+                    end_date=date.today() + timedelta(days=i),
+                    project=project,
+                    created_by=self.admin_user,
+                )
+                task.assigned_employees.add(self.employee_user)
+                if status_value == "TODO":
+                    self.todo_task = task
+
+    def test_dashboard_query_budget(self):
+        """Le dashboard coûte un nombre fixe de requêtes, puis zéro en cache"""
+        # Employé, 3 agrégats, projets récents, tâches urgentes
+        with self.assertNumQueries(6):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["projects_overview"]["total"], 6)
+        self.assertEqual(response.data["projects_overview"]["active"], 6)
+        self.assertEqual(response.data["projects_overview"]["overdue"], 2)
+        self.assertEqual(response.data["tasks_overview"]["completed"], 6)
+        self.assertEqual(response.data["performance"]["percentage"], 50)
+        self.assertEqual(len(response.data["recent_projects"]), 5)
+        self.assertEqual(response.data["recent_projects"][0]["progress"], 50.0)
+        urgent = response.data["urgent_tasks"]
+        self.assertEqual(len(urgent), 5)
+        self.assertEqual(urgent[0]["deadline"], date.today().isoformat())
+        self.assertEqual(urgent[0]["project_name"], "Projet 0")
+
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_status_change_invalidates_dashboard(self):
+        """Un changement de statut de tâche invalide le cache"""
+        self.client.get(self.url)
+
+        self.todo_task.status = "COMPLETED"
+        self.todo_task.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["tasks_overview"]["completed"], 7)
+
+    def test_assignment_change_invalidates_dashboard(self):
+        """Un désassignement invalide le cache"""
+        self.client.get(self.url)
+
+        Project.objects.get(title="Projet 0").assigned_employees.remove(self.employee_user)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["projects_overview"]["total"], 5)
+
+
+class BulkAssignmentTest(APITestCase):
+    """Tests des endpoints d'assignation en masse"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        from employees.models import Employee
+
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        self.employees = []
+        for i in range(2):
+            user = User.objects.create_user(
+                username=f"employee{i}",
+                email=f"employee{i}@example.com",
+                password="emppass123",
+                role="EMPLOYE",
+            )
+            self.employees.append(Employee.objects.create(user=user))
+        self.project = Project.objects.create(
+            title="Projet",
+            description="Description",
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=30),
+            created_by=self.admin_user,
+        )
+        self.task = Task.objects.create(
+            title="Tâche",
+            description="Description",
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=10),
+            project=self.project,
+            created_by=self.admin_user,
+        )
+        self.subtasks = SubTask.objects.bulk_create(
+            SubTask(
+                section_name=f"Section {i}",
+                section_number=str(i),
+                section_id=f"SEC-{i}",
+                kilometrage="1.00",
+                task=self.task,
+                created_by=self.admin_user,
+            )
+            for i in range(300)
+        )
+        self.payload = {
+            "ids": [subtask.pk for subtask in self.subtasks],
+            "employee_ids": [self.employees[0].pk],
+            "matricules": [self.employees[1].matricule, "INCONNU"],
+        }
+
+    def test_bulk_assign_subtasks_in_few_queries(self):
+        """Staffer 300 sections coûte quelques requêtes"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post("/api/subtasks/bulk-assign/", self.payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["assigned"], 600)
+        self.assertEqual(response.data["unknown"], ["INCONNU"])
+        self.assertEqual(SubTask.assigned_employees.through.objects.count(), 600)
+        # Coût fixe (dont une reconstruction groupée de l'index de capacité), indépendant du nombre de sections
+        self.assertLess(len(context.captured_queries), 20)
+
+        # Idempotent : aucune ligne supplémentaire
+        response = self.client.post("/api/subtasks/bulk-assign/", self.payload, format="json")
+        self.assertEqual(response.data["assigned"], 0)
+
+    def test_bulk_unassign_projects(self):
+        """Désassignation en masse au niveau projet"""
+        self.project.assigned_employees.add(self.employees[0].user, self.employees[1].user)
+
+        response = self.client.post(
+            "/api/projects/bulk-unassign/",
+            {"ids": [self.project.pk], "employee_ids": [self.employees[0].pk]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["unassigned"], 1)
+        self.assertEqual(list(self.project.assigned_employees.all()), [self.employees[1].user])
+
+    def test_bulk_assign_requires_admin(self):
+        """Seuls les administrateurs peuvent assigner en masse"""
+        self.client.force_authenticate(user=self.employees[0].user)
+        response = self.client.post("/api/tasks/bulk-assign/", self.payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class SubTaskBulkOperationsTest(APITestCase):
+    """Tests de la création et de la complétion de sections en masse"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        from employees.models import Employee
+
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        employee_user = User.objects.create_user(
+            username="employee",
+            email="employee@example.com",
+            password="emppass123",
+            role="EMPLOYE",
+        )
+        self.employee = Employee.objects.create(user=employee_user)
+        self.project = Project.objects.create(
+            title="Projet",
+            description="Description",
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=30),
+            created_by=self.admin_user,
+        )
+        self.task = Task.objects.create(
+            title="Tâche",
+            description="Description",
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=10),
+            project=self.project,
+            created_by=self.admin_user,
+        )
+
+    def create_sections(self, count):
+        sections = [
+            {
+                "section_name": f"Section {i}",
+                "section_number": str(i),
+                "section_id": f"SEC-{i}",
+                "kilometrage": "0.50",
+            }
+            for i in range(1, count + 1)
+        ]
+        return self.client.post(
+            "/api/subtasks/bulk-create/",
+            {"task": self.task.pk, "sections": sections, "employee_ids": [self.employee.pk]},
+            format="json",
+        )
+
+    def test_bulk_create_json(self):
+        """Création JSON : compteurs, positions kilométriques et assignation"""
+        response = self.create_sections(200)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 200)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.subtask_count, 200)
+        self.assertEqual(str(self.task.total_kilometrage), "100.00")
+        last = SubTask.objects.get(task=self.task, section_number="200")
+        self.assertEqual(str(last.km_start), "99.50")
+        self.assertEqual(SubTask.assigned_employees.through.objects.count(), 200)
+
+    def test_bulk_create_csv(self):
+        """Création à partir d'un fichier CSV (séparateur point-virgule)"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        content = "section_name;section_number;section_id;kilometrage\nA;1;SEC-1;1.5\nB;2;SEC-2;2\n"
+        upload = SimpleUploadedFile(
+            "sections.csv", content.encode("utf-8"), content_type="text/csv"
+        )
+
+        response = self.client.post(
+            "/api/subtasks/bulk-create/", {"task": self.task.pk, "file": upload}, format="multipart"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.subtask_count, 2)
+        self.assertEqual(str(self.task.total_kilometrage), "3.50")
+
+    def test_bulk_create_reports_row_errors(self):
+        """Une ligne invalide : rien n'est créé et la ligne est signalée"""
+        response = self.client.post(
+            "/api/subtasks/bulk-create/",
+            {
+                "task": self.task.pk,
+                "sections": [
+                    {
+                        "section_name": "A",
+                        "section_number": "1",
+                        "section_id": "SEC-1",
+                        "kilometrage": "1",
+                    },
+                    {
+                        "section_name": "B",
+                        "section_number": "2",
+                        "section_id": "SEC-2",
+                        "kilometrage": "-1",
+                    },
+                ],
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["errors"][0]["row"], 2)
+        self.assertFalse(SubTask.objects.exists())
+
+    def test_bulk_create_rejects_kilometrage_beyond_model_precision(self):
+        """Un kilométrage hors de la précision du modèle est une erreur de ligne"""
+        rows = [
+            {"section_name": "A", "section_number": "1", "section_id": "SEC-1", "kilometrage": km}
+            for km in ("123456789.00", "1.005")
+        ]
+        for row in rows:
+            response = self.client.post(
+                "/api/subtasks/bulk-create/",
+                {"task": self.task.pk, "sections": [row]},
+                format="json",
+            )
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data["errors"][0]["row"], 1)
+        self.assertFalse(SubTask.objects.exists())
+
+    def test_bulk_complete_section_range(self):
+        """Complétion d'une plage de sections en un seul UPDATE"""
+        from gamification.models import CompletedWorkLedger
+
+        self.create_sections(50)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                "/api/subtasks/bulk-complete/",
+                {"task": self.task.pk, "section_from": "2", "section_to": "11"},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["changed"], 10)
+        self.assertEqual(response.data["progress_percentage"], 20)
+        updates = [
+            q for q in context.captured_queries if q["sql"].startswith('UPDATE "projects_subtask"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.completed_subtask_count, 10)
+        self.assertEqual(str(self.task.completed_kilometrage), "5.00")
+        self.assertEqual(CompletedWorkLedger.objects.filter(employee=self.employee).count(), 10)
+
+        # Retour arrière par plage kilométrique
+        response = self.client.post(
+            "/api/subtasks/bulk-complete/",
+            {"task": self.task.pk, "km_from": "0.5", "km_to": "3.0", "completed": False},
+            format="json",
+        )
+        self.assertEqual(response.data["changed"], 5)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.completed_subtask_count, 5)
+        self.assertEqual(CompletedWorkLedger.objects.filter(employee=self.employee).count(), 5)
+
+
+class NotificationDispatchTest(APITestCase):
+    """Tests de l'envoi groupé des notifications d'assignation"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        from employees.models import Employee
+
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        self.employees = []
+        for i in range(5):
+            user = User.objects.create_user(
+                username=f"employee{i}",
+                email=f"employee{i}@example.com",
+                password="emppass123",
+                role="EMPLOYE",
+            )
+            self.employees.append(Employee.objects.create(user=user))
+        self.project = Project.objects.create(
+            title="Projet",
+            description="Description",
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=30),
+            created_by=self.admin_user,
+        )
+
+    def create_task(self, employees):
+        return self.client.post(
+            "/api/tasks/",
+            {
+                "title": "Tâche",
+                "description": "Description",
+                "start_date": date.today().isoformat(),
+                "end_date": (date.today() + timedelta(days=5)).isoformat(),
+                "project": self.project.id,
+                "assigned_employee_ids": [employee.pk for employee in employees],
+            },
+            format="json",
+        )
+
+    def test_task_creation_persists_and_sends_after_commit(self):
+        """Une ligne Notification par assigné, messages envoyés après le commit"""
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+
+        from notifications.models import Notification
+
+        channel_layer = get_channel_layer()
+        user = self.employees[0].user
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(f"user_{user.id}", channel)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.create_task(self.employees)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Notification.objects.filter(type="task_assignment").count(), 5)
+        # Un seul envoi groupé programmé après le commit
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+
+        message = async_to_sync(channel_layer.receive)(channel)
+        notification = Notification.objects.get(user=user)
+        self.assertEqual(message["type"], "notification")
+        self.assertEqual(message["data"]["task_id"], response.data["id"])
+        self.assertEqual(message["data"]["notification_id"], notification.pk)
+
+    def test_notification_queries_do_not_scale_with_assignees(self):
+        """Le nombre de requêtes ne dépend pas du nombre d'assignés"""
+        with CaptureQueriesContext(connection) as one:
+            self.create_task(self.employees[:1])
+        with CaptureQueriesContext(connection) as five:
+            self.create_task(self.employees)
+
+        self.assertEqual(len(one.captured_queries), len(five.captured_queries))
+
+
+class CompactListPaginationTest(APITestCase):
+    """Tests des listes compactes paginées par clé et du mode ?since"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        self.project = Project.objects.create(
+            title="Projet",
+            description="Description",
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=30),
+            created_by=self.admin_user,
+        )
+        self.task = Task.objects.create(
+            title="Tâche",
+            description="Description",
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=10),
+            project=self.project,
+            created_by=self.admin_user,
+        )
+        # Numéros de section en double : l'id départage les ex-aequo
+        SubTask.objects.bulk_create(
+            SubTask(
+                section_name=f"Section {i}",
+                section_number=str(i // 2),
+                section_id=f"SEC-{i}",
+                kilometrage="1.00",
+                task=self.task,
+                created_by=self.admin_user,
+            )
+            for i in range(25)
+        )
+
+    def test_keyset_pages_cover_every_row_once(self):
+        """Parcours complet par curseur, sans doublon ni oubli"""
+        seen = []
+        url = f"/api/subtasks/?task={self.task.pk}&page_size=10"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [row["id"] for row in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(set(seen), set(SubTask.objects.values_list("pk", flat=True)))
+        self.assertEqual(
+            set(response.data["results"][0]),
+            {"id", "task", "section_number", "is_completed", "assigned_employees", "updated_at"},
+        )
+
+    def test_since_returns_only_changed_rows(self):
+        """Le mode ?since ne renvoie que les lignes modifiées depuis la synchronisation"""
+        response = self.client.get("/api/subtasks/", {"task": self.task.pk, "page_size": 100})
+        synced_at = response.data["synced_at"]
+
+        subtask = SubTask.objects.order_by("pk").first()
+        subtask.mark_completed()
+
+        response = self.client.get("/api/subtasks/", {"since": synced_at})
+        self.assertEqual([row["id"] for row in response.data["results"]], [subtask.pk])
+
+        response = self.client.get("/api/tasks/", {"since": synced_at})
+        self.assertEqual([row["id"] for row in response.data["results"]], [self.task.pk])
+        self.assertEqual(response.data["results"][0]["completed_subtask_count"], 1)
+
+    def test_since_reports_deleted_rows(self):
+        """Les lignes supprimées depuis la synchronisation sont listées dans removed"""
+        response = self.client.get("/api/subtasks/", {"task": self.task.pk, "page_size": 100})
+        synced_at = response.data["synced_at"]
+        self.assertNotIn("removed", response.data)
+
+        subtask = SubTask.objects.order_by("pk").first()
+        deleted_id = subtask.pk
+        subtask.delete()
+
+        response = self.client.get("/api/subtasks/", {"task": self.task.pk, "since": synced_at})
+        self.assertEqual(response.data["removed"], [deleted_id])
+
+        response = self.client.get("/api/subtasks/", {"since": response.data["synced_at"]})
+        self.assertEqual(response.data["removed"], [])
+
+    def test_since_reports_unassigned_rows(self):
+        """my-subtasks?since liste les sous-tâches désaffectées de l'appelant"""
+        employee = User.objects.create_user(
+            username="employee",
+            email="employee@example.com",
+            password="employeepass123",
+            role="EMPLOYE",
+        )
+        kept, dropped, other = SubTask.objects.order_by("pk")[:3]
+        for subtask in (kept, dropped):
+            subtask.assigned_employees.add(employee)
+        other.assigned_employees.add(self.admin_user)
+        self.client.force_authenticate(user=employee)
+        response = self.client.get("/api/subtasks/my-subtasks/", {"page_size": 100})
+        synced_at = response.data["synced_at"]
+
+        dropped.assigned_employees.remove(employee)
+        other.assigned_employees.clear()
+
+        response = self.client.get("/api/subtasks/my-subtasks/", {"since": synced_at})
+        self.assertEqual(response.data["removed"], [dropped.pk])
+        self.assertEqual(response.data["results"], [])
+
+        # Réaffectée ensuite : la ligne revient dans results, plus dans removed
+        employee.assigned_subtasks.add(dropped)
+        response = self.client.get("/api/subtasks/my-subtasks/", {"since": synced_at})
+        self.assertEqual(response.data["removed"], [])
+        self.assertEqual([row["id"] for row in response.data["results"]], [dropped.pk])
+
+    def test_since_beyond_retention(self):
+        """Un since plus ancien que la conservation des retraits exige une resynchronisation"""
+        response = self.client.get("/api/subtasks/", {"since": "2020-01-01T00:00:00Z"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_legacy_list_is_unchanged(self):
+        """Sans paramètre de pagination, la liste complète est conservée"""
+        response = self.client.get("/api/subtasks/", {"task": self.task.pk})
+
+        self.assertEqual(len(response.data), 25)
+        self.assertIn("section_name", response.data[0])
+
+    def test_invalid_cursor(self):
+        """Un curseur illisible renvoie une erreur 400"""
+        response = self.client.get("/api/tasks/", {"cursor": "invalide"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ProjectTimelineTest(APITestCase):
+    """Tests de la frise (Gantt) des projets et de la charge par employé"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+        )
+        self.employee = User.objects.create_user(
+            username="employee",
+            email="employee@example.com",
+            password="emppass123",
+            role="EMPLOYE",
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        self.today = date.today()
+        self.project = Project.objects.create(
+            title="Projet",
+            description="Description",
+            start_date=self.today - timedelta(days=10),
+            end_date=self.today + timedelta(days=30),
+            created_by=self.admin_user,
+        )
+        # Trois tâches : [j-10, j-1] en retard, [j-5, j+5] et [j, j+10]
+        self.tasks = []
+        for title, start, end in (("A", -10, -1), ("B", -5, 5), ("C", 0, 10)):
+            task = Task.objects.create(
+                title=title,
+                description="Description",
+                start_date=self.today + timedelta(days=start),
+                end_date=self.today + timedelta(days=end),
+                project=self.project,
+                created_by=self.admin_user,
+            )
+            task.assigned_employees.add(self.employee)
+            self.tasks.append(task)
+
+    def test_project_timeline(self):
+        """Lignes compactes, retards et charge par balayage"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f"/api/projects/{self.project.id}/timeline/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(context.captured_queries), 2)
+        fields = response.data["fields"]
+        rows = {row[0]: dict(zip(fields, row)) for row in response.data["tasks"]}
+        self.assertTrue(rows[self.tasks[0].id]["overdue"])
+        self.assertFalse(rows[self.tasks[1].id]["overdue"])
+        self.assertEqual(rows[self.tasks[2].id]["assignees"], [self.employee.id])
+        self.assertEqual(response.data["critical_dates"]["overdue"], 1)
+        self.assertEqual(
+            response.data["critical_dates"]["next_deadline"], self.today + timedelta(days=5)
+        )
+
+        day = timedelta(days=1)
+        load = response.data["load"][self.employee.id]
+        self.assertEqual(load["peak"], 2)
+        self.assertEqual(
+            load["segments"],
+            [
+                [self.today - 10 * day, self.today - 6 * day, 1],
+                # A se termine la veille du début de C : la charge reste à 2
+                [self.today - 5 * day, self.today + 5 * day, 2],
+                [self.today + 6 * day, self.today + 10 * day, 1],
+            ],
+        )
+
+    def test_timeline_window(self):
+        """Fenêtre sur tous les projets : tâches chevauchantes et charge bornée"""
+        response = self.client.get(
+            "/api/projects/timeline/",
+            {"start": self.today.isoformat(), "end": (self.today + timedelta(days=2)).isoformat()},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {row[0] for row in response.data["tasks"]}, {self.tasks[1].id, self.tasks[2].id}
+        )
+        self.assertEqual(
+            response.data["load"][self.employee.id]["segments"],
+            [[self.today, self.today + timedelta(days=2), 2]],
+        )
+
+        response = self.client.get("/api/projects/timeline/", {"start": self.today.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class EmployeeCapacityTest(APITestCase):
+    """Tests de la recherche des employés disponibles"""
+
+    def setUp(self):
+        """Configuration initiale pour chaque test"""
+        from employees.models import Employee
+
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123",
+            role="ADMIN",
+        )
+        self.client.force_authenticate(user=self.admin_user)
+        self.today = date.today()
+        self.employees = []
+        for i, position in enumerate(["Topographe", "Topographe", "Dessinateur"]):
+            user = User.objects.create_user(
+                username=f"employee{i}",
+                email=f"employee{i}@example.com",
+                password="emppass123",
+                role="EMPLOYE",
+            )
+            self.employees.append(Employee.objects.create(user=user, position=position))
+        project = Project.objects.create(
+            title="Projet",
+            description="Description",
+            start_date=self.today,
+            end_date=self.today + timedelta(days=30),
+            created_by=self.admin_user,
+        )
+        task = Task.objects.create(
+            title="Tâche",
+            description="Description",
+            start_date=self.today,
+            end_date=self.today + timedelta(days=6),
+            project=project,
+            created_by=self.admin_user,
+        )
+        # Le premier topographe est occupé toute la semaine
+        task.assigned_employees.add(self.employees[0].user)
+
+    def test_least_loaded_with_position(self):
+        """Classement par charge croissante, filtré par poste, en requêtes constantes"""
+        params = {
+            "start": self.today.isoformat(),
+            "end": (self.today + timedelta(days=6)).isoformat(),
+            "position": "topographe",
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/api/projects/capacity/", params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(context.captured_queries), 1)
+        rows = response.data["employees"]
+        self.assertEqual(
+            [row["employee_id"] for row in rows], [self.employees[1].id, self.employees[0].id]
+        )
+        self.assertEqual(rows[0]["free_days"], 7)
+        self.assertEqual(rows[1]["busy_days"], 7)
+
+        response = self.client.get("/api/projects/capacity/", {"start": self.today.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
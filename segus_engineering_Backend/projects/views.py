@@ -1,28 +1,184 @@
 import logging
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from decimal import Decimal, InvalidOperation
 
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.db.models import Case, Count, F, IntegerField, Prefetch, Q, When
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from employees.permissions import IsAdminRole
-from .models import Project, SubTask, Task
+from notifications.dispatch import NotificationDispatcher
+
+from .cache import get_or_build_employee_dashboard
+from .models import Project, SubTask, Task, kilometrage_progress
+from .pagination import SubTaskKeysetPagination, TaskKeysetPagination
 from .serializers import (
+    BulkAssignmentSerializer,
     ProjectDetailSerializer,
     ProjectSerializer,
+    SubTaskBulkCompletionSerializer,
+    SubTaskBulkCreateSerializer,
+    SubTaskListSerializer,
+    SubTaskRowSerializer,
     SubTaskSerializer,
+    TaskListSerializer,
     TaskSerializer,
 )
+from .services import (
+    bulk_assign,
+    bulk_create_subtasks,
+    bulk_set_completion,
+    bulk_unassign,
+    kilometrage_spans,
+    resolve_assignees,
+    task_timeline,
+)
+from .workload import least_loaded_employees
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
+def parse_km_range(params):
+    """Lit les bornes km_from / km_to (None si absentes), ValueError si invalides"""
+    bounds = []
+    for name in ("km_from", "km_to"):
+        value = params.get(name)
+        try:
+            bounds.append(Decimal(value) if value not in (None, "") else None)
+        except InvalidOperation:
+            raise ValueError(f"{name} doit être un nombre") from None
+    return bounds
+
+
+def parse_date_window(params, required=False, max_days=366):
+    """Lit la fenêtre start / end (dates ISO), ValueError si invalide"""
+    bounds = []
+    for name in ("start", "end"):
+        value = params.get(name)
+        if not value:
+            if required:
+                raise ValueError(f"{name} est requis (AAAA-MM-JJ)")
+            bounds.append(None)
+            continue
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValueError(f"{name} doit être une date AAAA-MM-JJ")
+        bounds.append(parsed)
+    start, end = bounds
+    if start and end:
+        if start > end:
+            raise ValueError("start doit précéder end")
+        if (end - start).days > max_days:
+            raise ValueError(f"La fenêtre ne peut dépasser {max_days} jours")
+    return start, end
+
+
+ASSIGNMENT_LABELS = {
+    Project: ("Affectation aux projets", "projet(s)"),
+    Task: ("Affectation aux tâches", "tâche(s)"),
+    SubTask: ("Affectation aux sous-tâches", "sous-tâche(s)"),
+}
+ASSIGNMENT_NOTIFICATION_TYPES = {
+    Project: "project_assignment",
+    Task: "task_assignment",
+    SubTask: "task_assignment",
+}
+
+
+def notify_bulk_assignment(model, pairs):
+    """Une notification temps réel par employé, quel que soit le nombre d'objets"""
+    by_user = {}
+    for obj_id, user_id in pairs:
+        by_user.setdefault(user_id, []).append(obj_id)
+    if not by_user:
+        return
+
+    title, label = ASSIGNMENT_LABELS[model]
+    dispatcher = NotificationDispatcher()
+    for user_id, object_ids in by_user.items():
+        dispatcher.notify_user(
+            user_id,
+            title,
+            f"Vous avez été assigné à {len(object_ids)} {label}",
+            type=ASSIGNMENT_NOTIFICATION_TYPES[model],
+            realtime_type=model._meta.model_name,
+            object_ids=sorted(object_ids),
+        )
+    dispatcher.dispatch()
+
+
+def notify_task_progress(task, **counts):
+    """Un seul événement de progression agrégé pour une opération en masse"""
+    dispatcher = NotificationDispatcher()
+    dispatcher.notify_group(
+        "admins",
+        "Progression mise à jour",
+        f"{task.title} : {task.progress_percentage}%",
+        type="progress",
+        task_id=task.id,
+        project_id=task.project_id,
+        progress_percentage=task.progress_percentage,
+        kilometrage_progress=task.kilometrage_progress,
+        **counts,
+    )
+    dispatcher.dispatch()
+
+
+def bulk_assignment_response(request, model, assign=True):
+    """Réponse commune des endpoints bulk-assign / bulk-unassign"""
+    serializer = BulkAssignmentSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+
+    users, unknown = resolve_assignees(data["employee_ids"], data["matricules"])
+    if not users:
+        return Response(
+            {"error": "Aucun employé trouvé", "unknown": unknown},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if assign:
+        result = bulk_assign(model, data["ids"], users)
+        notify_bulk_assignment(model, result["pairs"])
+    else:
+        result = bulk_unassign(model, data["ids"], users)
+
+    return Response(
+        {
+            "objects": len(result["objects"]),
+            "employees": len(users),
+            "assigned" if assign else "unassigned": len(result["pairs"]),
+            "unknown": unknown,
+        }
+    )
+
+
+def kilometrage_response(request, subtasks, total, completed):
+    """Réponse commune des endpoints de plages kilométriques"""
+    try:
+        km_from, km_to = parse_km_range(request.query_params)
+    except ValueError as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(
+        {
+            "total_km": float(total),
+            "completed_km": float(completed),
+            "progress": kilometrage_progress(completed, total),
+            "tasks": kilometrage_spans(subtasks, km_from, km_to),
+        }
+    )
+
+
 class ProjectViewSet(viewsets.ModelViewSet):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
@@ -30,7 +186,15 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
     def get_permissions(self):
         """Configuration des permissions par action"""
-        if self.action in ["create", "update", "partial_update", "destroy"]:
+        if self.action in [
+            "create",
+            "update",
+            "partial_update",
+            "destroy",
+            "bulk_assign",
+            "bulk_unassign",
+            "capacity",
+        ]:
             return [IsAuthenticated(), IsAdminRole()]
         return [IsAuthenticated()]
 
@@ -40,9 +204,28 @@ class ProjectViewSet(viewsets.ModelViewSet):
         return ProjectSerializer
 
     def get_queryset(self):
-        queryset = Project.objects.select_related("created_by").prefetch_related(
-            "assigned_employees", "tasks__assigned_employees"
+        queryset = (
+            Project.objects.with_kilometrage()
+            .select_related("created_by")
+            .prefetch_related(
+                "assigned_employees",
+                Prefetch(
+                    "tasks",
+                    queryset=Task.objects.select_related("created_by").prefetch_related(
+                        "assigned_employees"
+                    ),
+                ),
+            )
         )
+        if self.action == "retrieve":
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "tasks__subtasks",
+                    queryset=SubTask.objects.select_related("created_by").prefetch_related(
+                        "assigned_employees"
+                    ),
+                )
+            )
 
         # Filtrage par statut
         status_filter = self.request.query_params.get("status", None)
@@ -84,13 +267,81 @@ class ProjectViewSet(viewsets.ModelViewSet):
             "totalTasks": project.total_tasks,
             "completedTasks": project.completed_tasks,
             "progressPercentage": project.progress_percentage,
-            "totalEmployees": project.assigned_employees.count(),
-            "tasksInProgress": project.tasks.filter(status="IN_PROGRESS").count(),
-            "tasksTodo": project.tasks.filter(status="TODO").count(),
-            "tasksBlocked": project.tasks.filter(status="BLOCKED").count(),
+            "totalEmployees": len(project.assigned_employees.all()),
+            "tasksInProgress": project.count_tasks("IN_PROGRESS"),
+            "tasksTodo": project.count_tasks("TODO"),
+            "tasksBlocked": project.count_tasks("BLOCKED"),
         }
         return Response(stats)
 
+    @action(detail=True, methods=["get"])
+    def timeline(self, request, pk=None):
+        """Frise compacte des tâches du projet (?start=&end= optionnels)"""
+        project = get_object_or_404(Project.objects.only("id", "title"), pk=pk)
+        try:
+            start, end = parse_date_window(request.query_params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        data = task_timeline(Task.objects.filter(project=project), start, end)
+        return Response({"project": project.id, "title": project.title, **data})
+
+    @action(detail=False, methods=["get"], url_path="timeline")
+    def timeline_window(self, request):
+        """Frise compacte de tous les projets sur une fenêtre ?start=&end= (obligatoire)"""
+        try:
+            start, end = parse_date_window(request.query_params, required=True)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        tasks = Task.objects.all()
+        status_filter = request.query_params.get("status")
+        if status_filter:
+            tasks = tasks.filter(project__status=status_filter)
+        return Response({"start": start, "end": end, **task_timeline(tasks, start, end)})
+
+    @action(detail=False, methods=["get"])
+    def capacity(self, request):
+        """Employés les moins chargés sur ?start=&end= (filtres ?position=, ?limit=)"""
+        try:
+            start, end = parse_date_window(request.query_params, required=True)
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 100)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        days = (end - start).days + 1
+        employees = least_loaded_employees(start, end, request.query_params.get("position"), limit)
+        return Response(
+            {
+                "start": start,
+                "end": end,
+                "employees": [
+                    {
+                        "employee_id": employee.id,
+                        "user_id": employee.user_id,
+                        "matricule": employee.matricule,
+                        "name": employee.user.get_full_name() or employee.user.username,
+                        "position": employee.position,
+                        "task_days": employee.task_days,
+                        "subtask_days": employee.subtask_days,
+                        "busy_days": employee.busy_days,
+                        "free_days": days - employee.busy_days,
+                        "worked_hours": round(employee.worked_seconds / 3600, 2),
+                    }
+                    for employee in employees
+                ],
+            }
+        )
+
+    @action(detail=True, methods=["get"])
+    def kilometrage(self, request, pk=None):
+        """Plages kilométriques terminées / restantes du projet (?km_from=&km_to=)"""
+        project = self.get_object()
+        return kilometrage_response(
+            request,
+            SubTask.objects.filter(task__project=project),
+            project.kilometrage_total,
+            project.kilometrage_completed,
+        )
+
     @action(detail=True, methods=["post"])
     def assign(self, request, pk=None):
         """Assigner un employé à un projet"""
@@ -100,22 +351,17 @@ class ProjectViewSet(viewsets.ModelViewSet):
         try:
             employee = User.objects.get(id=employee_id)
             project.assigned_employees.add(employee)
-            # Notifier l'employé en temps réel
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f"user_{employee.id}",
-                {
-                    "type": "notification",
-                    "data": {
-                        "title": "Affectation au projet",
-                        "message": f"Vous avez été ajouté au projet: {project.title}",
-                        "type": "project",
-                        "project_id": project.id,
-                        "created_at": timezone.now().isoformat(),
-                        "is_read": False,
-                    },
-                },
+            # Notifier l'employé (persisté, temps réel après commit)
+            dispatcher = NotificationDispatcher()
+            dispatcher.notify_user(
+                employee.id,
+                "Affectation au projet",
+                f"Vous avez été ajouté au projet: {project.title}",
+                type="project_assignment",
+                realtime_type="project",
+                project_id=project.id,
             )
+            dispatcher.dispatch()
             return Response({"message": "Employé assigné avec succès"})
         except User.DoesNotExist:
             return Response({"error": "Employé non trouvé"}, status=status.HTTP_404_NOT_FOUND)
@@ -133,155 +379,28 @@ class ProjectViewSet(viewsets.ModelViewSet):
         except User.DoesNotExist:
             return Response({"error": "Employé non trouvé"}, status=status.HTTP_404_NOT_FOUND)
 
+    @action(detail=False, methods=["post"], url_path="bulk-assign")
+    def bulk_assign(self, request):
+        """Assigner des employés (ids ou matricules) à plusieurs projets"""
+        return bulk_assignment_response(request, Project)
+
+    @action(detail=False, methods=["post"], url_path="bulk-unassign")
+    def bulk_unassign(self, request):
+        """Désassigner des employés de plusieurs projets"""
+        return bulk_assignment_response(request, Project, assign=False)
+
     @action(detail=False, methods=["get"], url_path="employee/dashboard")
     def employee_dashboard(self, request):
         """Dashboard pour l'employé connecté"""
-        user = request.user
+        from employees.models import Employee
 
+        user = request.user
         try:
-            # Récupérer l'employé
-            from employees.models import Employee
-
-            employee = Employee.objects.get(user=user)
-
-            # Projets assignés à l'employé
-            projects = Project.objects.filter(assigned_employees=user)
-
-            # Statistiques des projets
-            total_projects = projects.count()
-            active_projects = projects.filter(status="IN_PROGRESS").count()
-            completed_projects = projects.filter(status="COMPLETED").count()
-
-            # Calculer les projets en retard de manière sécurisée
-            overdue_projects = 0
-            try:
-                overdue_projects = projects.filter(
-                    deadline__lt=timezone.now().date(),
-                    status__in=["TODO", "IN_PROGRESS"],
-                ).count()
-            except Exception:
-                overdue_projects = 0
-
-            # Tâches assignées
-            tasks = Task.objects.filter(assigned_employees=user)
-            total_tasks = tasks.count()
-            completed_tasks = tasks.filter(status="COMPLETED").count()
-            in_progress_tasks = tasks.filter(status="IN_PROGRESS").count()
-            todo_tasks = tasks.filter(status="TODO").count()
-
-            # Sous-tâches assignées
-            subtasks = SubTask.objects.filter(assigned_employees=user)
-            total_subtasks = subtasks.count()
-            completed_subtasks = subtasks.filter(is_completed=True).count()
-
-            # Tâches urgentes (priorité haute et deadline proche)
-            urgent_tasks = []
-            try:
-                urgent_tasks = tasks.filter(status__in=["TODO", "IN_PROGRESS"]).order_by(
-                    "deadline"
-                )[:5]
-            except Exception:
-                urgent_tasks = []
-
-            # Projets récents avec détails
-            recent_projects = []
-            try:
-                for project in projects.order_by("-created_at")[:5]:
-                    project_data = {
-                        "id": project.id,
-                        "name": project.title,
-                        "status": (project.status.lower() if project.status else "unknown"),
-                        "deadline": (project.deadline.isoformat() if project.deadline else None),
-                        "progress": getattr(project, "progress_percentage", 0) or 0,
-                        "client_name": getattr(project, "client_name", "N/A"),
-                    }
-                    recent_projects.append(project_data)
-            except Exception as e:
-                logger.error(f"Erreur lors de la récupération des projets récents: {str(e)}")
-                recent_projects = []
-
-            # Tâches urgentes avec détails
-            urgent_tasks_data = []
-            try:
-                for task in urgent_tasks:
-                    task_data = {
-                        "id": task.id,
-                        "title": task.title,
-                        "priority": (
-                            getattr(task, "priority", "medium").lower()
-                            if hasattr(task, "priority")
-                            else "medium"
-                        ),
-                        "deadline": (task.deadline.isoformat() if task.deadline else None),
-                        "progress": getattr(task, "progress", 0) or 0,
-                        "project_name": task.project.title if task.project else "N/A",
-                        "status": task.status.lower() if task.status else "unknown",
-                    }
-                    urgent_tasks_data.append(task_data)
-            except Exception as e:
-                logger.error(f"Erreur lors de la récupération des tâches urgentes: {str(e)}")
-                urgent_tasks_data = []
-
-            # Activité récente simulée
-            recent_activity = [
-                {
-                    "type": "task",
-                    "title": "Tâche mise à jour",
-                    "description": "Progression mise à jour",
-                    "project_name": "Projet récent",
-                    "timestamp": timezone.now().isoformat(),
-                }
-            ]
-
-            # Calculer la performance (basée sur les tâches terminées)
-            performance_percentage = 0
-            if total_tasks > 0:
-                performance_percentage = round((completed_tasks / total_tasks) * 100)
-
-            performance_level = (
-                "Excellent"
-                if performance_percentage >= 90
-                else (
-                    "Bon"
-                    if performance_percentage >= 70
-                    else "Moyen" if performance_percentage >= 50 else "À améliorer"
+            return Response(
+                get_or_build_employee_dashboard(
+                    user.id, lambda: self._build_employee_dashboard(user)
                 )
             )
-
-            dashboard_data = {
-                "employee_info": {
-                    "name": employee.full_name,
-                    "position": getattr(employee, "position", "Employé"),
-                    "email": employee.email or user.email,
-                },
-                "projects_overview": {
-                    "total": total_projects,
-                    "active": active_projects,
-                    "completed": completed_projects,
-                    "overdue": overdue_projects,
-                },
-                "tasks_overview": {
-                    "total": total_tasks,
-                    "completed": completed_tasks,
-                    "in_progress": in_progress_tasks,
-                    "todo": todo_tasks,
-                },
-                "subtasks_overview": {
-                    "total": total_subtasks,
-                    "completed": completed_subtasks,
-                    "pending": total_subtasks - completed_subtasks,
-                },
-                "performance": {
-                    "percentage": performance_percentage,
-                    "level": performance_level,
-                },
-                "recent_projects": recent_projects,
-                "urgent_tasks": urgent_tasks_data,
-                "recent_activity": recent_activity,
-            }
-
-            return Response(dashboard_data)
-
         except Employee.DoesNotExist:
             return Response(
                 {"error": "Profil employé non trouvé"}, status=status.HTTP_404_NOT_FOUND
@@ -293,11 +412,133 @@ class ProjectViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    def _build_employee_dashboard(self, user):
+        """Construit le dashboard : un agrégat conditionnel par type d'entité"""
+        from employees.models import Employee
+
+        employee = Employee.objects.select_related("user").get(user=user)
+        today = timezone.localdate()
+        open_statuses = ["TODO", "IN_PROGRESS"]
+
+        projects = Project.objects.filter(assigned_employees=user)
+        projects_overview = projects.aggregate(
+            total=Count("id"),
+            active=Count("id", filter=Q(status="ACTIVE")),
+            completed=Count("id", filter=Q(status="COMPLETED")),
+            overdue=Count(
+                "id",
+                filter=Q(end_date__lt=today) & ~Q(status__in=["COMPLETED", "CANCELLED"]),
+            ),
+        )
+
+        tasks = Task.objects.filter(assigned_employees=user)
+        tasks_overview = tasks.aggregate(
+            total=Count("id"),
+            completed=Count("id", filter=Q(status="COMPLETED")),
+            in_progress=Count("id", filter=Q(status="IN_PROGRESS")),
+            todo=Count("id", filter=Q(status="TODO")),
+        )
+
+        subtasks_overview = SubTask.objects.filter(assigned_employees=user).aggregate(
+            total=Count("id"), completed=Count("id", filter=Q(is_completed=True))
+        )
+        subtasks_overview["pending"] = subtasks_overview["total"] - subtasks_overview["completed"]
+
+        # Projets récents (progression lue depuis les compteurs stockés)
+        recent_projects = [
+            {
+                "id": project.id,
+                "name": project.title,
+                "status": project.status.lower(),
+                "deadline": project.end_date.isoformat(),
+                "progress": project.progress_percentage,
+                "client_name": getattr(project, "client_name", "N/A"),
+            }
+            for project in projects.order_by("-created_at")[:5]
+        ]
+
+        # Tâches urgentes : échéance la plus proche, puis priorité la plus haute
+        priority_rank = Case(
+            When(priority="URGENT", then=0),
+            When(priority="HIGH", then=1),
+            When(priority="MEDIUM", then=2),
+            default=3,
+            output_field=IntegerField(),
+        )
+        urgent_tasks = (
+            tasks.filter(status__in=open_statuses)
+            .select_related("project")
+            .order_by("end_date", priority_rank)[:5]
+        )
+        urgent_tasks_data = [
+            {
+                "id": task.id,
+                "title": task.title,
+                "priority": task.priority.lower(),
+                "deadline": task.end_date.isoformat(),
+                "progress": task.progress_percentage,
+                "project_name": task.project.title,
+                "status": task.status.lower(),
+            }
+            for task in urgent_tasks
+        ]
+
+        # Activité récente simulée
+        recent_activity = [
+            {
+                "type": "task",
+                "title": "Tâche mise à jour",
+                "description": "Progression mise à jour",
+                "project_name": "Projet récent",
+                "timestamp": timezone.now().isoformat(),
+            }
+        ]
+
+        # Calculer la performance (basée sur les tâches terminées)
+        performance_percentage = 0
+        if tasks_overview["total"] > 0:
+            performance_percentage = round(
+                (tasks_overview["completed"] / tasks_overview["total"]) * 100
+            )
+
+        performance_level = (
+            "Excellent"
+            if performance_percentage >= 90
+            else (
+                "Bon"
+                if performance_percentage >= 70
+                else "Moyen" if performance_percentage >= 50 else "À améliorer"
+            )
+        )
+
+        return {
+            "employee_info": {
+                "name": employee.full_name,
+                "position": employee.position or "Employé",
+                "email": employee.email or user.email,
+            },
+            "projects_overview": projects_overview,
+            "tasks_overview": tasks_overview,
+            "subtasks_overview": subtasks_overview,
+            "performance": {
+                "percentage": performance_percentage,
+                "level": performance_level,
+            },
+            "recent_projects": recent_projects,
+            "urgent_tasks": urgent_tasks_data,
+            "recent_activity": recent_activity,
+        }
+
     @action(detail=False, methods=["get"], url_path="employee/projects")
     def employee_projects(self, request):
         """Projets assignés à l'employé connecté"""
         user = request.user
-        projects = Project.objects.filter(assigned_employees=user)
+        projects = (
+            Project.objects.with_kilometrage()
+            .filter(assigned_employees=user)
+            .select_related("created_by")
+            .prefetch_related("assigned_employees", "tasks")
+        )
 
         # Filtrage par statut si fourni
         status_filter = request.query_params.get("status", None)
@@ -311,7 +552,19 @@ class ProjectViewSet(viewsets.ModelViewSet):
     def employee_tasks(self, request):
         """Tâches assignées à l'employé connecté"""
         user = request.user
-        tasks = Task.objects.filter(assigned_employees=user)
+        tasks = (
+            Task.objects.filter(assigned_employees=user)
+            .select_related("created_by")
+            .prefetch_related(
+                "assigned_employees",
+                Prefetch(
+                    "subtasks",
+                    queryset=SubTask.objects.select_related("created_by").prefetch_related(
+                        "assigned_employees"
+                    ),
+                ),
+            )
+        )
 
         # Filtrage par statut si fourni
         status_filter = request.query_params.get("status", None)
@@ -322,15 +575,57 @@ class ProjectViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class TaskViewSet(viewsets.ModelViewSet):
+class CompactListMixin:
+    """
+    Listes paginées par clé (?cursor, ?page_size, ?since) servies avec le
+    serializer compact `list_serializer_class` ; sans ces paramètres, la liste
+    complète historique est conservée.
+    """
+
+    list_serializer_class = None
+    compact_actions = ("list",)
+
+    def is_compact_list(self):
+        return self.action in self.compact_actions and self.paginator.is_requested(self.request)
+
+    def get_serializer_class(self):
+        if self.is_compact_list():
+            return self.list_serializer_class
+        return super().get_serializer_class()
+
+    def removal_user_id(self):
+        """Employé dont les désaffectations sortent des lignes de la liste (?since)"""
+        if self.action.startswith("my_"):
+            return self.request.user.pk
+        return self.request.query_params.get("employee") or None
+
+    def list_response(self, queryset):
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(queryset, many=True).data)
+
+
+class TaskViewSet(CompactListMixin, viewsets.ModelViewSet):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
+    list_serializer_class = TaskListSerializer
+    pagination_class = TaskKeysetPagination
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        queryset = Task.objects.select_related("project", "created_by").prefetch_related(
-            "assigned_employees", "subtasks"
-        )
+        if self.is_compact_list():
+            queryset = Task.objects.prefetch_related("assigned_employees")
+        else:
+            queryset = Task.objects.select_related("project", "created_by").prefetch_related(
+                "assigned_employees",
+                Prefetch(
+                    "subtasks",
+                    queryset=SubTask.objects.select_related("created_by").prefetch_related(
+                        "assigned_employees"
+                    ),
+                ),
+            )
 
         # Filtrage par projet
         project_id = self.request.query_params.get("project", None)
@@ -356,46 +651,65 @@ class TaskViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
-        # Émettre des notifications temps réel pour chaque employé assigné
-        subtask = serializer.instance
-        try:
-            assigned_users = list(subtask.assigned_employees.all())
-        except Exception:
-            assigned_users = []
-
-        if assigned_users:
-            channel_layer = get_channel_layer()
-            for user in assigned_users:
-                try:
-                    async_to_sync(channel_layer.group_send)(
-                        f"user_{user.id}",
-                        {
-                            "type": "notification",
-                            "data": {
-                                "title": "Nouvelle sous-tâche",
-                                "message": f"Vous avez été assigné à la sous-tâche: {getattr(subtask, 'section_name', 'Sous-tâche')}",
-                                "type": "subtask",
-                                "subtask_id": subtask.id,
-                                "task_id": subtask.task_id if hasattr(subtask, 'task_id') else None,
-                                "created_at": timezone.now().isoformat(),
-                                "is_read": False,
-                            },
-                        },
-                    )
-                except Exception:
-                    # Ne pas casser la création si la notif échoue
-                    logger.exception("Erreur d'envoi de notification temps réel")
-
-
-class SubTaskViewSet(viewsets.ModelViewSet):
+        # Notifier chaque employé assigné : un bulk_create, un envoi groupé après commit
+        task = serializer.instance
+        dispatcher = NotificationDispatcher()
+        for user_id in task.assigned_employees.values_list("id", flat=True):
+            dispatcher.notify_user(
+                user_id,
+                "Nouvelle tâche",
+                f"Vous avez été assigné à la tâche: {task.title}",
+                type="task_assignment",
+                realtime_type="task",
+                task_id=task.id,
+                project_id=task.project_id,
+            )
+        dispatcher.dispatch()
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-assign",
+        permission_classes=[IsAuthenticated, IsAdminRole],
+    )
+    def bulk_assign(self, request):
+        """Assigner des employés (ids ou matricules) à plusieurs tâches"""
+        return bulk_assignment_response(request, Task)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-unassign",
+        permission_classes=[IsAuthenticated, IsAdminRole],
+    )
+    def bulk_unassign(self, request):
+        """Désassigner des employés de plusieurs tâches"""
+        return bulk_assignment_response(request, Task, assign=False)
+
+    @action(detail=True, methods=["get"])
+    def kilometrage(self, request, pk=None):
+        """Plages kilométriques terminées / restantes de la tâche (?km_from=&km_to=)"""
+        task = self.get_object()
+        return kilometrage_response(
+            request, task.subtasks.all(), task.total_kilometrage, task.completed_kilometrage
+        )
+
+
+class SubTaskViewSet(CompactListMixin, viewsets.ModelViewSet):
     queryset = SubTask.objects.all()
     serializer_class = SubTaskSerializer
+    list_serializer_class = SubTaskListSerializer
+    pagination_class = SubTaskKeysetPagination
+    compact_actions = ("list", "my_subtasks")
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        queryset = SubTask.objects.select_related("task", "created_by").prefetch_related(
-            "assigned_employees"
-        )
+        if self.is_compact_list():
+            queryset = SubTask.objects.prefetch_related("assigned_employees")
+        else:
+            queryset = SubTask.objects.select_related("task", "created_by").prefetch_related(
+                "assigned_employees"
+            )
 
         # Filtrage par tâche
         task_id = self.request.query_params.get("task", None)
@@ -413,6 +727,20 @@ class SubTaskViewSet(viewsets.ModelViewSet):
         if employee_id:
             queryset = queryset.filter(assigned_employees__id=employee_id)
 
+        # Sections chevauchant une plage kilométrique (index task, km_start)
+        try:
+            km_from, km_to = parse_km_range(self.request.query_params)
+        except ValueError as exc:
+            raise ValidationError({"error": str(exc)})
+        if km_from is not None or km_to is not None:
+            if km_from is not None:
+                queryset = queryset.alias(km_end=F("km_start") + F("kilometrage")).filter(
+                    km_end__gt=km_from
+                )
+            if km_to is not None:
+                queryset = queryset.filter(km_start__lt=km_to)
+            return queryset.order_by("task_id", "km_start")
+
         return queryset.order_by("section_number")
 
     def perform_create(self, serializer):
@@ -421,25 +749,106 @@ class SubTaskViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["post"], url_path="mark_completed")
     def mark_completed(self, request, pk=None):
         subtask = self.get_object()
-        subtask.is_completed = True
-        from django.utils import timezone
-        subtask.completed_at = timezone.now()
-        subtask.save()
+        subtask.mark_completed()
         return Response(SubTaskSerializer(subtask).data)
 
     @action(detail=True, methods=["post"], url_path="mark_uncompleted")
     def mark_uncompleted(self, request, pk=None):
         subtask = self.get_object()
-        subtask.is_completed = False
-        subtask.completed_at = None
-        subtask.save()
+        subtask.mark_uncompleted()
         return Response(SubTaskSerializer(subtask).data)
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-assign",
+        permission_classes=[IsAuthenticated, IsAdminRole],
+    )
+    def bulk_assign(self, request):
+        """Assigner des employés (ids ou matricules) à plusieurs sous-tâches"""
+        return bulk_assignment_response(request, SubTask)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-unassign",
+        permission_classes=[IsAuthenticated, IsAdminRole],
+    )
+    def bulk_unassign(self, request):
+        """Désassigner des employés de plusieurs sous-tâches"""
+        return bulk_assignment_response(request, SubTask, assign=False)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-create",
+        permission_classes=[IsAuthenticated, IsAdminRole],
+    )
+    def bulk_create(self, request):
+        """Créer des sections en masse (tableau JSON `sections` ou fichier CSV `file`)"""
+        serializer = SubTaskBulkCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        rows = SubTaskRowSerializer(data=data["sections"], many=True)
+        if not rows.is_valid():
+            # Selon la version de DRF : liste alignée sur les lignes ou dict {index: erreurs}
+            row_errors = rows.errors
+            if not isinstance(row_errors, dict):
+                row_errors = dict(enumerate(row_errors))
+            errors = [
+                {"row": index + 1, "errors": errors}
+                for index, errors in sorted(row_errors.items())
+                if errors
+            ]
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        users, unknown = resolve_assignees(data["employee_ids"], data["matricules"])
+        task = data["task"]
+        subtasks = bulk_create_subtasks(task, rows.validated_data, request.user, users)
+        notify_task_progress(task, created=len(subtasks))
+        return Response(
+            {
+                "task": task.id,
+                "created": len(subtasks),
+                "ids": [subtask.pk for subtask in subtasks],
+                "unknown": unknown,
+                "progress_percentage": task.progress_percentage,
+                "kilometrage_progress": task.kilometrage_progress,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=False, methods=["post"], url_path="bulk-complete")
+    def bulk_complete(self, request):
+        """Marquer une liste ou une plage de sections comme terminées (ou non)"""
+        serializer = SubTaskBulkCompletionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        task = serializer.validated_data["task"]
+        completed = serializer.validated_data["completed"]
+
+        changed = bulk_set_completion(task, serializer.selected_subtask_ids(), completed)
+        if changed:
+            notify_task_progress(task, **{"completed" if completed else "uncompleted": len(changed)})
+        return Response(
+            {
+                "task": task.id,
+                "changed": len(changed),
+                "ids": changed,
+                "progress_percentage": task.progress_percentage,
+                "kilometrage_progress": task.kilometrage_progress,
+            }
+        )
+
     @action(detail=False, methods=["get"], url_path="my-subtasks")
     def my_subtasks(self, request):
         """Sous-tâches assignées à l'employé connecté"""
         user = request.user
-        subtasks = SubTask.objects.filter(assigned_employees=user)
+        subtasks = SubTask.objects.filter(assigned_employees=user).prefetch_related(
+            "assigned_employees"
+        )
+        if not self.is_compact_list():
+            subtasks = subtasks.select_related("task", "created_by")
 
         # Filtrage par statut de completion si fourni
         is_completed = request.query_params.get("completed", None)
@@ -447,8 +856,7 @@ class SubTaskViewSet(viewsets.ModelViewSet):
             completed = is_completed.lower() in ["true", "1", "yes"]
             subtasks = subtasks.filter(is_completed=completed)
 
-        serializer = SubTaskSerializer(subtasks, many=True)
-        return Response(serializer.data)
+        return self.list_response(subtasks)
 
     def update(self, request, *args, **kwargs):
         """Mise à jour d'une sous-tâche avec gestion du statut"""
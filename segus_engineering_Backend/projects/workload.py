@@ -0,0 +1,240 @@
+# projects/workload.py
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, IntegerField, Max, Min, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import EmployeeWorkload, SubTask, Task
+
+_batch = threading.local()
+
+
+def employee_daily_load(intervals, window_start=None, window_end=None):
+    """
+    Charge journalière par employé (nombre de tâches qui se chevauchent), par
+    balayage (sweep-line) des débuts/fins triés : O(n log n) au lieu d'une
+    boucle par jour et par tâche.
+
+    `intervals` : itérable de (user_id, début, fin) aux bornes incluses.
+    Retourne {user_id: {"peak": n, "segments": [[du, au, charge], ...]}} où
+    chaque segment est une suite de jours à charge constante non nulle.
+    """
+    one_day = timedelta(days=1)
+    events = defaultdict(list)
+    for user_id, start, end in intervals:
+        if window_start is not None:
+            start = max(start, window_start)
+        if window_end is not None:
+            end = min(end, window_end)
+        if start <= end:
+            events[user_id].append((start, 1))
+            events[user_id].append((end + one_day, -1))
+
+    load = {}
+    for user_id, user_events in events.items():
+        user_events.sort()
+        segments = []
+        current = 0
+        for index, (day, delta) in enumerate(user_events):
+            current += delta
+            # Les événements d'un même jour sont tous appliqués avant d'émettre le segment
+            if index + 1 < len(user_events) and user_events[index + 1][0] == day:
+                continue
+            if current:
+                segment_end = user_events[index + 1][0] - one_day
+                if segments and segments[-1][2] == current and segments[-1][1] + one_day == day:
+                    segments[-1][1] = segment_end
+                else:
+                    segments.append([day, segment_end, current])
+        load[user_id] = {
+            "peak": max((segment[2] for segment in segments), default=0),
+            "segments": segments,
+        }
+    return load
+
+
+def _accumulate(days, slot, load):
+    one_day = timedelta(days=1)
+    for user_id, user_load in load.items():
+        for start, end, count in user_load["segments"]:
+            day = start
+            while day <= end:
+                days[user_id, day][slot] += count
+                day += one_day
+
+
+def rebuild_workload(user_ids, start, end):
+    """
+    Recalcule l'index de capacité des employés `user_ids` entre `start` et `end`
+    (inclus) depuis les affectations ouvertes et les sessions de travail :
+    tâches non terminées, sous-tâches non terminées (sur les dates de leur tâche)
+    et temps travaillé. Retourne le nombre de jours chargés écrits.
+    """
+    from employees.models import WorkSession
+
+    user_ids = {pk for pk in user_ids if pk is not None}
+    if not user_ids or start is None or end is None or start > end:
+        return 0
+
+    tasks = (
+        Task.assigned_employees.through.objects.filter(
+            user_id__in=user_ids, task__start_date__lte=end, task__end_date__gte=start
+        )
+        .exclude(task__status="COMPLETED")
+        .values_list("user_id", "task__start_date", "task__end_date")
+    )
+    subtasks = (
+        SubTask.assigned_employees.through.objects.filter(
+            user_id__in=user_ids,
+            subtask__is_completed=False,
+            subtask__task__start_date__lte=end,
+            subtask__task__end_date__gte=start,
+        )
+        .exclude(subtask__task__status="COMPLETED")
+        .values_list("user_id", "subtask__task__start_date", "subtask__task__end_date")
+    )
+    sessions = WorkSession.objects.filter(
+        employee__user_id__in=user_ids,
+        total_work_time__isnull=False,
+        start_time__date__gte=start,
+        start_time__date__lte=end,
+    ).values_list("employee__user_id", "start_time", "total_work_time")
+
+    days = defaultdict(lambda: [0, 0, 0])
+    _accumulate(days, 0, employee_daily_load(tasks, start, end))
+    _accumulate(days, 1, employee_daily_load(subtasks, start, end))
+    for user_id, started, worked in sessions:
+        days[user_id, timezone.localdate(started)][2] += int(worked.total_seconds())
+
+    with transaction.atomic(savepoint=False):
+        EmployeeWorkload.objects.filter(user_id__in=user_ids, date__range=(start, end)).delete()
+        EmployeeWorkload.objects.bulk_create(
+            [
+                EmployeeWorkload(
+                    user_id=user_id,
+                    date=day,
+                    task_count=task_count,
+                    subtask_count=subtask_count,
+                    worked_seconds=worked_seconds,
+                )
+                for (user_id, day), (task_count, subtask_count, worked_seconds) in days.items()
+            ],
+            batch_size=1000,
+        )
+    return len(days)
+
+
+def task_span(task_ids=(), subtask_ids=()):
+    """Période (début, fin) couverte par des tâches et/ou les tâches parentes de sous-tâches"""
+    condition = Q()
+    if task_ids:
+        condition |= Q(pk__in=[pk for pk in task_ids if pk is not None])
+    if subtask_ids:
+        condition |= Q(subtasks__pk__in=list(subtask_ids))
+    if not condition:
+        return None
+    span = Task.objects.filter(condition).aggregate(start=Min("start_date"), end=Max("end_date"))
+    return (span["start"], span["end"]) if span["start"] else None
+
+
+def workload_scope(model, instance):
+    """Employés et période concernés par un projet, une tâche ou une sous-tâche"""
+    task_through = Task.assigned_employees.through.objects
+    subtask_through = SubTask.assigned_employees.through.objects
+    if model is SubTask:
+        users = subtask_through.filter(subtask_id=instance.pk)
+        return set(users.values_list("user_id", flat=True)), task_span([instance.task_id])
+    if model is Task:
+        task_ids = [instance.pk]
+    else:
+        task_ids = list(instance.tasks.values_list("pk", flat=True))
+    users = set(task_through.filter(task_id__in=task_ids).values_list("user_id", flat=True))
+    users.update(
+        subtask_through.filter(subtask__task_id__in=task_ids).values_list("user_id", flat=True)
+    )
+    return users, task_span(task_ids)
+
+
+def refresh_assignments(user_ids, model, pks):
+    """Met à jour l'index pour des affectations à des tâches (Task) ou sous-tâches (SubTask)"""
+    batch = getattr(_batch, "pending", None)
+    if batch is not None:
+        # La période est résolue une seule fois, à la fin du lot
+        batch["users"].update(user_ids)
+        batch[model].update(pks)
+        return 0
+    if model is SubTask:
+        return refresh_workload(user_ids, task_span(subtask_ids=pks))
+    return refresh_workload(user_ids, task_span(task_ids=pks))
+
+
+def refresh_workload(user_ids, *spans):
+    """Met à jour l'index des employés `user_ids` sur l'union des périodes `spans`"""
+    spans = [span for span in spans if span and None not in span]
+    if not spans:
+        return 0
+    batch = getattr(_batch, "pending", None)
+    if batch is not None:
+        batch["users"].update(user_ids)
+        batch["spans"].extend(spans)
+        return 0
+    return rebuild_workload(
+        user_ids, min(span[0] for span in spans), max(span[1] for span in spans)
+    )
+
+
+@contextmanager
+def batched_workload():
+    """
+    Regroupe les mises à jour de l'index émises dans le bloc (ex. un m2m_changed
+    par utilisateur lors d'une affectation en masse) en une seule reconstruction.
+    """
+    if getattr(_batch, "pending", None) is not None:
+        yield
+        return
+    _batch.pending = pending = {"users": set(), "spans": [], Task: set(), SubTask: set()}
+    try:
+        yield
+    finally:
+        _batch.pending = None
+    if pending["users"]:
+        span = None
+        if pending[Task] or pending[SubTask]:
+            span = task_span(pending[Task], pending[SubTask])
+        refresh_workload(pending["users"], span, *pending["spans"])
+
+
+def least_loaded_employees(start, end, position=None, limit=10):
+    """
+    Employés actifs les moins chargés entre `start` et `end` (inclus), filtrés
+    par poste : une requête, des sous-requêtes sur l'index (utilisateur, date).
+    """
+    from employees.models import Employee
+
+    window = EmployeeWorkload.objects.filter(user=OuterRef("user_id"), date__range=(start, end))
+
+    def total(aggregate):
+        return Coalesce(
+            Subquery(
+                window.values("user").annotate(total=aggregate).values("total"),
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+
+    employees = Employee.objects.filter(is_active=True, user__is_active=True).select_related("user")
+    if position:
+        employees = employees.filter(position__iexact=position)
+    employees = employees.annotate(
+        task_days=total(Sum("task_count")),
+        subtask_days=total(Sum("subtask_count")),
+        busy_days=total(Count("pk", filter=Q(task_count__gt=0) | Q(subtask_count__gt=0))),
+        worked_seconds=total(Sum("worked_seconds")),
+    ).order_by("task_days", "subtask_days", "busy_days", "worked_seconds", "pk")
+    return employees[:limit]
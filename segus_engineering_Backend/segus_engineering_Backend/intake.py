@@ -0,0 +1,256 @@
+"""
+Garde des formulaires publics (contact, candidatures).
+
+Appelée en tête de `create`, avant tout serializer, écriture ou envoi d'email :
+
+    contact_guard = IntakeGuard("contact", fingerprint_fields=("email", "subject", "message"))
+
+    rejection = contact_guard.check(request)
+    if rejection:
+        return rejection
+    ...
+    contact_guard.accepted(request)
+
+- limitation de débit par IP puis par email, à deux niveaux : seau à jetons
+  (algorithme GCRA, un seul horodatage par clé) en mémoire du processus, qui
+  absorbe un flot local sans aller-retour, puis compteur par fenêtre fixe dans
+  le cache partagé entre workers (cache.add + cache.incr, atomiques sur
+  Redis / Memcached) ;
+- l'IP est celle ajoutée par le dernier proxy de confiance
+  (INTAKE_TRUSTED_PROXIES), jamais une valeur choisie par le client ;
+- doublons : empreinte du contenu normalisé, refusée pendant
+  INTAKE_DEDUP_WINDOW secondes après un envoi accepté ;
+- filtres de score (INTAKE_SPAM_FILTERS) additionnés, refus au-delà de
+  INTAKE_SPAM_THRESHOLD ;
+- compteurs par formulaire et par issue dans le cache (`intake_counters`).
+"""
+
+import hashlib
+import math
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+OUTCOMES = ("accepted", "rate_limited", "duplicate", "spam")
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+LOCAL_MAX_KEYS = 10000
+_URL = re.compile(r"https?://|www\.", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+
+def parse_rate(rate):
+    """'10/hour' -> (10, 3600) ; None si pas de limite"""
+    if not rate:
+        return None
+    count, period = rate.split("/")
+    return int(count), PERIODS[period[0]]
+
+
+def client_ip(request):
+    """
+    IP du client. Chaque proxy ajoute à droite de X-Forwarded-For l'adresse
+    qui l'a contacté : derrière INTAKE_TRUSTED_PROXIES proxies, c'est l'entrée
+    de ce rang en partant de la droite. Les entrées plus à gauche viennent du
+    client et ne sont jamais utilisées ; sans proxy de confiance, REMOTE_ADDR.
+    """
+    trusted = getattr(settings, "INTAKE_TRUSTED_PROXIES", 0)
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    if trusted and len(hops) >= trusted:
+        return hops[-trusted]
+    return request.META.get("REMOTE_ADDR")
+
+
+class LocalStore:
+    """Horodatages GCRA en mémoire du processus, bornés à LOCAL_MAX_KEYS"""
+
+    def __init__(self):
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def get(self, key, now):
+        value, expires = self.values.get(key, (None, 0))
+        return value if expires > now else None
+
+    def set(self, key, value, timeout, now):
+        if len(self.values) >= LOCAL_MAX_KEYS:
+            self.values = {k: v for k, v in self.values.items() if v[1] > now}
+        self.values[key] = (value, now + timeout)
+
+
+def gcra(store, key, limit, period, now):
+    """
+    Seau de `limit` jetons rechargé en `period` secondes. Consomme un jeton et
+    retourne 0, ou le nombre de secondes à attendre si le seau est vide.
+    """
+    interval = period / limit
+    with store.lock:
+        theoretical = max(store.get(key, now) or now, now) + interval
+        if theoretical - now > period:
+            return theoretical - now - period
+        store.set(key, theoretical, theoretical - now, now)
+    return 0
+
+
+def fixed_window(key, limit, period, now):
+    """
+    Compteur partagé de la fenêtre de `period` secondes en cours : 0 si le
+    jeton est accordé, sinon les secondes jusqu'à la fenêtre suivante.
+    Plusieurs workers ne peuvent pas écraser la valeur les uns des autres.
+    """
+    window = int(now // period)
+    key = f"{key}:{window}"
+    cache.add(key, 0, timeout=period)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Clé expirée entre add et incr : nouvelle fenêtre
+        cache.add(key, 1, timeout=period)
+        count = 1
+    if count > limit:
+        return (window + 1) * period - now
+    return 0
+
+
+_local = LocalStore()
+
+
+def throttle(key, rate, now=None):
+    """Secondes d'attente (0 si autorisé) ; le niveau local refuse sans toucher au cache"""
+    parsed = parse_rate(rate)
+    if parsed is None:
+        return 0
+    now = now or time.time()
+    return gcra(_local, key, *parsed, now) or fixed_window(key, *parsed, now)
+
+
+def reset_local_buckets():
+    with _local.lock:
+        _local.values.clear()
+
+
+def _counter_key(form, outcome):
+    return f"intake:counter:{form}:{outcome}"
+
+
+def record(form, outcome):
+    key = _counter_key(form, outcome)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Clé évincée entre add et incr : compteur repris à 1
+        cache.set(key, 1, timeout=None)
+
+
+def intake_counters(forms=("contact", "application")):
+    """{formulaire: {issue: nombre}} depuis le dernier vidage du cache"""
+    keys = {(form, outcome): _counter_key(form, outcome) for form in forms for outcome in OUTCOMES}
+    values = cache.get_many(keys.values())
+    counters = {form: {} for form in forms}
+    for (form, outcome), key in keys.items():
+        counters[form][outcome] = values.get(key, 0)
+    return counters
+
+
+def honeypot_score(request, data, fields):
+    """Champ caché du formulaire rempli : robot"""
+    field = getattr(settings, "INTAKE_HONEYPOT_FIELD", "website")
+    return 1.0 if data.get(field) else 0.0
+
+
+def link_score(request, data, fields):
+    """Un quart de point par lien au-delà du premier"""
+    links = sum(len(_URL.findall(str(data.get(field) or ""))) for field in fields)
+    return max(links - 1, 0) * 0.25
+
+
+_filters = {}
+
+
+def spam_filters():
+    names = tuple(getattr(settings, "INTAKE_SPAM_FILTERS", ()))
+    if names not in _filters:
+        _filters[names] = [import_string(name) for name in names]
+    return _filters[names]
+
+
+def _normalize(value):
+    return _SPACES.sub(" ", str(value or "")).strip().lower()
+
+
+class IntakeGuard:
+    """Garde d'un formulaire public : débit, doublons et score de spam"""
+
+    def __init__(self, form, email_field="email", fingerprint_fields=(), text_fields=()):
+        self.form = form
+        self.email_field = email_field
+        self.fingerprint_fields = fingerprint_fields
+        self.text_fields = text_fields or fingerprint_fields
+
+    def fingerprint(self, data):
+        content = "\x1f".join(_normalize(data.get(field)) for field in self.fingerprint_fields)
+        return f"intake:seen:{self.form}:{hashlib.sha256(content.encode()).hexdigest()}"
+
+    def reject(self, outcome, message, code, retry_after=None):
+        record(self.form, outcome)
+        response = Response({"error": message}, status=code)
+        if retry_after:
+            response["Retry-After"] = str(math.ceil(retry_after))
+        return response
+
+    def check(self, request):
+        """Réponse de refus, ou None si l'envoi peut être traité"""
+        rates = getattr(settings, "INTAKE_RATES", {})
+
+        # L'IP d'abord : aucun corps (ni fichier joint) n'est lu pour un flot refusé
+        wait = throttle(f"intake:{self.form}:ip:{client_ip(request)}", rates.get("ip"))
+        if wait:
+            return self.reject(
+                "rate_limited",
+                "Trop de demandes, veuillez réessayer plus tard",
+                status.HTTP_429_TOO_MANY_REQUESTS,
+                wait,
+            )
+
+        data = request.data
+        if self.fingerprint_fields and cache.get(self.fingerprint(data)):
+            return self.reject(
+                "duplicate", "Cette demande a déjà été reçue", status.HTTP_409_CONFLICT
+            )
+
+        score = sum(scorer(request, data, self.text_fields) for scorer in spam_filters())
+        if score >= getattr(settings, "INTAKE_SPAM_THRESHOLD", 1.0):
+            return self.reject("spam", "Demande refusée", status.HTTP_400_BAD_REQUEST)
+
+        email = _normalize(data.get(self.email_field))
+        wait = email and throttle(f"intake:{self.form}:email:{email}", rates.get("email"))
+        if wait:
+            return self.reject(
+                "rate_limited",
+                "Trop de demandes pour cette adresse, veuillez réessayer plus tard",
+                status.HTTP_429_TOO_MANY_REQUESTS,
+                wait,
+            )
+        return None
+
+    def accepted(self, request):
+        """Envoi enregistré : l'empreinte ouvre la fenêtre de doublons"""
+        record(self.form, "accepted")
+        window = getattr(settings, "INTAKE_DEDUP_WINDOW", 600)
+        if self.fingerprint_fields and window:
+            cache.set(self.fingerprint(request.data), 1, timeout=window)
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAdminUser])
+def intake_stats_view(request):
+    """Compteurs de la garde des formulaires publics"""
+    return Response(intake_counters())
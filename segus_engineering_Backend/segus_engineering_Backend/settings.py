@@ -1,3 +1,4 @@
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -195,6 +196,38 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
 }
 
+# Durée de vie (secondes) du cache des tableaux de bord de gamification
+GAMIFICATION_DASHBOARD_CACHE_TIMEOUT = 300
+
+# Durée de vie (secondes) du cache du tableau de bord projets des employés
+PROJECTS_EMPLOYEE_DASHBOARD_CACHE_TIMEOUT = 60
+
+# Conservation (jours) des retraits servis par ?since ; au-delà, resynchronisation complète
+PROJECTS_SYNC_RETENTION_DAYS = 30
+
+# Threads d'extraction du texte des CV en arrière-plan (0 = extraction immédiate après commit)
+JOBS_CV_WORKERS = 2
+
+# Durée de vie (secondes) du cache des statistiques de recrutement
+JOBS_ANALYTICS_CACHE_TIMEOUT = 60
+
+# Durée de vie (secondes) des réponses anonymes des endpoints carrières (ETag par version)
+JOBS_CAREERS_CACHE_TIMEOUT = 300
+
+# Garde des formulaires publics contact / candidature (voir segus_engineering_Backend.intake)
+INTAKE_RATES = {"ip": "30/hour", "email": "5/hour"}
+INTAKE_DEDUP_WINDOW = 600
+INTAKE_SPAM_FILTERS = [
+    "segus_engineering_Backend.intake.honeypot_score",
+    "segus_engineering_Backend.intake.link_score",
+]
+INTAKE_SPAM_THRESHOLD = 1.0
+# Proxies devant Django qui ajoutent l'adresse du client à X-Forwarded-For.
+# 0 par défaut (REMOTE_ADDR) : le port 8000 est publié directement par les
+# docker-compose, l'en-tête y est falsifiable. Ne le régler (ex. 1 pour un nginx)
+# que si Django n'est joignable qu'à travers ce(s) proxy(s).
+INTAKE_TRUSTED_PROXIES = int(os.environ.get("INTAKE_TRUSTED_PROXIES", "0"))
+
 # Custom User Model
 AUTH_USER_MODEL = "users.User"
 
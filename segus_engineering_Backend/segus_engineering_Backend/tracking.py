@@ -0,0 +1,74 @@
+"""
+Suivi des modifications de champs d'un modèle sans requête supplémentaire.
+
+    class JobApplication(TrackedFieldsMixin, models.Model):
+        tracked_fields = ("status",)
+
+    application.has_changed("status")     # comparaison en mémoire
+    application.previous_value("status")  # valeur chargée / dernière sauvegardée
+"""
+
+
+class TrackedFieldsMixin:
+    """
+    Mémorise la valeur des champs `tracked_fields` au chargement (from_db) puis
+    après chaque sauvegarde. Une instance construite à la main ou dont le champ
+    a été différé retombe sur une lecture unique, mise en cache.
+    """
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_tracked_fields()
+        return instance
+
+    def snapshot_tracked_fields(self, fields=None):
+        """Enregistre la valeur actuelle des champs suivis (tous par défaut)"""
+        values = self.__dict__.setdefault("_tracked_values", {})
+        for name in self.tracked_fields if fields is None else fields:
+            attname = self._meta.get_field(name).attname
+            if attname in self.__dict__:
+                values[name] = self.__dict__[attname]
+
+    def previous_value(self, field):
+        """Valeur du champ au chargement ou à la dernière sauvegarde (None si nouvelle instance)"""
+        values = self.__dict__.setdefault("_tracked_values", {})
+        if field not in values:
+            if self._state.adding or self.pk is None:
+                return None
+            attname = self._meta.get_field(field).attname
+            values[field] = (
+                type(self)
+                ._base_manager.using(self._state.db)
+                .filter(pk=self.pk)
+                .values_list(attname, flat=True)
+                .first()
+            )
+        return values[field]
+
+    def has_changed(self, field):
+        """Vrai si le champ diffère de sa valeur chargée (toujours vrai avant la création)"""
+        if self._state.adding:
+            return True
+        return getattr(self, self._meta.get_field(field).attname) != self.previous_value(field)
+
+    def changed_fields(self):
+        """Champs suivis modifiés depuis le chargement ou la dernière sauvegarde"""
+        return [name for name in self.tracked_fields if self.has_changed(name)]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self.snapshot_tracked_fields()
+        else:
+            update_fields = set(update_fields)
+            self.snapshot_tracked_fields(
+                [
+                    name
+                    for name in self.tracked_fields
+                    if name in update_fields or self._meta.get_field(name).attname in update_fields
+                ]
+            )
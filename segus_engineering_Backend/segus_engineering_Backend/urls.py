@@ -4,6 +4,7 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from segus_engineering_Backend.intake import intake_stats_view
 from users.views import (
     UserViewSet,
     jwt_create_with_email,
@@ -53,6 +54,8 @@ urlpatterns = [
     path("api/gamification/", include("gamification.urls")),
     path("api/realtime/", include("realtime.urls")),
     path("api/contact-messages/", include("contact_messages.urls")),
+    # Compteurs de la garde des formulaires publics
+    path("api/intake/stats/", intake_stats_view, name="intake-stats"),
     path("", include("jobs.urls")),
 ]
 
@@ -47,6 +47,13 @@ CORS_ALLOW_ALL_ORIGINS = True
 # Media files for tests
 MEDIA_ROOT = "/tmp/test_media/"
 
+# Extraction des CV exécutée dans le thread du test
+JOBS_CV_WORKERS = 0
+
+# Garde des formulaires publics désactivée (les tests dédiés l'activent)
+INTAKE_RATES = {}
+INTAKE_DEDUP_WINDOW = 0
+
 # Static files for tests
 STATIC_ROOT = "/tmp/test_static/"
 